@@ -1,4 +1,47 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from os import cpu_count
 from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from energyplus_refactor_helper.file_budget import FileBudget
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.timing import timer
+
+_worker_state: dict = {}  # the action, function list, and budget of this worker process, set by _initialize_worker
+
+
+def _initialize_worker(action: 'RefactorBase', functions: list[str], budget: Optional[FileBudget]) -> None:
+    """
+    Sets up a worker process of RefactorBase.map_reduce, which receives the action once rather than once per file.
+
+    :param action: The action instance whose map_file hook is run on each file.
+    :param functions: The list of function calls to search for in the source files.
+    :param budget: Optional limits on the work spent on each source file.
+    :return: None
+    """
+    _worker_state['action'] = action
+    _worker_state['functions'] = functions
+    _worker_state['budget'] = budget
+
+
+def _map_files_in_worker(batch: list[tuple[Path, Optional[str], Optional[int]]]) -> list[Any]:
+    """
+    Parses a batch of source files in a worker process of RefactorBase.map_reduce and runs the map_file hook of the
+    action on each.  Only the path, and the text and size when they don't come from the path, are sent to the worker,
+    and only the results of the hook are sent back, so the parsed files themselves never have to be pickled.
+
+    :param batch: A list of tuples of the file path, the optional source code if it has already been read, such as from
+                  a git revision, and the optional size of the file for the byte budget.
+    :return: The results of the map_file hook, in the order of the batch.
+    """
+    results = []
+    for path, text, size in batch:
+        source_file = SourceFile(path, _worker_state['functions'], text, _worker_state['budget'], size)
+        results.append(_worker_state['action'].map_file(source_file))
+    return results
 
 
 class RefactorBase:
@@ -23,5 +66,163 @@ class RefactorBase:
             individual_call_strings.append(including_prefix)
         return '\n'.join(individual_call_strings)
 
-    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool) -> int:
+    def map_file(self, source_file: SourceFile) -> Any:
+        """
+        The map hook run on each parsed source file by map_reduce.  By default this runs map_group on every function
+        call group of the file and returns the list of results, so an action only needs to override map_group when it
+        works group by group.  When map_reduce runs on worker processes, this is called on a copy of the action in the
+        worker, so the action and the returned value must be picklable, and changes to the action are not seen by the
+        main process.
+
+        :param source_file: The parsed source file.
+        :return: Any picklable value, which is handed to reduce.
+        """
+        return [self.map_group(group) for group in source_file.found_function_groups]
+
+    def map_group(self, function_group) -> Any:
+        """
+        The map hook run by the default map_file on each function call group.
+
+        :param function_group: The FunctionCallGroup to inspect.
+        :return: Any picklable value.
+        """
+        raise NotImplementedError()
+
+    def reduce(self, results: Iterator[Any]) -> Any:
+        """
+        The reduce hook run by map_reduce to merge the results of map_file into a single result.  The results are
+        streamed in file order as they become available, so a reduce that folds them into a running total never needs
+        to hold all of them at once.  By default this simply collects them into a list.
+
+        :param results: An iterator of map_file results, one per source file, in the sorted order of the files.
+        :return: The merged result.
+        """
+        return list(results)
+
+    def map_reduce(self, source_folder: SourceFolder, files: list[Path], processes: Optional[int] = None,
+                   batch_size: int = 16, cache: Optional[dict[str, Any]] = None) -> Any:
+        """
+        Runs the map_file hook on each of the given source files and merges the results with the reduce hook.  The
+        files are parsed and mapped on a pool of worker processes, which each parse their own files, so new actions
+        can use every core without handling any of the plumbing themselves.  With a single process, everything runs in
+        this process instead, which avoids the start-up and pickling costs for small runs.
+
+        The files are handed to the workers in batches, and only two batches per worker are in flight at once, so the
+        files of a git revision, which are read in this process, are read as the workers need them rather than all up
+        front, and memory use does not grow with the size of the tree.
+
+        For a git revision, or a checkout analyzed as one, the map_file results are also cached by the blob SHA of each
+        file, so a file whose content was already mapped, at another path or in another revision mapped with the same
+        cache, is neither read nor parsed again.  A file whose blob was already parsed into the blob cache of the source
+        folder is mapped from that parse in this process rather than in a worker.  Only share a cache between runs of
+        the same action with the same function list, and only for a map_file whose result depends on the file content
+        alone, not on its path.
+
+        :param source_folder: The SourceFolder the files were found in, which supplies the function list, budget, and
+                              any git revision to read the files from.
+        :param files: A list of source file paths, as returned from SourceFolder.find_files.
+        :param processes: The number of worker processes, by default one per core, or 1 to run in this process.
+        :param batch_size: The number of files sent to a worker process at once.
+        :param cache: An optional dictionary of map_file results keyed by blob SHA, which is filled by this run and can
+                      be shared with later runs, such as over other revisions of the same repository.
+        :return: The result of the reduce hook.
+        """
+        if cache is None:
+            cache = {}
+        with timer.phase('map_reduce', len(files)):
+            if processes == 1:
+                return self.reduce(self._map_in_process(source_folder, sorted(files), cache))
+            with ProcessPoolExecutor(
+                processes, initializer=_initialize_worker,
+                initargs=(self, source_folder.function_call_list, source_folder.budget)
+            ) as executor:
+                in_flight = 2 * (processes if processes else cpu_count() or 1)
+                return self.reduce(
+                    self._stream_batches(executor, source_folder, sorted(files), batch_size, in_flight, cache)
+                )
+
+    def _map_in_process(self, source_folder: SourceFolder, files: list[Path], cache: dict[str, Any]) -> Iterator[Any]:
+        """
+        A generator that parses and maps the files in this process, for map_reduce with a single process, and yields
+        the map_file results in file order.
+
+        :param source_folder: The SourceFolder the files were found in.
+        :param files: The sorted list of source file paths.
+        :param cache: The map_file results keyed by blob SHA, used and filled when the files come from a revision.
+        :return: An iterator of map_file results, one per source file.
+        """
+        if not source_folder.revision:
+            for source_file in source_folder.iter_source_files(files):
+                yield self.map_file(source_file)
+            return
+        for path in files:
+            sha = source_folder.revision.blob_sha(path)
+            source_folder.file_shas[path] = sha
+            if sha not in cache:
+                cache[sha] = self.map_file(source_folder.analyze_revision_file(path, sha))
+            yield cache[sha]
+
+    def _stream_batches(self, executor: ProcessPoolExecutor, source_folder: SourceFolder, files: list[Path],
+                        batch_size: int, in_flight: int, cache: dict[str, Any]) -> Iterator[Any]:
+        """
+        A generator that submits the files to the worker processes of map_reduce one batch at a time, keeping at most
+        in_flight batches submitted but not yet consumed, and yields the map_file results in file order.  Files of a
+        revision whose result is cached, or whose blob was already parsed, are not sent to the workers.
+
+        :param executor: The pool of worker processes.
+        :param source_folder: The SourceFolder the files were found in, which reads the files of a git revision.
+        :param files: The sorted list of source file paths.
+        :param batch_size: The number of files in each batch.
+        :param in_flight: The maximum number of batches submitted and not yet consumed.
+        :param cache: The map_file results keyed by blob SHA, used and filled when the files come from a revision.
+        :return: An iterator of map_file results, one per source file.
+        """
+        # for each batch, a (blob SHA, is ready, result or index in the worker results) slot per file, and the future
+        # of the files sent to the workers, if any
+        pending: deque[tuple[list[tuple[Optional[str], bool, Any]], Optional[Future]]] = deque()
+        for start in range(0, len(files), batch_size):
+            slots = []
+            batch = []
+            for path in files[start:start + batch_size]:
+                sha = None
+                if source_folder.revision:
+                    sha = source_folder.revision.blob_sha(path)
+                    source_folder.file_shas[path] = sha
+                if sha in cache:
+                    slots.append((sha, True, cache[sha]))
+                elif sha in source_folder.blob_cache:
+                    slots.append((sha, True, self.map_file(source_folder.analyze_revision_file(path, sha))))
+                elif source_folder.revision:  # read here, as the workers have no access to the git process
+                    slots.append((sha, False, len(batch)))
+                    batch.append((path, *source_folder.read_within_budget(path)))
+                else:
+                    slots.append((sha, False, len(batch)))
+                    batch.append((path, None, None))
+            pending.append((slots, executor.submit(_map_files_in_worker, batch) if batch else None))
+            if len(pending) >= in_flight:
+                yield from self._collect_batch(*pending.popleft(), cache)
+        while pending:
+            yield from self._collect_batch(*pending.popleft(), cache)
+
+    @staticmethod
+    def _collect_batch(slots: list[tuple[Optional[str], bool, Any]], future: Optional[Future],
+                       cache: dict[str, Any]) -> Iterator[Any]:
+        """
+        A generator that waits for the worker results of one batch of _stream_batches, and yields the map_file results
+        of the batch in file order, caching those of revision files by their blob SHA.
+
+        :param slots: The (blob SHA, is ready, result or index in the worker results) slot of each file of the batch.
+        :param future: The future of the files sent to the workers, or None if none were.
+        :param cache: The map_file results keyed by blob SHA.
+        :return: An iterator of map_file results, one per file of the batch.
+        """
+        worker_results = future.result() if future else []
+        for sha, ready, value in slots:
+            result = value if ready else worker_results[value]
+            if sha is not None:
+                cache[sha] = result
+            yield result
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
         raise NotImplementedError()
@@ -0,0 +1,86 @@
+from json import dumps
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.git_revision import GitBlobReader, GitRevision, WorkingTree
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.revision_comparison import compare_revisions, keyed_group
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class CompareRevisions(RefactorBase):
+    """
+    This action analyzes the error calls in two or more revisions of the EnergyPlus repository, and reports which
+    function call groups were added, removed, or changed in each file from one revision to the next.  The first
+    revision is the one given by --rev, or the checkout of the source repository itself if --rev is not given, and it
+    is compared against each revision given by --against in turn.  Each --against entry can either be a git revision
+    of the source repository, or the path to another checkout.
+    """
+
+    def map_group(self, function_group) -> tuple[str, dict]:
+        """
+        The map hook run on each function call group, which keeps only what the comparison needs.
+
+        :param function_group: The FunctionCallGroup to reduce.
+        :return: The group as returned by keyed_group.
+        """
+        return keyed_group(function_group)
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method analyzes each revision and writes the comparison to comparison.json in the output directory.
+        The files are parsed on worker processes with map_reduce, and each distinct file content is only parsed once
+        across all the revisions, as the mapped groups are cached by blob SHA.
+
+        :param source_repo: The root of the EnergyPlus repository to operate upon.
+        :param output_path: An output directory where the comparison should be written.
+        :param edit_in_place: Unused for this action, as the comparison never modifies the revisions.
+        :param skip_plots: Unused for this action, as the comparison does not generate plots.
+        :param options: Settings for this run, which must include at least one --against revision.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        labels = [options.revision if options.revision else str(source_repo), *options.compare_against]
+        if len(labels) < 2:
+            logger.log("At least two revisions are needed for a comparison, add one or more with --against")
+            return 1
+        reader = GitBlobReader(source_repo)
+        mapped_blobs = {}  # the keyed groups of each distinct file content, shared by all the revisions
+        analyzed_revisions = []
+        try:
+            for label_num, label in enumerate(labels):
+                logger.log(f"Analyzing revision {label}")
+                if label_num == 0 and not options.revision:
+                    revision = WorkingTree(source_repo, 'src/EnergyPlus')
+                elif Path(label).is_dir():
+                    revision = WorkingTree(Path(label), 'src/EnergyPlus')
+                else:
+                    revision = GitRevision(source_repo, label, 'src/EnergyPlus', reader)
+                root_path = revision.repo / 'src' / 'EnergyPlus'
+                source_folder = SourceFolder(
+                    root_path, ErrorCallRefactor.function_calls(), revision, budget=options.budget
+                )
+                files = sorted(source_folder.find_files(['UtilityRoutines.cc']))
+                mapped_files = self.map_reduce(source_folder, files, cache=mapped_blobs)
+                analyzed_revisions.append({
+                    path.relative_to(root_path).as_posix(): (source_folder.file_shas[path], groups)
+                    for path, groups in zip(files, mapped_files)
+                })
+        except ValueError as e:
+            logger.log(str(e))
+            return 1
+        finally:
+            reader.close()
+        logger.log(f"Parsed {len(mapped_blobs)} distinct files across {len(labels)} revisions")
+        comparisons = []
+        for label_num in range(1, len(labels)):
+            comparison = compare_revisions(analyzed_revisions[label_num - 1], analyzed_revisions[label_num])
+            comparisons.append({'from': labels[label_num - 1], 'to': labels[label_num], **comparison})
+        if not output_path.exists():
+            output_path.mkdir()
+        (output_path / 'comparison.json').write_text(dumps({'revisions': labels, 'comparisons': comparisons}, indent=2))
+        return 0
@@ -0,0 +1,45 @@
+import socket
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.daemon import AnalysisDaemon
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class RunDaemon(RefactorBase):
+    """
+    This action starts a long-running daemon for interactive error call refactoring sessions.  The error call action,
+    including its language model, and the parsed source files are kept in memory, and requests are answered over the
+    Unix socket daemon.sock in the output directory.  Use :func:`energyplus_refactor_helper.daemon.send_request` to
+    talk to the daemon, and send a stop command to shut it down.  Unix sockets are not available on every platform,
+    such as older Windows versions of Python, where this action reports the problem and fails.
+    """
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method serves requests until the daemon is stopped.
+
+        :param source_repo: The root of the EnergyPlus repository to operate upon.
+        :param output_path: An output directory where the daemon socket is created.
+        :param edit_in_place: Unused for this action, as the daemon only previews rewrites.
+        :param skip_plots: Unused for this action, as each report request says whether to skip plots.
+        :param options: Settings for this run, including the poll interval.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        if not hasattr(socket, 'AF_UNIX'):
+            logger.log("The daemon needs Unix sockets, which are not available on this platform")
+            return 1
+        if not output_path.exists():
+            output_path.mkdir()
+        action = ErrorCallRefactor()
+        _ = action.known_codes  # loads the language model and known messages now, so the first request is not slow
+        daemon = AnalysisDaemon(
+            source_repo / 'src' / 'EnergyPlus', action.function_calls(), action.visitor, ['UtilityRoutines.cc']
+        )
+        daemon.serve(output_path / 'daemon.sock', options.poll_interval)
+        return 0
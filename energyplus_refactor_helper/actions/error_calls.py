@@ -1,15 +1,24 @@
-from json import loads
+from json import dumps, loads
 from os import environ
 from pathlib import Path
-from time import time
-
-import spacy
-from spacy.tokens import Doc
+from typing import Optional, TYPE_CHECKING
 
+from energyplus_refactor_helper.git_revision import GitRevision
 from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.report_output import SIMILARITY_REPORT_NAMES
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.similarity import (
+    BLOCKED_BY, block_key, compare_messages, group_by_template, write_comparisons, write_template_frequencies
+)
+from energyplus_refactor_helper.snapshot import AnalysisSnapshot
 from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.timing import timer
 from energyplus_refactor_helper.actions.base import RefactorBase
 
+if TYPE_CHECKING:  # pragma: no cover
+    from spacy.language import Language
+    from spacy.tokens import Doc
+
 
 class ErrorCallRefactor(RefactorBase):
     """
@@ -84,12 +93,37 @@ class ErrorCallRefactor(RefactorBase):
         super().__init__()
         self.matched_error_codes = 0
         self.missed_error_codes = 0
-        self.nlp = spacy.load("en_core_web_md")
-        actions_dir = Path(__file__).resolve().parent
-        known_errors_file = actions_dir / "known_error_calls.json"
-        json_data = loads(known_errors_file.read_text())
-        codes = json_data["known_error_codes"]
-        self.known_codes = [(self.nlp(c["message"]), self.NewErrorCodes.get_value(c['code'])) for c in codes]
+        self._nlp: Optional['Language'] = None
+        self._known_codes: Optional[list[tuple['Doc', int]]] = None
+
+    @property
+    def nlp(self) -> 'Language':
+        """
+        The SpaCy language model used to classify and compare error messages.  SpaCy itself is imported and the model is
+        loaded the first time this property is used, as this takes several seconds and many runs never need it.
+
+        :return: The loaded SpaCy language model.
+        """
+        if self._nlp is None:
+            import spacy
+            self._nlp = spacy.load("en_core_web_md")
+        return self._nlp
+
+    @property
+    def known_codes(self) -> list[tuple['Doc', int]]:
+        """
+        The known error messages, processed by the language model, each paired with its error code.  These are loaded
+        from known_error_calls.json the first time this property is used.
+
+        :return: A list of (processed message, error code) tuples.
+        """
+        if self._known_codes is None:
+            actions_dir = Path(__file__).resolve().parent
+            known_errors_file = actions_dir / "known_error_calls.json"
+            json_data = loads(known_errors_file.read_text())
+            codes = json_data["known_error_codes"]
+            self._known_codes = [(self.nlp(c["message"]), self.NewErrorCodes.get_value(c['code'])) for c in codes]
+        return self._known_codes
 
     @staticmethod
     def function_calls() -> list[str]:
@@ -192,7 +226,7 @@ class ErrorCallRefactor(RefactorBase):
             else:
                 return text(potential_error_code)
 
-    def get_error_code(self, error_message_spacy_doc: Doc) -> int:
+    def get_error_code(self, error_message_spacy_doc: 'Doc') -> int:
         high_score = 0
         high_score_index = -1
         for i, x in enumerate(self.known_codes):
@@ -205,7 +239,71 @@ class ErrorCallRefactor(RefactorBase):
             return self.known_codes[high_score_index][1]
         return self.NewErrorCodes.error_code_unclassified
 
-    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool) -> int:
+    @staticmethod
+    def scoring_settings(options: RunOptions, pair_fraction: float = 1.0, seed: int = 0) -> dict:
+        """
+        Describes the settings that decide which message pairs are scored, so that scored pairs can be reused as long as
+        these settings have not changed.
+
+        :param options: The settings of the run, of which the all pairs flag is used.
+        :param pair_fraction: The fraction of the message pairs scored.
+        :param seed: The seed used to choose the scored pairs.
+        :return: A dictionary of the settings.
+        """
+        return {'all_pairs': options.all_pairs, 'blocked_by': BLOCKED_BY, 'pair_fraction': pair_fraction, 'seed': seed}
+
+    def write_similarities(self, messages: list[str], call_patterns: dict[str, list[int]], output_path: Path,
+                           options: RunOptions, pair_fraction: float = 1.0, seed: int = 0,
+                           only: Optional[list[str]] = None,
+                           scored: Optional[dict] = None) -> Optional[set[tuple[str, str, float]]]:
+        """
+        Groups the rewritten messages by template and writes the template frequencies, and then scores the similarity
+        of one message per template with the language model and writes the most similar pairs.  Messages differing
+        only in their arguments share a template, so only one of each is scored.  Pairs already scored by an earlier
+        run with the same scoring settings can be given, in which case the language model is not needed at all, and
+        only the number of pairs written can differ.
+
+        :param messages: The rewritten message of every function call group, with newlines replaced by spaces.
+        :param call_patterns: The cleaned call types of the first group rewritten to each message.
+        :param output_path: The output directory to write template_frequency.csv and comparisons.txt into.
+        :param options: The settings of this run, of which the all pairs flag and the similarity top count are used.
+        :param pair_fraction: The fraction of the message pairs to score, for a sampled run.
+        :param seed: The seed used to choose the scored pairs when only a fraction of them is scored.
+        :param only: An optional list of the similarity reports to write, by default both of them.
+        :param scored: Optional pairs scored earlier, as a dictionary of the 'settings' they were scored with, as
+                       returned by scoring_settings, and the scored 'pairs'.  They are only used if the settings match.
+        :return: The scored pairs, or None if the comparisons were not requested.
+        """
+        if only is None:
+            only = SIMILARITY_REPORT_NAMES
+        with timer.phase('templates', len(messages)):
+            templates = group_by_template(messages)
+        if 'template_frequency.csv' in only:
+            with timer.phase('report.template_frequency_csv', len(templates)):
+                write_template_frequencies(templates, output_path / 'template_frequency.csv')
+        if 'comparisons.txt' not in only:
+            return None
+        counts = {texts[0]: len(texts) for texts in templates.values()}
+        if scored and scored['settings'] == self.scoring_settings(options, pair_fraction, seed):
+            logger.log(f"Reusing {len(scored['pairs'])} scored pairs of {len(counts)} message templates")
+            compares = scored['pairs']
+        else:
+            logger.log(f"Scoring {len(counts)} message templates, out of {len(messages)} messages")
+            logger.log("Generating SpaCy text structures (usually ~20 seconds)")
+            with timer.phase('nlp.process_messages', len(counts)):
+                docs = list(self.nlp.pipe(counts))
+            block_keys = None if options.all_pairs else [block_key(t, call_patterns[t]) for t in counts]
+            with timer.phase('similarity') as span:
+                compares = compare_messages(docs, block_keys, pair_fraction=pair_fraction, seed=seed)
+                span.items = len(compares)
+        # don't do this on CI
+        if 'CI' not in environ:  # pragma: no cover
+            with timer.phase('report.comparisons_txt', len(compares)):
+                write_comparisons(compares, output_path / 'comparisons.txt', options.similarity_top, counts)
+        return compares
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
         """This method performs the actual run operations based on input arguments for the error call action.
         This is similar to the base class run() method, but with some specializations.  For example, this run() method
         gathers the error calls into a special structure where we can find similarities and lookup meaningful grouping
@@ -214,57 +312,97 @@ class ErrorCallRefactor(RefactorBase):
         :param source_repo: The root of the EnergyPlus repository to operate upon.
         :param output_path: An output directory where logs and results should be dumped.
         :param edit_in_place: A flag for whether we are actually editing the repository files in place.  If not, then
-                              this will mostly just result in analysis, with outputs in the output_path provided.
+                              this will mostly just result in analysis, with outputs in the output_path provided.  A
+                              dry run in the options writes the edits to a patch instead, with or without this flag.
         :param skip_plots: A flag for whether to skip plot generation, which can be time-consuming.
+        :param options: Optional settings for this run, such as the shard or git revision to analyze.
         :return: A status flag, 0 if successful, 1 if not.
         """
+        if options is None:
+            options = RunOptions()
         root_path = source_repo / 'src' / 'EnergyPlus'
-        source_folder = SourceFolder(root_path, self.function_calls())
+        revision = None
+        if options.revision:
+            if edit_in_place and not options.dry_run:
+                logger.log("Cannot edit files in place when analyzing a git revision, check it out or use a dry run")
+                return 1
+            try:
+                revision = GitRevision(source_repo, options.revision, 'src/EnergyPlus')
+            except ValueError as e:
+                logger.log(str(e))
+                return 1
+        source_folder = SourceFolder(
+            root_path, self.function_calls(), revision, budget=options.budget, read_ahead=options.read_ahead
+        )
         matched_source_files = source_folder.find_files(['UtilityRoutines.cc'])
-        processed_source_files = source_folder.analyze_source_files(matched_source_files)
+        if options.shard:
+            matched_source_files = source_folder.shard_files(matched_source_files, *options.shard)
+        sample = None
+        if options.sample:
+            sample = source_folder.sample_files(matched_source_files, options.sample, options.sample_seed)
+            matched_source_files = sample.files
+            logger.log(f"Sampling {len(matched_source_files)} of {sample.total_file_count} files")
+        try:
+            processed_source_files = source_folder.analyze_source_files(matched_source_files)
+        finally:
+            if revision:
+                revision.reader.close()
         error_message_texts = []
-        for source_file in processed_source_files:
-            for group in source_file.found_function_groups:
-                new_group_text = self.visitor(group)
-                error_message_texts.append(new_group_text.replace('\n', ' '))
-        nlp = spacy.load("en_core_web_md")
-        encounters = set()
-        compares = set()
-        logger.log("Generating SpaCy text structures (usually ~20 seconds)")
-        docs = list(nlp.pipe(error_message_texts))
-        n = len(docs)
-        expected_comparison_count = (n * n - n) / 2
-        counter = 0
-        start_time = time()
-        logger.log("About to determine text similarities between messages (usually ~20+ minutes)")
-        for i, d1 in enumerate(docs):
-            for j, d2 in enumerate(docs):
-                if i == j or (i, j) in encounters or (j, i) in encounters:
-                    continue
-                encounters.add((i, j))
-                compares.add((d1.text, d2.text, d1.similarity(d2)))
-                counter += 1
-                if counter % 200 == 0:  # pragma: no cover
-                    elapsed_time = time() - start_time
-                    estimated_total_time = (elapsed_time / (counter + 1)) * expected_comparison_count
-                    estimated_seconds_remaining = estimated_total_time - elapsed_time
-                    estimated_time = f"Estimated time remaining: {estimated_seconds_remaining:.1f}s"
-                    if estimated_seconds_remaining >= 60:
-                        minutes = int(estimated_seconds_remaining // 60)
-                        remaining_seconds = estimated_seconds_remaining % 60
-                        estimated_time = f"Estimated time remaining: {minutes}m {remaining_seconds:.1f}s"
-                    logger.terminal_progress_bar(counter, expected_comparison_count, estimated_time)
-        logger.terminal_progress_done()
-        # don't do this on CI
-        if 'CI' not in environ:  # pragma: no cover
-            comparison_file_path = output_path / 'comparisons.txt'
-            with comparison_file_path.open('w') as f:
-                for i, compare in enumerate(sorted(compares, key=lambda x: x[2], reverse=True)):
-                    if i > 10000:  # pragma: no cover
-                        break
-                    f.write(f"{compare[0]} 😊 {compare[1]} 😊 {compare[2]}\n")
-        source_folder.generate_reports(processed_source_files, output_path, skip_plots=skip_plots)
-        if edit_in_place:  # pragma: no cover
+        call_patterns = {}  # the cleaned call types of the first group rewritten to each message
+        candidates = {}
+        candidate_call_types = {}  # the cleaned call types of every group, per file, for merging sharded runs
+        group_texts = {}  # the new text of each group, keyed by the group id, reused to build the rewritten files
+        with timer.phase('nlp.classify_groups') as span:
+            for source_file in processed_source_files:
+                file_texts = []
+                file_call_types = []
+                for group in source_file.found_function_groups:
+                    new_group_text = self.visitor(group)
+                    group_texts[id(group)] = new_group_text
+                    file_texts.append(new_group_text.replace('\n', ' '))
+                    file_call_types.append(group.cleaned_call_types())
+                    call_patterns.setdefault(file_texts[-1], file_call_types[-1])
+                error_message_texts.extend(file_texts)
+                relative_path = source_file.path.relative_to(root_path).as_posix()
+                candidates[relative_path] = file_texts
+                candidate_call_types[relative_path] = file_call_types
+            span.items = len(error_message_texts)
+        source_folder.generate_reports(
+            processed_source_files, output_path, skip_plots, options.compression, options.sparse_lines,
+            results_page_size=options.results_page_size
+        )
+        compares = None
+        pair_sample = (sample.fraction, sample.seed) if sample else (1.0, 0)
+        if options.shard:
+            # similarities are scored across all shards at once when the partial results are merged
+            source_folder.generate_shard_manifest(processed_source_files, output_path / 'shard.json', options.shard)
+            shard_candidates = {
+                f: [{'message': t, 'call_types': c} for t, c in zip(texts, candidate_call_types[f])]
+                for f, texts in candidates.items()
+            }
+            (output_path / 'similarity_candidates.json').write_text(dumps(shard_candidates, indent=2))
+        else:
+            compares = self.write_similarities(error_message_texts, call_patterns, output_path, options, *pair_sample)
+        scored = None if compares is None else {
+            'settings': self.scoring_settings(options, *pair_sample), 'pairs': compares
+        }
+        AnalysisSnapshot(
+            root_path, self.function_calls(), processed_source_files, candidates, call_patterns, scored
+        ).write(output_path / AnalysisSnapshot.FILE_NAME)
+        if sample:
+            source_folder.generate_sample_summary(
+                processed_source_files, sample, output_path / 'sample_summary.json', compares
+            )
+
+        # the groups were already classified above, so the rewrites look their texts up rather than classifying again
+        def classified_visitor(group) -> str:
+            return group_texts[id(group)]
+
+        if options.dry_run:
+            source_folder.write_rewrite_patch(
+                processed_source_files, classified_visitor, True, source_repo, output_path / 'rewrite.patch'
+            )
+        elif edit_in_place:  # pragma: no cover
             # the rewrite files in place method is already being tested, not including it in coverage here
-            source_folder.rewrite_files_in_place(processed_source_files, self.visitor, True)
+            source_folder.rewrite_files_in_place(processed_source_files, classified_visitor, True)
         return 0 if source_folder.success else 1
@@ -0,0 +1,49 @@
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.call_index import CallIndex
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class IndexCalls(RefactorBase):
+    """
+    This action exports every error call in the EnergyPlus repository to a SQLite call index, call_index.sqlite, in the
+    output directory.  If the index already exists, only the files that changed since it was last updated are parsed.
+    """
+
+    INDEX_FILE_NAME = 'call_index.sqlite'
+
+    @staticmethod
+    def update_index(source_repo: Path, output_path: Path) -> CallIndex:
+        """
+        Opens the call index in the output directory, creating the directory and index if needed, and brings the index
+        up to date with the source repository.
+
+        :param source_repo: The root of the EnergyPlus repository to index.
+        :param output_path: The output directory holding the call index.
+        :return: The opened and updated call index, which should be closed by the caller.
+        """
+        if not output_path.exists():
+            output_path.mkdir()
+        root_path = source_repo / 'src' / 'EnergyPlus'
+        functions = ErrorCallRefactor.function_calls()
+        call_index = CallIndex(output_path / IndexCalls.INDEX_FILE_NAME)
+        call_index.update(root_path, functions, SourceFolder(root_path, functions).find_files(['UtilityRoutines.cc']))
+        return call_index
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method builds or incrementally updates the call index.
+
+        :param source_repo: The root of the EnergyPlus repository to index.
+        :param output_path: An output directory where the call index is kept.
+        :param edit_in_place: Unused for this action, as the index never modifies the repository.
+        :param skip_plots: Unused for this action, as the index does not generate plots.
+        :param options: Unused for this action.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        self.update_index(source_repo, output_path).close()
+        return 0
@@ -1,9 +1,29 @@
+from importlib import import_module
 from typing import Type
 
 from energyplus_refactor_helper.actions.base import RefactorBase
-from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
 
 
-all_actions: dict[str, Type[RefactorBase]] = {
-    'error_call_refactor': ErrorCallRefactor
+# each action maps to the import path of its class, so only the selected action, and whatever heavy dependencies it
+# needs, are imported when the program runs
+all_actions: dict[str, str] = {
+    'error_call_refactor': 'energyplus_refactor_helper.actions.error_calls:ErrorCallRefactor',
+    'merge_shards': 'energyplus_refactor_helper.actions.merge_shards:MergeShards',
+    'compare_revisions': 'energyplus_refactor_helper.actions.compare_revisions:CompareRevisions',
+    'index_calls': 'energyplus_refactor_helper.actions.index_calls:IndexCalls',
+    'query_calls': 'energyplus_refactor_helper.actions.query_calls:QueryCalls',
+    'daemon': 'energyplus_refactor_helper.actions.daemon:RunDaemon',
+    'report': 'energyplus_refactor_helper.actions.report:Report',
+    'perf_guard': 'energyplus_refactor_helper.actions.perf_guard:PerformanceGuard',
 }
+
+
+def get_action(action_name: str) -> Type[RefactorBase]:
+    """
+    Imports and returns the class for one of the actions listed in all_actions.
+
+    :param action_name: The name of the action, which must be one of the keys of all_actions.
+    :return: The action class, derived from RefactorBase.
+    """
+    module_name, class_name = all_actions[action_name].split(':')
+    return getattr(import_module(module_name), class_name)
@@ -0,0 +1,61 @@
+from json import dumps, loads
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class MergeShards(RefactorBase):
+    """
+    This action combines the partial outputs of several sharded runs into the outputs a single run would produce.
+    Each shard is expected to be run with the --shard option into its own output directory, and those directories are
+    then collected into one parent directory, which is passed to this action in place of the source repository.  Each
+    shard lists the message and call types of every group in similarity_candidates.json, so the similarities are
+    scored across all the shards exactly as a single run would score them.
+    """
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method merges the shard outputs found in the immediate subdirectories of the given directory.
+
+        :param source_repo: The directory containing one subdirectory of partial results per shard.
+        :param output_path: An output directory where the merged results should be written.
+        :param edit_in_place: Unused for this action, as the merge never touches a source repository.
+        :param skip_plots: Unused for this action, as plots cannot be rebuilt from the partial results.
+        :param options: Optional settings for this run, of which the report compression, and the all pairs flag and
+                        top count for similarities are used.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        shard_dirs = sorted(d for d in source_repo.iterdir() if (d / 'shard.json').exists())
+        if not shard_dirs:
+            logger.log(f"Could not find any shard results to merge in {source_repo}")
+            return 1
+        logger.log(f"Merging results from {len(shard_dirs)} shards")
+        try:
+            merged_files = SourceFolder.merge_shard_reports(shard_dirs, output_path, options.compression)
+        except ValueError as e:
+            logger.log(str(e))
+            return 1
+        candidates = {}
+        for shard_dir in shard_dirs:
+            candidates_file = shard_dir / 'similarity_candidates.json'
+            if candidates_file.exists():
+                candidates.update(loads(candidates_file.read_text()))
+        if candidates:
+            merged_candidates = {f: candidates[f] for f in merged_files}
+            (output_path / 'similarity_candidates.json').write_text(dumps(merged_candidates, indent=2))
+            # the messages and call patterns in the same order as a single run, so the similarities are scored the same
+            messages = []
+            call_patterns = {}
+            for merged_file in merged_files:
+                for candidate in merged_candidates[merged_file]:
+                    messages.append(candidate['message'])
+                    call_patterns.setdefault(candidate['message'], candidate['call_types'])
+            ErrorCallRefactor().write_similarities(messages, call_patterns, output_path, options)
+        return 0
@@ -0,0 +1,115 @@
+from json import dumps, loads
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.perf_guard import DEFAULT_TOLERANCES, collect_metrics, compare_metrics
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+from energyplus_refactor_helper.timing import timer
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class PerformanceGuard(RefactorBase):
+    """
+    This action checks the performance of the analysis against a stored baseline, failing if any phase got slower,
+    the parsing throughput dropped, or the peak memory grew beyond the tolerances kept in the baseline file.  It either
+    runs the error call analysis on the given repository, or on a synthetic corpus it generates in the output directory
+    so the check works offline, or reads the timings.json file of an earlier run.  With the update baseline option, the
+    measured metrics are written as the new baseline instead.
+    """
+
+    @staticmethod
+    def time_analysis(source_repo: Path, output_path: Path, skip_plots: bool, options: RunOptions,
+                      trace_memory: bool = True) -> Optional[tuple[dict, Optional[dict]]]:
+        """
+        Runs the error call analysis on a repository and returns the recorded phases.  Tracing memory slows the analysis
+        down several times, and unevenly, so the phases are timed on an untraced run, and the peak memory is measured on
+        a second, traced run, whose timings are discarded.  If memory tracing is already on for the whole program, the
+        one traced run is used for both.  The global timer is reset first, so only the phases of this analysis are
+        returned, and it is left holding the phases of the timed run.
+
+        :param source_repo: The root of the repository to analyze.
+        :param output_path: The output directory for the reports of the analysis.
+        :param skip_plots: A flag for whether to skip plot generation.
+        :param options: The settings of this run, which are passed on to the analysis.
+        :param trace_memory: A flag for whether to also measure the peak memory of each phase.
+        :return: A tuple of the recorded phases and memory, with None for the memory if it was not measured, or None if
+                 the analysis failed.
+        """
+        timer.reset()
+        if ErrorCallRefactor().run(source_repo, output_path, False, skip_plots, options) != 0:
+            return None
+        phases = dict(timer.phases)
+        if timer.trace_memory:
+            return phases, dict(timer.memory)
+        if not trace_memory:
+            return phases, None
+        timer.reset()
+        timer.start_memory_tracing(top_site_count=0)  # only the peaks are compared
+        try:
+            status = ErrorCallRefactor().run(source_repo, output_path, False, skip_plots, options)
+        finally:
+            timer.stop_memory_tracing()
+        memory = dict(timer.memory)
+        timer.reset()
+        timer.phases = phases
+        return (phases, memory) if status == 0 else None
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method measures the analysis, or reads earlier timings, and compares them against the baseline.
+
+        :param source_repo: The root of a repository to analyze, or the timings.json file of an earlier run, whose
+                            memory.json is also read if it is next to it.  Unused if a synthetic corpus is generated.
+        :param output_path: An output directory where the analysis reports and the perf_guard.json results are written.
+        :param edit_in_place: Unused for this action, as the analysis never edits the repository.
+        :param skip_plots: A flag for whether to skip plot generation in the analysis.
+        :param options: Settings for this run, of which the baseline file, the update baseline flag, and the synthetic
+                        corpus size are used, and the rest passed on to the analysis.
+        :return: A status flag, 0 if the run is within the tolerances of the baseline, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        if not options.baseline:
+            logger.log("The performance guard needs a baseline file, given with --baseline")
+            return 1
+        baseline_file = Path(options.baseline)
+        baseline = loads(baseline_file.read_text()) if baseline_file.exists() else None
+        if baseline is None and not options.update_baseline:
+            logger.log(f"Could not find the performance baseline {baseline_file}, create it with --update-baseline")
+            return 1
+        output_path.mkdir(parents=True, exist_ok=True)
+        if options.corpus_files:
+            # generated into the output directory, so a real checkout given as the source repository is never written to
+            source_repo = output_path / 'corpus'
+            logger.log(f"Generating a synthetic corpus of {options.corpus_files} files in {source_repo}")
+            generate_corpus(source_repo, options.corpus_files)
+        if source_repo.is_file():
+            phases = loads(source_repo.read_text())['phases']
+            memory_file = source_repo.parent / 'memory.json'
+            memory = loads(memory_file.read_text())['phases'] if memory_file.exists() else None
+        else:
+            # the peaks take a second, traced run, so they are only measured if they are stored or compared
+            trace_memory = options.update_baseline or any(
+                'peak_memory' in phase for phase in baseline['metrics']['phases'].values()
+            )
+            recorded = self.time_analysis(source_repo, output_path / 'analysis', skip_plots, options, trace_memory)
+            if recorded is None:
+                logger.log("The analysis failed, so its performance could not be checked")
+                return 1
+            phases, memory = recorded
+        metrics = collect_metrics(phases, memory)
+        if options.update_baseline:
+            tolerances = baseline['tolerances'] if baseline else DEFAULT_TOLERANCES
+            baseline_file.write_text(dumps({'tolerances': tolerances, 'metrics': metrics}, indent=2))
+            logger.log(f"Wrote a new performance baseline to {baseline_file}")
+            return 0
+        regressions = compare_metrics(metrics, baseline['metrics'], baseline.get('tolerances'))
+        results = {'metrics': metrics, 'baseline': baseline, 'regressions': regressions}
+        (output_path / 'perf_guard.json').write_text(dumps(results, indent=2))
+        for regression in regressions:
+            logger.log(regression)
+        logger.log(f"Performance check found {len(regressions)} regressions against {baseline_file}")
+        return 1 if regressions else 0
@@ -0,0 +1,47 @@
+from json import dumps
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.call_index import CallIndex
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.index_calls import IndexCalls
+
+
+class QueryCalls(RefactorBase):
+    """
+    This action runs a filtered query against the SQLite call index in the output directory, logging each matching
+    call and writing the full details to query_results.json.  The index is brought up to date first, which only parses
+    the files that changed since the last update, so repeated queries never re-parse the whole tree.  Finding the
+    changed files still walks the whole tree, so the refresh can be skipped to query the index as it was last updated.
+    """
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method updates the call index and then queries it with the filters given in the run options.
+
+        :param source_repo: The root of the EnergyPlus repository that was indexed.
+        :param output_path: An output directory where the call index is kept and the query results are written.
+        :param edit_in_place: Unused for this action, as the query never modifies the repository.
+        :param skip_plots: Unused for this action, as the query does not generate plots.
+        :param options: Settings for this run, including the query filters.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        index_path = output_path / IndexCalls.INDEX_FILE_NAME
+        if options.refresh_index or not index_path.exists():
+            call_index = IndexCalls.update_index(source_repo, output_path)
+        else:
+            call_index = CallIndex(index_path)
+        results = call_index.query(**options.query_filters)
+        call_index.close()
+        # the results go through the logger, so they stay in order with its messages and are kept in the log file
+        for result in results:
+            arguments = ', '.join(result['arguments'])
+            logger.log(f"{result['file']}:{result['start_line']}: {result['function_name']}({arguments})")
+        logger.log(f"Found {len(results)} matching calls")
+        (output_path / 'query_results.json').write_text(dumps(results, indent=2))
+        logger.flush()
+        return 0
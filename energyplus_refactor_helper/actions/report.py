@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Optional
+
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.report_output import SIMILARITY_REPORT_NAMES, SOURCE_REPORT_NAMES
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.snapshot import AnalysisSnapshot
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+
+
+class Report(RefactorBase):
+    """
+    This action regenerates the reports of an earlier error_call_refactor run from the analysis snapshot it wrote,
+    without discovering or parsing the source tree again, so that report options, such as plots or the number of
+    similar pairs, can be changed in seconds.  Either every report of the original run, or only the reports given with
+    the --report option, are written.  The message pairs scored by the original run are reused, and only scored again
+    if the --all-pairs or --sample options change which pairs are scored.
+    """
+
+    def run(self, source_repo: Path, output_path: Path, edit_in_place: bool, skip_plots: bool,
+            options: Optional[RunOptions] = None) -> int:
+        """This method loads the analysis snapshot and writes the requested reports from it.
+
+        :param source_repo: The output directory of the earlier run, holding the analysis snapshot, or the snapshot
+                            file itself.
+        :param output_path: An output directory where the reports should be written, which may be the same directory.
+        :param edit_in_place: Unused for this action, as reports never touch a source repository.
+        :param skip_plots: A flag for whether to skip the plot, when no reports are listed in the options.
+        :param options: Optional settings for this run, of which the list of reports, report compression, sparse
+                        lines flag, results page size, and the similarity settings are used.
+        :return: A status flag, 0 if successful, 1 if not.
+        """
+        if options is None:
+            options = RunOptions()
+        snapshot_file = source_repo / AnalysisSnapshot.FILE_NAME if source_repo.is_dir() else source_repo
+        if not snapshot_file.exists():
+            logger.log(f"Could not find an analysis snapshot at {snapshot_file}")
+            return 1
+        try:
+            snapshot = AnalysisSnapshot.load(snapshot_file)
+        except ValueError as e:
+            logger.log(str(e))
+            return 1
+        logger.log(f"Loaded an analysis snapshot of {len(snapshot.source_files)} files")
+        source_reports = None if options.reports is None else [r for r in options.reports if r in SOURCE_REPORT_NAMES]
+        failed_reports = snapshot.source_folder.generate_reports(
+            snapshot.source_files, output_path, skip_plots, options.compression, options.sparse_lines, source_reports,
+            options.results_page_size
+        )
+        similarity_reports = SIMILARITY_REPORT_NAMES if options.reports is None else [
+            r for r in options.reports if r in SIMILARITY_REPORT_NAMES
+        ]
+        if similarity_reports and snapshot.messages:
+            messages = [t for file_texts in snapshot.messages.values() for t in file_texts]
+            if options.sample:
+                pair_sample = (options.sample, options.sample_seed)
+            elif snapshot.scored:  # the same pairs as the original run, so they are not scored again
+                pair_sample = (snapshot.scored['settings']['pair_fraction'], snapshot.scored['settings']['seed'])
+            else:
+                pair_sample = (1.0, 0)
+            ErrorCallRefactor().write_similarities(
+                messages, snapshot.call_patterns, output_path, options, *pair_sample, only=similarity_reports,
+                scored=snapshot.scored
+            )
+        return 1 if failed_reports else 0
@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing import Iterator, Optional
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.function_call import FunctionCall
+from energyplus_refactor_helper.function_call_group import FunctionCallGroup
+from energyplus_refactor_helper.git_revision import GitRevision
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+
+class AnalysisResult:
+    def __init__(self, source_folder: SourceFolder, source_files: list[SourceFile]):
+        """
+        The AnalysisResult class holds the parsed source files of an analysis in memory, for programs that embed the
+        analysis and want to work with the files, groups, and calls directly rather than reading back the report files.
+        Writing the reports is optional.
+
+        :param source_folder: The SourceFolder the files were found and parsed in.
+        :param source_files: The parsed source files, in the order they were analyzed.
+        """
+        self.source_folder = source_folder
+        self.source_files = source_files
+
+    def relative_path(self, source_file: SourceFile) -> str:
+        """
+        Returns the path of a source file relative to the root of the analyzed folder, such as HVAC/Fans.cc.
+
+        :param source_file: One of the source files of this analysis.
+        :return: The relative path, using forward slashes on every platform.
+        """
+        return source_file.path.relative_to(self.source_folder.root).as_posix()
+
+    def files(self) -> Iterator[SourceFile]:
+        """
+        Iterates over the parsed source files.
+
+        :return: An iterator of SourceFile instances.
+        """
+        yield from self.source_files
+
+    def groups(self) -> Iterator[tuple[SourceFile, FunctionCallGroup]]:
+        """
+        Iterates over every function call group of every source file, in file order and then source order.
+
+        :return: An iterator of (source file, function call group) tuples.
+        """
+        for source_file in self.source_files:
+            for group in source_file.found_function_groups:
+                yield source_file, group
+
+    def calls(self) -> Iterator[tuple[SourceFile, FunctionCall]]:
+        """
+        Iterates over every function call of every source file, in file order and then source order.
+
+        :return: An iterator of (source file, function call) tuples.
+        """
+        for source_file in self.source_files:
+            for call in source_file.found_functions:
+                yield source_file, call
+
+    def summary(self) -> dict:
+        """
+        Counts the files, function calls, function call groups, and calls which could not be parsed successfully, from
+        the columns of the CallTable of the files.
+
+        :return: A dictionary with 'files', 'calls', 'groups', and 'failed_calls' counts.
+        """
+        call_table = self.source_folder.get_call_table(self.source_files)
+        _, bad = call_table.calls_per_file()
+        return {
+            'files': len(self.source_files),
+            'calls': len(call_table),
+            'groups': call_table.group_count,
+            'failed_calls': int(bad.sum()),
+        }
+
+    def write_reports(self, output_dir: Path, skip_plots: bool = True, compression: Optional[str] = None,
+                      sparse_lines: bool = False) -> list[str]:
+        """
+        Writes the standard reports for this analysis, exactly as the command line actions do.
+
+        :param output_dir: The output directory to write the outputs.  It will be created if it doesn't exist.
+        :param skip_plots: A flag for whether to skip plot generation, which can be time-consuming.
+        :param compression: An optional compression for the text reports, gzip or zstd.
+        :param sparse_lines: A flag for whether to write the sparse line ranges instead of the line-by-line summary.
+        :return: A list of the file names of any reports that failed, empty if all reports were generated.
+        """
+        return self.source_folder.generate_reports(
+            self.source_files, output_dir, skip_plots, compression, sparse_lines
+        )
+
+
+def analyze(source_repo: Path, functions: Optional[list[str]] = None, ignore: Optional[list[str]] = None,
+            options: Optional[RunOptions] = None) -> AnalysisResult:
+    """
+    Finds and parses the source files of an EnergyPlus repository in memory, without writing anything to disk.  This is
+    the library counterpart of the command line actions, for programs which embed the analysis.
+
+    :param source_repo: The root of the EnergyPlus repository to analyze.
+    :param functions: The function calls to search for, by default the error calls of the error_call_refactor action.
+    :param ignore: A list of file names to skip.
+    :param options: Optional settings, of which the shard, git revision, file budget, and read ahead are used.
+    :return: An AnalysisResult holding the parsed source files.
+    """
+    if functions is None:
+        functions = ErrorCallRefactor.function_calls()
+    if options is None:
+        options = RunOptions()
+    revision = GitRevision(source_repo, options.revision, 'src/EnergyPlus') if options.revision else None
+    source_folder = SourceFolder(
+        source_repo / 'src' / 'EnergyPlus', functions, revision, budget=options.budget, read_ahead=options.read_ahead
+    )
+    files = source_folder.find_files(ignore)
+    if options.shard:
+        files = source_folder.shard_files(files, *options.shard)
+    try:
+        source_files = list(source_folder.iter_source_files(files))
+    finally:
+        if revision:
+            revision.reader.close()
+    return AnalysisResult(source_folder, source_files)
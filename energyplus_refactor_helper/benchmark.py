@@ -0,0 +1,162 @@
+import argparse
+from argparse import ArgumentParser
+from json import dumps
+from pathlib import Path
+from platform import python_version
+from sys import argv, exit
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+from energyplus_refactor_helper import VERSION
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.similarity import block_key, compare_messages, group_by_template
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+from energyplus_refactor_helper.timing import PhaseTimer
+
+
+def benchmark_similarity(messages: list[str], call_patterns: list[list[int]], bench: PhaseTimer) -> Optional[str]:
+    """
+    Times the grouping of the given messages by template, and then each similarity backend on one representative
+    message per template, both comparing all pairs and only the pairs within structural blocks, recording a phase per
+    stage in the given timer.  The SpaCy backend needs the language model, which may not be installed, in which case it
+    is skipped.
+
+    :param messages: The messages to compare with each other.
+    :param call_patterns: The cleaned call types of the function call group each message was built from.
+    :param bench: The timer to record the phases in.
+    :return: None if every backend was timed, or a description of why a backend was skipped.
+    """
+    with bench.phase('similarity.templates', len(messages)):
+        representatives = [texts[0] for texts in group_by_template(messages).values()]
+    patterns = dict(zip(reversed(messages), reversed(call_patterns)))  # keeps the pattern of the first message
+    block_keys = [block_key(t, patterns[t]) for t in representatives]
+    try:
+        nlp = ErrorCallRefactor().nlp
+    except (ImportError, OSError) as e:
+        return f"spacy: {e}"
+    with bench.phase('similarity.spacy.process_messages', len(representatives)):
+        docs = list(nlp.pipe(representatives))
+    with bench.phase('similarity.spacy.compare') as span:
+        span.items = len(compare_messages(docs))
+    with bench.phase('similarity.spacy.compare_blocked') as span:
+        span.items = len(compare_messages(docs, block_keys))
+    return None
+
+
+def benchmark_corpus(root: Path, output_dir: Path, skip_plots: bool, similarity_limit: int) -> dict:
+    """
+    Times each stage of the analysis of one synthetic corpus: parsing the files, parsing the call arguments, building
+    the call groups, each report writer, and the similarity backends.  Each stage is timed on its own, using the
+    already parsed files, so a change to one stage can be measured without the noise of the others.
+
+    :param root: The root directory of the corpus, as written by generate_corpus.
+    :param output_dir: A directory to write the reports into.
+    :param skip_plots: A flag for whether to skip the distribution plot, which is slow and needs matplotlib.
+    :param similarity_limit: The maximum number of messages to compare, as the comparison grows with the square of the
+                             number of messages.  Set to zero to skip the similarity backends.
+    :return: A dictionary of the corpus size and the timed phases.
+    """
+    bench = PhaseTimer()
+    source_folder = SourceFolder(root / 'src' / 'EnergyPlus', ErrorCallRefactor.function_calls())
+    files = source_folder.find_files()
+    with bench.phase('parse', len(files)):
+        processed_files = source_folder.analyze_source_files(files)
+    all_calls = [f for s in processed_files for f in s.found_functions]
+    with bench.phase('parse_arguments', len(all_calls)):
+        for call in all_calls:
+            call.parse_arguments()
+    with bench.phase('group', len(processed_files)):
+        for source_file in processed_files:
+            source_file.get_function_call_groups()
+    num_files = len(processed_files)
+    with bench.phase('report.results_json', num_files):
+        source_folder.generate_json_outputs(processed_files, output_dir / 'results.json')
+    with bench.phase('report.file_summary_csv', num_files):
+        source_folder.generate_file_summary_csv(processed_files, output_dir / 'file_summary.csv')
+    with bench.phase('report.lines_summary_csv', num_files):
+        source_folder.generate_line_details_csv(processed_files, output_dir / 'lines_summary.csv')
+    if not skip_plots:
+        with bench.phase('report.distribution_plot', num_files):
+            source_folder.generate_line_details_plot(processed_files, output_dir / 'line_details.png')
+    result = {
+        'files': num_files,
+        'bytes': sum(len(s.original_file_text) for s in processed_files),
+        'calls': len(all_calls),
+        'groups': sum(len(s.found_function_groups) for s in processed_files),
+    }
+    if similarity_limit > 0:
+        groups = [g for s in processed_files for g in s.found_function_groups][:similarity_limit]
+        messages = [RefactorBase.base_function_group_visitor(g).replace('\n', ' ') for g in groups]
+        skipped = benchmark_similarity(messages, [g.cleaned_call_types() for g in groups], bench)
+        if skipped:
+            result['skipped'] = skipped
+    result['phases'] = bench.phases
+    return result
+
+
+def run_benchmarks(sizes: list[int], output_file: Path, groups_per_file: int = 20, seed: int = 0,
+                   skip_plots: bool = True, similarity_limit: int = 200) -> dict:
+    """
+    Generates a synthetic corpus at each of the given sizes, times the analysis of each, and writes the results to a
+    JSON file, so that results can be compared between commits.
+
+    :param sizes: The numbers of files in each corpus to time.
+    :param output_file: The JSON file to write the results to.
+    :param groups_per_file: The number of error call groups in each generated file.
+    :param seed: The seed of the corpus generator.
+    :param skip_plots: A flag for whether to skip timing the distribution plot.
+    :param similarity_limit: The maximum number of messages to compare in the similarity backends, zero to skip them.
+    :return: The results, as written to the output file.
+    """
+    results = {
+        'version': VERSION, 'python': python_version(), 'groups_per_file': groups_per_file, 'seed': seed, 'sizes': []
+    }
+    for size in sizes:
+        logger.log(f"Benchmarking a synthetic corpus of {size} files")
+        with TemporaryDirectory() as corpus_dir, TemporaryDirectory() as report_dir:
+            generate_corpus(Path(corpus_dir), size, groups_per_file, seed)
+            results['sizes'].append(benchmark_corpus(Path(corpus_dir), Path(report_dir), skip_plots, similarity_limit))
+    output_file.write_text(dumps(results, indent=2))
+    return results
+
+
+def main(args: list[str]) -> int:
+    """
+    The command line entry point of the benchmark, run with python -m energyplus_refactor_helper.benchmark.
+
+    :param args: A list of command line arguments, not including the program name.
+    :return: Exit code, 0 if the benchmark ran.
+    """
+    parser = ArgumentParser(
+        prog='ErrorRefactorHelperBenchmark',
+        description='Times the analysis stages on synthetic EnergyPlus-style source trees of several sizes',
+        formatter_class=lambda prog: argparse.HelpFormatter(prog, width=160)
+    )
+    parser.add_argument('output_file', action='store', help='JSON file to write the benchmark results to')
+    parser.add_argument(
+        '--sizes', action='store', type=int, nargs='+', default=[10, 100, 1000],
+        help='Numbers of source files in each synthetic corpus to time'
+    )
+    parser.add_argument(
+        '--groups-per-file', action='store', type=int, default=20, help='Number of error call groups in each file'
+    )
+    parser.add_argument('--seed', action='store', type=int, default=0, help='Seed of the synthetic corpus generator')
+    parser.add_argument(
+        '--plots', action='store_true', default=False, help='If True, also time the distribution plot'
+    )
+    parser.add_argument(
+        '--similarity-limit', action='store', type=int, default=200,
+        help='Maximum number of messages to compare in the similarity backends, 0 to skip them'
+    )
+    args = parser.parse_args(args=args)
+    run_benchmarks(
+        args.sizes, Path(args.output_file), args.groups_per_file, args.seed, not args.plots, args.similarity_limit
+    )
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    exit(main(argv[1:]))
@@ -0,0 +1,186 @@
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import connect
+from typing import Optional
+
+from energyplus_refactor_helper.git_revision import blob_sha, decode_source
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.prefetch import prefetch_sources
+from energyplus_refactor_helper.source_file import SourceFile
+
+
+class CallIndex:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER, sha TEXT
+        );
+        CREATE TABLE IF NOT EXISTS calls (
+            id INTEGER PRIMARY KEY, file_id INTEGER, group_id INTEGER, call_type INTEGER, function_name TEXT,
+            start_line INTEGER, end_line INTEGER, char_start INTEGER, char_end INTEGER, appears_successful INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS arguments (call_id INTEGER, position INTEGER, value TEXT);
+        CREATE INDEX IF NOT EXISTS calls_by_function ON calls (function_name);
+        CREATE INDEX IF NOT EXISTS calls_by_file ON calls (file_id);
+        CREATE INDEX IF NOT EXISTS arguments_by_call ON arguments (call_id);
+        CREATE INDEX IF NOT EXISTS arguments_by_position ON arguments (position, value);
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        The CallIndex class represents a SQLite database holding every function call found in a source tree, along
+        with its file, line range, character offsets, call type, parsed arguments, and the index of its group within
+        the file.  The index is updated incrementally: only files that changed since the last update are parsed again.
+
+        :param db_path: The path to the SQLite database file, which will be created if it doesn't exist.
+        """
+        self.db_path = db_path
+        self.connection = connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+
+    def update(self, root: Path, functions: list[str], files: list[Path]) -> tuple[int, int]:
+        """
+        Brings the index up to date with the given source files.  Files whose modification time and size are unchanged
+        are skipped without being read, the rest are read ahead of the parser, files whose content is unchanged are
+        skipped without being parsed, and files which are no longer present are removed from the index.  If the list of
+        function calls changed since the index was built, the whole index is rebuilt.
+
+        :param root: The root directory of the source files, which the paths in the index are relative to.
+        :param functions: The list of function calls to search for in the source files.
+        :param files: The source files to index, as returned by SourceFolder.find_files.
+        :return: A tuple of (number of files parsed, number of files removed from the index)
+        """
+        cursor = self.connection.cursor()
+        function_list = dumps(functions)
+        row = cursor.execute("SELECT value FROM metadata WHERE key = 'functions'").fetchone()
+        if row is None or row[0] != function_list:
+            cursor.execute("DELETE FROM arguments")
+            cursor.execute("DELETE FROM calls")
+            cursor.execute("DELETE FROM files")
+            cursor.execute("INSERT OR REPLACE INTO metadata VALUES ('functions', ?)", (function_list,))
+        known_files = {r[0]: r[1:] for r in cursor.execute("SELECT path, id, mtime_ns, size, sha FROM files")}
+        parsed_count = 0
+        current_files = set()
+        stale_files = []
+        for file in sorted(files):
+            relative_path = file.relative_to(root).as_posix()
+            current_files.add(relative_path)
+            stat = file.stat()
+            file_id, mtime_ns, size, sha = known_files.get(relative_path, (None, None, None, None))
+            if stat.st_mtime_ns == mtime_ns and stat.st_size == size:
+                continue
+            stale_files.append((file, relative_path, stat, file_id, sha))
+        stale_data = prefetch_sources([s[0] for s in stale_files], read=Path.read_bytes)
+        for (file, relative_path, stat, file_id, sha), (_, data) in zip(stale_files, stale_data):
+            new_sha = blob_sha(data)
+            if new_sha != sha:
+                if file_id is not None:
+                    self._remove_file(file_id)
+                cursor.execute(
+                    "INSERT INTO files (path, mtime_ns, size, sha) VALUES (?, ?, ?, ?)",
+                    (relative_path, stat.st_mtime_ns, stat.st_size, new_sha)
+                )
+                self._insert_calls(cursor.lastrowid, SourceFile(file, functions, decode_source(data)))
+                parsed_count += 1
+            else:
+                cursor.execute(
+                    "UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (stat.st_mtime_ns, stat.st_size, file_id)
+                )
+        removed_files = [p for p in known_files if p not in current_files]
+        for relative_path in removed_files:
+            self._remove_file(known_files[relative_path][0])
+        self.connection.commit()
+        logger.log(f"Call index updated: {parsed_count} files parsed, {len(removed_files)} files removed")
+        return parsed_count, len(removed_files)
+
+    def _remove_file(self, file_id: int) -> None:
+        """
+        Removes a file and all of its calls from the index.
+
+        :param file_id: The id of the file in the files table.
+        :return: None
+        """
+        self.connection.execute(
+            "DELETE FROM arguments WHERE call_id IN (SELECT id FROM calls WHERE file_id = ?)", (file_id,)
+        )
+        self.connection.execute("DELETE FROM calls WHERE file_id = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _insert_calls(self, file_id: int, source_file: SourceFile) -> None:
+        """
+        Adds all the function calls of a parsed source file to the index.
+
+        :param file_id: The id of the file in the files table.
+        :param source_file: The parsed source file.
+        :return: None
+        """
+        cursor = self.connection.cursor()
+        for group_id, group in enumerate(source_file.found_function_groups):
+            for f in group.function_calls:
+                cursor.execute(
+                    "INSERT INTO calls (file_id, group_id, call_type, function_name, start_line, end_line, "
+                    "char_start, char_end, appears_successful) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (file_id, group_id, f.call_type, f.function_name, f.starting_line_number, f.ending_line_number,
+                     f.char_start_in_file, f.char_end_in_file, int(f.appears_successful))
+                )
+                call_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT INTO arguments (call_id, position, value) VALUES (?, ?, ?)",
+                    [(call_id, position, value) for position, value in enumerate(f.parse_arguments())]
+                )
+
+    def query(self, function: Optional[str] = None, argument: Optional[str] = None,
+              argument_position: Optional[int] = None, file: Optional[str] = None) -> list[dict]:
+        """
+        Finds all calls in the index matching every given filter.
+
+        :param function: An optional function name the call must be to, such as ShowSevereItemNotFound.
+        :param argument: An optional SQL LIKE pattern that an argument of the call must match, such as 'format(%'.
+        :param argument_position: An optional 0-based argument position, limiting the argument filter to that argument.
+        :param file: An optional SQL LIKE pattern that the relative path of the file must match, such as 'HVAC%'.
+        :return: A list of matching calls, each a dictionary of the call details, ordered by file and line.
+        """
+        conditions = []
+        parameters = []
+        if function is not None:
+            conditions.append("calls.function_name = ?")
+            parameters.append(function)
+        if file is not None:
+            conditions.append("files.path LIKE ?")
+            parameters.append(file)
+        if argument is not None or argument_position is not None:
+            argument_conditions = []
+            if argument is not None:
+                argument_conditions.append("arguments.value LIKE ?")
+                parameters.append(argument)
+            if argument_position is not None:
+                argument_conditions.append("arguments.position = ?")
+                parameters.append(argument_position)
+            conditions.append(
+                "calls.id IN (SELECT call_id FROM arguments WHERE " + " AND ".join(argument_conditions) + ")"
+            )
+        sql = (
+            "SELECT calls.id, files.path, calls.start_line, calls.end_line, calls.char_start, calls.char_end, "
+            "calls.call_type, calls.function_name, calls.group_id, calls.appears_successful, "
+            "(SELECT json_group_array(value) FROM (SELECT value FROM arguments WHERE call_id = calls.id "
+            "ORDER BY position)) FROM calls JOIN files ON files.id = calls.file_id"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY files.path, calls.start_line"
+        results = []
+        for row in self.connection.execute(sql, parameters):
+            results.append({
+                'file': row[1], 'start_line': row[2], 'end_line': row[3], 'char_start': row[4], 'char_end': row[5],
+                'call_type': row[6], 'function_name': row[7], 'group_id': row[8], 'appears_successful': bool(row[9]),
+                'arguments': loads(row[10])
+            })
+        return results
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+
+        :return: None
+        """
+        self.connection.close()
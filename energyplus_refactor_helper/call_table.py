@@ -0,0 +1,177 @@
+from array import array
+from pathlib import Path
+
+from energyplus_refactor_helper.source_file import SourceFile
+
+
+class CallTable:
+    # each column, and the array type code it is gathered in, all integers, with the success flag as 0 or 1
+    COLUMNS = {
+        'file_id': 'i', 'call_type': 'i', 'start_line': 'i', 'end_line': 'i', 'char_start': 'q', 'char_end': 'q',
+        'char_start_in_line': 'i', 'group_id': 'i', 'success': 'b',
+    }
+
+    def __init__(self):
+        """
+        The CallTable class holds the function calls of all the analyzed files as a table of columns, one entry per
+        call, rather than as one object per call, so that questions about a whole repository, such as the number of
+        calls of each function or the sizes of the call groups, are answered with a few vectorized NumPy operations
+        instead of Python loops over every call.  The table is filled one file at a time while the files are analyzed,
+        into compact arrays, and the NumPy columns are built from them the first time they are needed.  NumPy is only
+        imported then, as it is slow to import and the command line tool does not need it until the reports are built.
+        """
+        self.files: list[Path] = []
+        self.statuses: list[str] = []
+        self._source_files: list[SourceFile] = []
+        self.group_count = 0
+        self._buffers = {name: array(code) for name, code in self.COLUMNS.items()}
+        self._columns: dict = {}
+
+    @staticmethod
+    def from_source_files(source_files: list[SourceFile]) -> 'CallTable':
+        """
+        Builds a table from already parsed source files.
+
+        :param source_files: The parsed source files, in the order their file ids should be assigned.
+        :return: A CallTable holding every call of the files.
+        """
+        table = CallTable()
+        for source_file in source_files:
+            table.add_file(source_file)
+        return table
+
+    def add_file(self, source_file: SourceFile) -> None:
+        """
+        Appends the calls of one parsed source file to the table.  The file gets the next file id, and each of its call
+        groups the next group id.
+
+        :param source_file: The parsed source file.
+        :return: None
+        """
+        file_id = len(self.files)
+        self._source_files.append(source_file)
+        self.files.append(source_file.path)
+        self.statuses.append(source_file.status)
+        buffers = self._buffers
+        for group in source_file.found_function_groups:
+            for call in group.function_calls:
+                buffers['file_id'].append(file_id)
+                buffers['call_type'].append(call.call_type)
+                buffers['start_line'].append(call.starting_line_number)
+                buffers['end_line'].append(call.ending_line_number)
+                buffers['char_start'].append(call.char_start_in_file)
+                buffers['char_end'].append(call.char_end_in_file)
+                buffers['char_start_in_line'].append(call.char_start_first_line)
+                buffers['group_id'].append(self.group_count)
+                buffers['success'].append(call.appears_successful)
+            self.group_count += 1
+        self._columns.clear()
+
+    def matches(self, source_files: list[SourceFile]) -> bool:
+        """
+        Checks whether this table was filled from the given source files, in the same order, so that a table built
+        during the analysis can be reused for reports on the same files.  The files themselves are compared, not their
+        paths, as a file parsed again, such as by the daemon after it changed, has the same path but different calls.
+
+        :param source_files: The parsed source files.
+        :return: True if the table holds exactly these files.
+        """
+        return len(self._source_files) == len(source_files) and all(
+            a is b for a, b in zip(self._source_files, source_files)
+        )
+
+    def __len__(self) -> int:
+        return len(self._buffers['file_id'])
+
+    def arrays(self) -> dict[str, array]:
+        """
+        Returns the columns of the table in their compact form, as standard library arrays, without importing NumPy,
+        such as to store them.
+
+        :return: A dictionary of one array per column, keyed by the names of COLUMNS.
+        """
+        return self._buffers
+
+    def column(self, name: str):
+        """
+        Returns one column of the table as a NumPy array, with one entry per call, in the order the calls were added.
+
+        :param name: The name of the column, one of the keys of COLUMNS.
+        :return: A NumPy array, of booleans for the success column and of integers otherwise.
+        """
+        if name not in self._columns:
+            import numpy  # imported here as it is slow to import
+            values = numpy.array(self._buffers[name])
+            self._columns[name] = values.astype(bool) if name == 'success' else values
+        return self._columns[name]
+
+    def calls_per_file(self) -> tuple:
+        """
+        Counts the calls of each file that were parsed successfully, and the calls which appear to have failed.
+
+        :return: A tuple of two NumPy integer arrays, the good and the bad counts, each indexed by file id.
+        """
+        import numpy
+        file_ids = self.column('file_id')
+        total = numpy.bincount(file_ids, minlength=len(self.files))
+        good = numpy.bincount(file_ids[self.column('success')], minlength=len(self.files))
+        return good, total - good
+
+    def groups_per_file(self):
+        """
+        Counts the call groups of each file.
+
+        :return: A NumPy integer array of the group counts, indexed by file id.
+        """
+        import numpy
+        _, first_calls = numpy.unique(self.column('group_id'), return_index=True)
+        return numpy.bincount(self.column('file_id')[first_calls], minlength=len(self.files))
+
+    def calls_per_type(self, function_names: list[str]) -> dict[str, int]:
+        """
+        Counts the calls of each function.
+
+        :param function_names: The function call list that was searched for, whose index is the call type.
+        :return: A dictionary of the number of calls, keyed by function name.
+        """
+        import numpy
+        counts = numpy.bincount(self.column('call_type'), minlength=len(function_names))
+        return {name: int(count) for name, count in zip(function_names, counts)}
+
+    def line_count_histogram(self) -> dict[int, int]:
+        """
+        Counts the calls by the number of lines they span, which shows how many calls are written over several lines.
+
+        :return: A dictionary of the number of calls, keyed by the number of lines, in ascending order.
+        """
+        import numpy
+        line_counts, counts = numpy.unique(self.column('end_line') - self.column('start_line') + 1, return_counts=True)
+        return {int(lines): int(count) for lines, count in zip(line_counts, counts)}
+
+    def group_size_histogram(self) -> dict[int, int]:
+        """
+        Counts the call groups by the number of calls in them.
+
+        :return: A dictionary of the number of groups, keyed by the number of calls, in ascending order.
+        """
+        import numpy
+        sizes, counts = numpy.unique(numpy.bincount(self.column('group_id')), return_counts=True)
+        return {int(size): int(count) for size, count in zip(sizes, counts) if size > 0}
+
+    def failures_per_directory(self, root: Path) -> dict[str, int]:
+        """
+        Counts the calls which appear to have failed to parse in each directory, to show where the parser struggles.
+
+        :param root: The root directory that the directories are reported relative to.
+        :return: A dictionary of the number of failed calls, keyed by the directory relative to the root, using forward
+                 slashes, only for directories with any failures.
+        """
+        import numpy
+        if not self.files:
+            return {}
+        directories, directory_ids = numpy.unique(
+            [f.parent.relative_to(root).as_posix() for f in self.files], return_inverse=True
+        )
+        failed = ~self.column('success')
+        counts = numpy.bincount(directory_ids[self.column('file_id')[failed]], minlength=len(directories))
+        return {str(directory): int(count) for directory, count in zip(directories, counts) if count > 0}
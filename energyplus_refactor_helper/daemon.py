@@ -0,0 +1,176 @@
+from json import dumps, loads
+from pathlib import Path
+import socket
+import socketserver
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from energyplus_refactor_helper.analysis import AnalysisResult
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.prefetch import read_sources
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+
+class AnalysisDaemon:
+    def __init__(self, root: Path, functions: list[str], group_visitor: Callable, ignore: Optional[list[str]] = None):
+        """
+        The AnalysisDaemon class keeps the parsed source files of a folder in memory for a long-running session.  The
+        folder is polled for modification time changes, and only the files that changed are parsed again.  Requests
+        are answered over a local Unix socket, one JSON object per line, so each request costs only the work needed to
+        answer it rather than a Python start-up, model load, and parse of the whole tree.  Unix sockets are not
+        available on every platform, notably Windows.
+
+        :param root: The root directory to search for source files.
+        :param functions: A list of function calls to search for in the source files.
+        :param group_visitor: The function call group visitor used to build rewrite previews, such as the visitor
+                              method of an action instance, which keeps any model it uses loaded.
+        :param ignore: A list of file names to ignore when looking for source files to analyze.
+        """
+        self.source_folder = SourceFolder(root, functions)
+        self.group_visitor = group_visitor
+        self.ignore = ignore
+        self.source_files: dict[Path, tuple[int, SourceFile]] = {}  # modification time and parsed file, by path
+        self.lock = Lock()
+        self._stopped = Event()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def refresh(self) -> int:
+        """
+        Brings the in-memory source files up to date with the folder, parsing new and modified files and dropping
+        removed files.  This runs on every poll, so it only logs when files actually changed.
+
+        :return: The number of files that were parsed.
+        """
+        with self.lock:
+            files = self.source_folder.find_files(self.ignore, quiet=True)
+            changed_files = {}
+            for file in files:
+                mtime_ns = file.stat().st_mtime_ns
+                if file not in self.source_files or self.source_files[file][0] != mtime_ns:
+                    changed_files[file] = mtime_ns
+            texts = read_sources(list(changed_files))  # a first refresh reads every file, so they are read in bulk
+            functions = self.source_folder.function_call_list
+            for file, mtime_ns in changed_files.items():
+                self.source_files[file] = (mtime_ns, SourceFile(file, functions, texts[file]))
+            reparsed_count = len(changed_files)
+            removed_files = set(self.source_files) - set(files)
+            for file in removed_files:
+                del self.source_files[file]
+            if reparsed_count or removed_files:
+                logger.log(f"Parsed {reparsed_count} new or modified files, dropped {len(removed_files)} removed files")
+            return reparsed_count
+
+    def processed_files(self) -> list[SourceFile]:
+        """
+        Returns the current parsed source files, in the same sorted order as SourceFolder.analyze_source_files.
+
+        :return: A list of SourceFile instances.
+        """
+        return [self.source_files[f][1] for f in sorted(self.source_files)]
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Answers a single request.  Every request refreshes the source files first.  The supported commands are:
+
+        - analyze: returns counts of the files, function calls, function call groups, and failed parses
+        - preview: returns a unified diff of the rewrite of the file given by the relative 'file' path
+        - report: generates the standard reports into the 'output_directory', skipping plots unless 'skip_plots' is
+          false, with an optional 'compression' and 'sparse_lines' flag, and returns the file names of any reports that
+          failed
+        - stop: shuts down the daemon
+
+        :param request: A dictionary with a 'command' key, and any additional keys needed by the command.
+        :return: A dictionary response, which has an 'error' key if the request could not be answered.
+        """
+        command = request.get('command')
+        if command == 'stop':
+            self.stop()
+            return {'stopped': True}
+        reparsed_count = self.refresh()
+        with self.lock:
+            processed_files = self.processed_files()
+            if command == 'analyze':
+                return {**AnalysisResult(self.source_folder, processed_files).summary(), 'reparsed': reparsed_count}
+            elif command == 'preview':
+                path = self.source_folder.root / request.get('file', '')
+                if path not in self.source_files:
+                    return {'error': f"File is not part of the analysis: {request.get('file')}"}
+                source_file = self.source_files[path][1]
+                new_text = source_file.get_new_file_text_group_based(self.group_visitor)
+                return {'diff': source_file.unified_diff(new_text, request['file'])}
+            elif command == 'report':
+                output_dir = Path(request['output_directory'])
+                failed_reports = self.source_folder.generate_reports(
+                    processed_files, output_dir, request.get('skip_plots', True), request.get('compression'),
+                    request.get('sparse_lines', False)
+                )
+                return {'output_directory': str(output_dir), 'failed_reports': failed_reports}
+            return {'error': f"Unknown command: {command}"}
+
+    def serve(self, socket_path: Path, poll_interval: float = 2.0) -> None:
+        """
+        Parses the folder and then serves requests on the socket until a stop request is received.  A background
+        thread polls the folder for changes between requests, so requests rarely have to wait for a parse.
+
+        :param socket_path: The path of the Unix socket to listen on.  An existing socket file will be replaced.
+        :param poll_interval: The number of seconds between polls of the folder for changes.
+        :return: None
+        """
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    response = daemon.handle_request(loads(self.rfile.readline()))
+                except Exception as e:
+                    response = {'error': str(e)}
+                self.wfile.write((dumps(response) + '\n').encode())
+
+        self.refresh()
+        socket_path.unlink(missing_ok=True)
+        self._stopped.clear()
+        with socketserver.UnixStreamServer(str(socket_path), Handler) as server:
+            self._server = server
+            poller = Thread(target=self._poll, args=(poll_interval,), daemon=True)
+            poller.start()
+            logger.log(f"Daemon listening on {socket_path}")
+            server.serve_forever()
+            poller.join()
+        socket_path.unlink(missing_ok=True)
+        logger.log("Daemon stopped")
+
+    def _poll(self, poll_interval: float) -> None:
+        """
+        Refreshes the source files every poll interval until the daemon is stopped.
+
+        :param poll_interval: The number of seconds between polls of the folder for changes.
+        :return: None
+        """
+        while not self._stopped.wait(poll_interval):
+            self.refresh()
+
+    def stop(self) -> None:
+        """
+        Stops serving requests.  This returns immediately; the serve call returns once the server has shut down.
+
+        :return: None
+        """
+        self._stopped.set()
+        if self._server:
+            Thread(target=self._server.shutdown).start()  # shutdown blocks until the serve loop ends
+
+
+def send_request(socket_path: Path, request: dict) -> dict:
+    """
+    Sends a single request to a running daemon and waits for the response.
+
+    :param socket_path: The path of the Unix socket the daemon is listening on.
+    :param request: A dictionary with a 'command' key, as described in AnalysisDaemon.handle_request.
+    :return: The dictionary response from the daemon.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall((dumps(request) + '\n').encode())
+        with client.makefile('r') as response:
+            return loads(response.readline())
@@ -0,0 +1,131 @@
+from typing import Callable, Optional
+
+from energyplus_refactor_helper.function_call import FunctionCall
+from energyplus_refactor_helper.function_call_group import FunctionCallGroup
+
+
+class EditSpan:
+    def __init__(self, start: int, end: int, text: str, label: str = ''):
+        """
+        The EditSpan class represents one replacement in a source file, the characters from start up to, but not
+        including, end in the original text being replaced with the new text.  A span with the same start and end is an
+        insertion.
+
+        :param start: The character offset in the original text where the replacement starts.
+        :param end: The character offset in the original text just past the end of the replacement.
+        :param text: The new text to put in place of the replaced characters.
+        :param label: An optional description of where the edit came from, used when reporting overlapping edits.
+        """
+        self.start = start
+        self.end = end
+        self.text = text
+        self.label = label
+
+    def __str__(self) -> str:
+        return f"{self.label or 'edit'} [{self.start}, {self.end})"
+
+
+class EditPlan:
+    def __init__(self, original_text: str):
+        """
+        The EditPlan class collects the replacements of any number of visitors or actions against the offsets of the
+        original text of a file, and then builds the final text in one pass over it.  Every visitor sees the calls as
+        they were parsed from the original text, so chaining several refactors on a file costs one parse and one write,
+        rather than writing the file, and reading and parsing it again, after each refactor.
+
+        :param original_text: The original source code that all the edit offsets refer to.
+        """
+        self.original_text = original_text
+        self.spans: list[EditSpan] = []
+
+    def add(self, start: int, end: int, text: str, label: str = '') -> None:
+        """
+        Adds one replacement to this plan.
+
+        :param start: The character offset in the original text where the replacement starts.
+        :param end: The character offset in the original text just past the end of the replacement.
+        :param text: The new text to put in place of the replaced characters.
+        :param label: An optional description of where the edit came from, used when reporting overlapping edits.
+        :return: None
+        """
+        if not 0 <= start <= end <= len(self.original_text):
+            raise ValueError(f"Edit [{start}, {end}) is outside of the text, which has {len(self.original_text)} chars")
+        self.spans.append(EditSpan(start, end, text, label))
+
+    def add_function_calls(self, function_calls: list[FunctionCall],
+                           visitor: Callable[[FunctionCall], Optional[str]], label: str = '') -> None:
+        """
+        Adds the replacement of each function call by a visitor, covering the call from its name up to and including the
+        semicolon.  A visitor can return None to leave a call unchanged, so that several visitors can each rewrite only
+        the calls they are interested in.
+
+        :param function_calls: The function calls to visit, as found in the original text.
+        :param visitor: A callable function that takes a FunctionCall and returns its new text, or None.
+        :param label: An optional description of the visitor, used when reporting overlapping edits.
+        :return: None
+        """
+        for call in function_calls:
+            new_text = visitor(call)
+            if new_text is not None:
+                self.add(call.char_start_in_file, call.char_end_in_file + 1, new_text,
+                         f"{label} line {call.starting_line_number}".strip())
+
+    def add_function_call_groups(self, function_groups: list[FunctionCallGroup],
+                                 visitor: Callable[[FunctionCallGroup], Optional[str]], label: str = '') -> None:
+        """
+        Adds the replacement of each function call group by a visitor, covering the group from the name of its first
+        call up to and including the semicolon of its last call.  A visitor can return None to leave a group unchanged.
+
+        :param function_groups: The function call groups to visit, as found in the original text.
+        :param visitor: A callable function that takes a FunctionCallGroup and returns its new text, or None.
+        :param label: An optional description of the visitor, used when reporting overlapping edits.
+        :return: None
+        """
+        for group in function_groups:
+            new_text = visitor(group)
+            if new_text is not None:
+                first = group.function_calls[0]
+                last = group.function_calls[-1]
+                self.add(first.char_start_in_file, last.char_end_in_file + 1, new_text,
+                         f"{label} line {first.starting_line_number}".strip())
+
+    def resolve(self) -> list[EditSpan]:
+        """
+        Orders the collected edits by their position and merges the compatible ones.  Identical edits, replacing the
+        same characters with the same text, as two visitors might both make, are kept once, and different insertions at
+        the same offset are all kept, in the order they were added.  An insertion at either end of a replacement does
+        not overlap it, but any other edits covering the same characters conflict, as there is no single right way to
+        combine them.
+
+        :return: The edits to make, ordered by position and not overlapping each other.
+        """
+        resolved: list[EditSpan] = []
+        for span in sorted(self.spans, key=lambda s: (s.start, s.end)):  # a stable sort keeps the insertion order
+            if resolved:
+                last = resolved[-1]
+                if span.start == last.start and span.end == last.end:
+                    if span.text == last.text:
+                        continue
+                    if span.start == span.end:
+                        merged_label = f"{last.label}, {span.label}"
+                        resolved[-1] = EditSpan(last.start, last.end, last.text + span.text, merged_label)
+                        continue
+                if span.start < last.end:
+                    raise ValueError(f"Overlapping edits can not be combined: {last} and {span}")
+            resolved.append(span)
+        return resolved
+
+    def apply(self) -> str:
+        """
+        Builds the final text in a single pass over the original text, copying the unchanged text between the edits.
+
+        :return: The modified source code as a Python string.
+        """
+        pieces = []
+        position = 0
+        for span in self.resolve():
+            pieces.append(self.original_text[position:span.start])
+            pieces.append(span.text)
+            position = span.end
+        pieces.append(self.original_text[position:])
+        return ''.join(pieces)
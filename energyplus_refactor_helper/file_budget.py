@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+class FileBudget:
+    COMPLETE = 'complete'
+    SKIPPED = 'skipped'
+    PARTIAL = 'partial'
+
+    def __init__(self, max_bytes: Optional[int] = None, max_calls: Optional[int] = None,
+                 max_parse_seconds: Optional[float] = None):
+        """
+        The FileBudget class holds the limits on how much work is spent on each source file, so that a single huge or
+        pathological file cannot dominate the run time.  A file larger than the byte limit is skipped without being
+        scanned, and the scan of a file stops early once it has found the maximum number of calls or run out of time,
+        leaving the file partially analyzed.  The status of each file is one of the COMPLETE, SKIPPED, or PARTIAL
+        constants of this class.  Each limit is optional, and a budget with no limits never stops a file.
+
+        :param max_bytes: The maximum size of a source file, in bytes, to analyze.
+        :param max_calls: The maximum number of function calls to find in a single source file.
+        :param max_parse_seconds: The maximum number of seconds to spend scanning a single source file.
+        """
+        self.max_bytes = max_bytes
+        self.max_calls = max_calls
+        self.max_parse_seconds = max_parse_seconds
@@ -23,6 +23,15 @@ class FunctionCallGroup:
         self.started = True
         self.function_calls.append(function_call_info)
 
+    def cleaned_call_types(self) -> list[int]:
+        """
+        This function returns the call types of the function calls in this group, with consecutive repeats of the same
+        call type removed, which describes the pattern of the group, such as a severe followed by continues.
+
+        :return: A list of call types.
+        """
+        return [i[0] for i in groupby([e.call_type for e in self.function_calls])]
+
     def summary_dict(self) -> dict:
         """
         This function creates a dict summary of a chunk of contiguous function calls.  It is expected this function will
@@ -32,7 +41,7 @@ class FunctionCallGroup:
         """
         num_calls_in_this_chunk = len(self.function_calls)
         call_types = [e.call_type for e in self.function_calls]
-        cleaned_call_types = [i[0] for i in groupby(call_types)]  # remove duplicates
+        cleaned_call_types = self.cleaned_call_types()
         chunk_start_line = self.function_calls[0].starting_line_number
         chunk_end_line = self.function_calls[-1].ending_line_number
         try:
@@ -0,0 +1,199 @@
+from hashlib import sha1
+from pathlib import Path
+from subprocess import PIPE, Popen, run
+from typing import Optional
+
+
+def blob_sha(data: bytes) -> str:
+    """
+    Computes the SHA that git would assign to a blob with the given content, so files read from disk can be keyed the
+    same way as files read from the git object database.
+
+    :param data: The raw content of the file.
+    :return: The hex digest of the git blob SHA.
+    """
+    return sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+SOURCE_ENCODING = 'utf-8'  # the encoding of the EnergyPlus sources, used whatever the locale encoding is
+SOURCE_ERRORS = 'surrogateescape'  # keeps bytes which are not valid UTF-8, so they are written back unchanged
+
+
+def decode_source(data: bytes) -> str:
+    """
+    Decodes raw file content into text as UTF-8, rather than the locale encoding Path.read_text would use, such as
+    cp1252 on Windows, so the text is the same on every platform.  Line endings are normalized the same way
+    Path.read_text normalizes them, so the text parses identically no matter where it was read from.  Bytes that are not
+    valid UTF-8 do not stop the analysis; they are kept as escapes, and a file rewritten with SOURCE_ENCODING and
+    SOURCE_ERRORS gets them back unchanged.
+
+    :param data: The raw content of the file.
+    :return: The decoded text.
+    """
+    return data.decode(SOURCE_ENCODING, SOURCE_ERRORS).replace('\r\n', '\n').replace('\r', '\n')
+
+
+class GitBlobReader:
+    def __init__(self, repo: Path):
+        """
+        The GitBlobReader class reads file contents straight out of the object database of a local git repository,
+        without checking anything out.  A single persistent `git cat-file --batch` process is started on first use and
+        reused for every blob, so reading thousands of files does not pay for thousands of process launches.
+
+        :param repo: The root of the git repository to read from.
+        """
+        self.repo = repo
+        self.blob_sizes: dict[str, int] = {}  # the size in bytes of each listed blob, by SHA
+        self._process: Optional[Popen] = None
+
+    def list_blobs(self, revision: str, sub_path: str) -> dict[str, str]:
+        """
+        Lists all files under a directory of the repository at the given revision.  The size of each blob is recorded
+        in the blob_sizes member as well, so sizes are known without reading the blobs.
+
+        :param revision: Any git revision, such as a tag, branch name, or commit hash.
+        :param sub_path: The repository-relative directory to list, such as src/EnergyPlus.
+        :return: A dictionary mapping each repository-relative file path to its blob SHA.
+        """
+        result = run(
+            ['git', '-C', str(self.repo), 'ls-tree', '-r', '-l', '-z', revision, '--', sub_path],
+            stdout=PIPE, stderr=PIPE
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Could not list files at revision {revision}: {result.stderr.decode().strip()}")
+        blobs = {}
+        for entry in result.stdout.decode().split('\0'):
+            if not entry:
+                continue
+            info, path = entry.split('\t', 1)
+            _, object_type, sha, size = info.split()
+            if object_type == 'blob':  # skip submodules
+                blobs[path] = sha
+                self.blob_sizes[sha] = int(size)
+        return blobs
+
+    def read_blob(self, sha: str) -> str:
+        """
+        Reads the contents of a single blob through the persistent cat-file process.  Line endings are normalized the
+        same way Path.read_text normalizes them, so the text parses identically to a checked out copy.
+
+        :param sha: The SHA of the blob to read.
+        :return: The decoded text content of the blob.
+        """
+        if self._process is None:
+            self._process = Popen(['git', '-C', str(self.repo), 'cat-file', '--batch'], stdin=PIPE, stdout=PIPE)
+        self._process.stdin.write(f"{sha}\n".encode())
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().decode().split()
+        if len(header) != 3:
+            raise ValueError(f"Could not read blob {sha} from the git object database")
+        data = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # eat the newline that follows the content
+        return decode_source(data)
+
+    def close(self) -> None:
+        """
+        Shuts down the persistent cat-file process, if it was started.  The reader can still be used afterward, in
+        which case a new process is started.
+
+        :return: None
+        """
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+
+class GitRevision:
+    def __init__(self, repo: Path, revision: str, sub_path: str, reader: Optional[GitBlobReader] = None):
+        """
+        The GitRevision class represents the files under one directory of a repository at a single revision.  Files are
+        addressed by the absolute path they would have if the revision were checked out at the repository root, so
+        they can be handled the same way as files found on disk.
+
+        :param repo: The root of the git repository.
+        :param revision: Any git revision, such as a tag, branch name, or commit hash.
+        :param sub_path: The repository-relative directory to include, such as src/EnergyPlus.
+        :param reader: An optional blob reader to share between revisions; one is created if not provided.
+        """
+        self.repo = repo
+        self.revision = revision
+        self.reader = reader if reader else GitBlobReader(repo)
+        blobs = self.reader.list_blobs(revision, sub_path)
+        self.blobs: dict[Path, str] = {repo / relative_path: sha for relative_path, sha in blobs.items()}
+        self.files = list(self.blobs)
+
+    def blob_sha(self, path: Path) -> str:
+        """
+        Returns the blob SHA of one file at this revision, which identifies the content of the file.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The blob SHA of the file.
+        """
+        return self.blobs[path]
+
+    def blob_size(self, path: Path) -> int:
+        """
+        Returns the size in bytes of one file at this revision, without reading it.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The size of the blob of the file.
+        """
+        return self.reader.blob_sizes[self.blobs[path]]
+
+    def read_text(self, path: Path) -> str:
+        """
+        Reads the content of one file at this revision.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The text content of the file.
+        """
+        return self.reader.read_blob(self.blobs[path])
+
+
+class WorkingTree:
+    def __init__(self, repo: Path, sub_path: str):
+        """
+        The WorkingTree class represents the files under one directory of a checkout on disk, with the same interface
+        as GitRevision.  This allows checkouts and git revisions to be analyzed side by side, with files keyed by the
+        same content SHA.  The content read to compute the SHA of a file is held until the next file is read, so a file
+        whose text is requested right after its SHA is only read from disk once.
+
+        :param repo: The root of the checkout.
+        :param sub_path: The repository-relative directory to include, such as src/EnergyPlus.
+        """
+        self.repo = repo
+        self.revision = str(repo)
+        self.files = [f for f in (repo / sub_path).glob('**/*') if f.is_file()]
+        self._last_read: tuple[Optional[Path], bytes] = (None, b'')
+
+    def blob_sha(self, path: Path) -> str:
+        """
+        Returns the blob SHA of one file in this checkout, which identifies the content of the file.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The blob SHA of the file.
+        """
+        data = path.read_bytes()
+        self._last_read = (path, data)
+        return blob_sha(data)
+
+    def blob_size(self, path: Path) -> int:
+        """
+        Returns the size in bytes of one file in this checkout, without reading it.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The size of the file on disk.
+        """
+        return path.stat().st_size
+
+    def read_text(self, path: Path) -> str:
+        """
+        Reads the content of one file in this checkout.
+
+        :param path: The path of the file, as listed in the files member.
+        :return: The text content of the file.
+        """
+        last_path, data = self._last_read
+        return decode_source(data if path == last_path else path.read_bytes())
@@ -1,20 +1,115 @@
+import atexit
+import sys
 from datetime import datetime
+from multiprocessing import parent_process
+from os import getpid
 from pathlib import Path
+from queue import SimpleQueue
+from threading import Event, Lock, Thread
+from time import monotonic
 from typing import Optional
+from weakref import WeakSet, finalize
+
+_STOP = None  # queued to make a writer thread close its log file handle and end
 
 
 class Logger:
-    def __init__(self, log_file: Optional[Path] = None, mute_stdout: bool = False):
+    def __init__(self, log_file: Optional[Path] = None, mute_stdout: bool = False, progress_interval: float = 0.1):
         """
-        The Logger class represents a simple class for logging output to standard out and/or an output file.
+        The Logger class represents a simple class for logging output to standard out and/or an output file.  Messages
+        are handed to a queue and written by a background thread through a single buffered file handle, so logging is
+        cheap and safe to call from worker threads.  Worker processes leave through os._exit, which skips the exit
+        hooks, so messages would be lost in their queues; in a worker process messages are written directly instead.
+        Call flush to wait until all queued messages have been written, or close to also end the writer and close the
+        log file; every logger still alive is closed when the program exits.
 
         :param log_file: An optional path to a log file to report messages
         :param mute_stdout: A True/False flag for whether to mute standard output or not, by default std out is on.
+        :param progress_interval: The minimum number of seconds between progress bar updates on standard output.
         """
         self._file = log_file
         if self._file:
             self._file.write_text("")
         self._print_to_stdout = not mute_stdout
+        self._progress_interval = progress_interval
+        self._last_progress_time = float('-inf')
+        self._lock = Lock()
+        self._queue: Optional[SimpleQueue] = None
+        self._handle = None
+        self._pid = -1
+        self._writer: Optional[Thread] = None
+        self._stop_writer: Optional[finalize] = None
+        _live_loggers.add(self)
+
+    def _enqueue(self, item) -> None:
+        """
+        Hands an item to the writer thread, first starting the writer if this process does not have one yet.
+
+        :param item: A (standard output text, file text) tuple, or an Event to set once everything before it is written
+        :return: None
+        """
+        with self._lock:
+            if parent_process() is not None:
+                self._write_directly(item)
+                return
+            if self._pid != getpid():
+                self._queue = SimpleQueue()
+                if self._file:
+                    self._handle = self._file.open(mode='a')
+                self._pid = getpid()
+                self._writer = Thread(target=self._write_queued_items, args=(self._queue, self._handle), daemon=True)
+                self._writer.start()
+                # the writer only holds the queue and handle, so it is also stopped if this logger is discarded
+                self._stop_writer = finalize(self, self._queue.put, _STOP)
+            self._queue.put(item)
+
+    def _write_directly(self, item) -> None:
+        """
+        Writes an item at once, without the writer thread, for worker processes whose queued items could be lost.
+
+        :param item: A (standard output text, file text) tuple, or an Event to set once everything before it is written
+        :return: None
+        """
+        if isinstance(item, Event):
+            item.set()
+            return
+        stdout_text, file_text = item
+        if stdout_text:
+            sys.stdout.write(stdout_text)
+            sys.stdout.flush()
+        if file_text:
+            with self._file.open(mode='a') as handle:
+                handle.write(file_text)
+
+    @staticmethod
+    def _write_queued_items(queue: SimpleQueue, handle) -> None:
+        """
+        The body of the writer thread, which writes queued items until it is stopped, and then closes the log file
+        handle.  Outputs are flushed whenever the queue runs empty, so bursts of messages are written together.
+
+        :param queue: The queue of items to write.
+        :param handle: The open log file handle, or None if there is no log file.
+        :return: None
+        """
+        while True:
+            item = queue.get()
+            if item is _STOP:
+                sys.stdout.flush()
+                if handle:
+                    handle.close()
+                return
+            if not isinstance(item, Event):
+                stdout_text, file_text = item
+                if stdout_text:
+                    sys.stdout.write(stdout_text)
+                if file_text and handle:
+                    handle.write(file_text)
+            if queue.empty() or isinstance(item, Event):
+                sys.stdout.flush()
+                if handle:
+                    handle.flush()
+            if isinstance(item, Event):
+                item.set()
 
     def log(self, message: str) -> None:
         """
@@ -23,19 +118,25 @@ class Logger:
         :param message: The message to emit, which is formatted along with a timestamp
         :return: None
         """
-        message = f"{datetime.now()} : {message}"
-        if self._print_to_stdout:
-            print(message)
-        if self._file:
-            with self._file.open(mode='a') as file:
-                file.write(message)
+        message = f"{datetime.now()} : {message}\n"
+        self._enqueue((message if self._print_to_stdout else None, message if self._file else None))
 
-    @staticmethod
-    def terminal_progress_bar(current_num: int, total_num: int, suffix: str) -> None:
+    def progress_due(self) -> bool:
         """
-        A static log function that can be called to specifically emit a progress indicator to standard output.
+        A cheap check for whether enough time has passed since the last progress bar update for a new update to be
+        shown.  Hot loops can use this to skip building the progress suffix when it would not be shown anyway.
+
+        :return: True if a call to terminal_progress_bar would currently update the progress bar.
+        """
+        return monotonic() - self._last_progress_time >= self._progress_interval
+
+    def progress_bar(self, current_num: int, total_num: int, suffix: str) -> None:
+        """
+        A log function that can be called to specifically emit a progress indicator to standard output.  Updates are
+        throttled by elapsed time, so this can be called for every item of a loop; updates that come sooner than the
+        progress interval after the last one are dropped, except for the final update when the progress is complete.
         Note that this function intentionally does not write a new line character so that the progress bar
-        can show up dynamically on the terminal.  Once the progress is complete, either call terminal_progress_done, or
+        can show up dynamically on the terminal.  Once the progress is complete, either call progress_done, or
         print an empty string to the terminal before sending more messages.
 
         :param current_num: The current progress count
@@ -43,19 +144,84 @@ class Logger:
         :param suffix: A string suffix to show after the progress bar
         :return: None
         """
+        if not self._print_to_stdout or (current_num < total_num and not self.progress_due()):
+            return
+        self._last_progress_time = monotonic()
         percent_done = round(100 * (current_num / total_num), 3)
         filled_length = int(80 * (percent_done / 100.0))
         bar = "*" * filled_length + '-' * (80 - filled_length)
-        print(f"\r                  Progress : |{bar}| {percent_done:.2f}% - {suffix}", end='')
+        self._enqueue((f"\r                  Progress : |{bar}| {percent_done:.2f}% - {suffix}", None))
+
+    def progress_done(self) -> None:
+        """
+        A log function that nicely finishes a progress bar that was created/updated using the
+        progress_bar function.  This function will set the progress bar to 100%
+        :return: None
+        """
+        self.progress_bar(1, 1, 'Finished\n')
+
+    @staticmethod
+    def terminal_progress_bar(current_num: int, total_num: int, suffix: str) -> None:
+        """
+        A static log function that emits a progress indicator through the default logger, kept so existing callers of
+        Logger.terminal_progress_bar keep working.  Use progress_bar to show progress through a specific logger.
+
+        :param current_num: The current progress count
+        :param total_num: The maximum progress count
+        :param suffix: A string suffix to show after the progress bar
+        :return: None
+        """
+        logger.progress_bar(current_num, total_num, suffix)
 
     @staticmethod
     def terminal_progress_done() -> None:
         """
-        A static log function that nicely finishes a progress bar that was created/updated using the
-        terminal_progress_bar function.  This function will set the progress bar to 100%
+        A static log function that finishes a progress bar of the default logger, see terminal_progress_bar.
+
         :return: None
         """
-        Logger.terminal_progress_bar(1, 1, 'Finished\n')
+        logger.progress_done()
+
+    def flush(self) -> None:
+        """
+        Waits until every message queued so far has been written to standard output and the log file.
+
+        :return: None
+        """
+        if self._pid == getpid():
+            written = Event()
+            self._enqueue(written)
+            written.wait()
+
+    def close(self) -> None:
+        """
+        Waits until every queued message has been written, then ends the writer thread and closes the log file handle.
+        The logger can still be used afterward, in which case a new writer is started and the log file is appended to.
+
+        :return: None
+        """
+        with self._lock:
+            if self._pid != getpid():
+                return
+            self._pid = -1
+            self._stop_writer.detach()
+            self._queue.put(_STOP)
+            writer = self._writer
+        writer.join()
+
+
+_live_loggers: WeakSet[Logger] = WeakSet()
+
+
+@atexit.register
+def _close_live_loggers() -> None:
+    """
+    Closes every logger still alive when the program exits, so that all of their queued messages are written.
+
+    :return: None
+    """
+    for live_logger in list(_live_loggers):
+        live_logger.close()
 
 
 logger = Logger()  # create a default instance to help with logging, use a custom instance if desired
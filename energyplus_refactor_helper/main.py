@@ -1,9 +1,50 @@
 import argparse
 from argparse import ArgumentParser
+from cProfile import Profile
 from sys import argv, exit
 from pathlib import Path
 
-from energyplus_refactor_helper.actions.listing import all_actions
+from energyplus_refactor_helper.actions.listing import all_actions, get_action
+from energyplus_refactor_helper.file_budget import FileBudget
+from energyplus_refactor_helper.report_output import (
+    SIMILARITY_REPORT_NAMES, SOURCE_REPORT_NAMES, available_compressions
+)
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.timing import timer
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    This is a small argument parsing worker that converts a shard specification of the form "i/N" into a tuple.  The
+    shard index is 1-based, so the valid shards for a 4-way split are "1/4", "2/4", "3/4", and "4/4".
+
+    :param shard: The shard specification string, as passed on the command line.
+    :return: A tuple of (shard_index, shard_count)
+    """
+    try:
+        shard_index, shard_count = [int(x) for x in shard.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must be of the form i/N, got: {shard}")
+    if shard_count < 1 or not 1 <= shard_index <= shard_count:
+        raise argparse.ArgumentTypeError(f"Shard index must be from 1 to N, got: {shard}")
+    return shard_index, shard_count
+
+
+def parse_sample(sample: str) -> float:
+    """
+    This is a small argument parsing worker that converts a sample fraction into a float, checking it is greater than 0
+    and at most 1.
+
+    :param sample: The sample fraction string, as passed on the command line.
+    :return: The sample fraction.
+    """
+    try:
+        fraction = float(sample)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Sample must be a fraction, got: {sample}")
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError(f"Sample must be greater than 0 and at most 1, got: {sample}")
+    return fraction
 
 
 def run(args: list[str]) -> int:
@@ -51,12 +92,231 @@ def run(args: list[str]) -> int:
         default=False,
         help='If True, skip making the plot, which can take a long time'
     )
+    parser.add_argument(
+        '--dry-run', '-n',
+        action='store_true',
+        default=False,
+        help='If True, write the changes an in-place edit would make to rewrite.patch in the output directory instead, '
+             'which can be applied later with git apply'
+    )
+    parser.add_argument(
+        '--max-file-bytes',
+        action='store',
+        type=int,
+        default=None,
+        help='Skip source files larger than this many bytes, recording them as skipped in the file summary'
+    )
+    parser.add_argument(
+        '--max-file-calls',
+        action='store',
+        type=int,
+        default=None,
+        help='Stop scanning a source file once this many calls are found, recording it as partial in the file summary'
+    )
+    parser.add_argument(
+        '--max-parse-seconds',
+        action='store',
+        type=float,
+        default=None,
+        help='Stop scanning a source file after this many seconds, recording it as partial in the file summary'
+    )
+    parser.add_argument(
+        '--all-pairs',
+        action='store_true',
+        default=False,
+        help='If True, score the similarity of every pair of messages, instead of only messages with the same emitted '
+             'function'
+    )
+    parser.add_argument(
+        '--compress',
+        action='store',
+        choices=available_compressions(),
+        default=None,
+        help='Compress the JSON and CSV reports as they are written, appending .gz or .zst to their names; zstd needs '
+             'the zstandard package'
+    )
+    parser.add_argument(
+        '--sparse-lines',
+        action='store_true',
+        default=False,
+        help='If True, write lines_ranges.csv, listing only the ranges of lines with matched calls in each file, '
+             'instead of the full line-by-line lines_summary.csv'
+    )
+    parser.add_argument(
+        '--read-ahead',
+        action='store',
+        type=int,
+        default=8,
+        help='Number of source files to read ahead of the parser on background threads, to hide the latency of slow '
+             'storage such as network mounts; 0 reads each file only when it is parsed'
+    )
+    parser.add_argument(
+        '--results-pages',
+        action='store',
+        type=int,
+        default=None,
+        help='Also write the JSON results as chunks of this many source files each, with an index of the chunk, call '
+             'count, and group count of every file, into the results_pages folder'
+    )
+    parser.add_argument(
+        '--baseline',
+        action='store',
+        default=None,
+        help='For the performance guard, the baseline JSON file of metrics and tolerances to check against'
+    )
+    parser.add_argument(
+        '--update-baseline',
+        action='store_true',
+        default=False,
+        help='For the performance guard, write the measured metrics as the new baseline instead of checking them'
+    )
+    parser.add_argument(
+        '--corpus-files',
+        action='store',
+        type=int,
+        default=None,
+        help='For the performance guard, generate a synthetic corpus of this many files into the output directory '
+             'and analyze it instead of the source repository, so the check works without an EnergyPlus checkout'
+    )
+    parser.add_argument(
+        '--report',
+        action='append',
+        choices=SOURCE_REPORT_NAMES + SIMILARITY_REPORT_NAMES,
+        default=None,
+        help='For the report action, a report to regenerate from the analysis snapshot; can be given more than once, '
+             'and by default every report of the original run is regenerated'
+    )
+    parser.add_argument(
+        '--similarity-top',
+        action='store',
+        type=int,
+        default=10000,
+        help='Number of the most similar message pairs to write to comparisons.txt'
+    )
+    parser.add_argument(
+        '--sample',
+        action='store',
+        type=parse_sample,
+        default=None,
+        help='Only analyze a reproducible random fraction of the files, stratified by size, and of the message pairs, '
+             'and report totals extrapolated to the whole tree with 95%% confidence intervals in sample_summary.json'
+    )
+    parser.add_argument(
+        '--sample-seed',
+        action='store',
+        type=int,
+        default=0,
+        help='The seed of the random sample, so the same seed always samples the same files and pairs'
+    )
+    parser.add_argument(
+        '--shard',
+        action='store',
+        type=parse_shard,
+        default=None,
+        help='Only analyze one deterministic partition of the files, given as i/N with i from 1 to N, and write '
+             'partial results which can be combined later with the merge_shards action'
+    )
+    parser.add_argument(
+        '--rev',
+        action='store',
+        default=None,
+        help='Analyze the source files at this git revision of the source repository, without checking it out'
+    )
+    parser.add_argument(
+        '--against',
+        action='append',
+        default=[],
+        help='A git revision, or the path to another checkout, to compare against; can be given more than once'
+    )
+    parser.add_argument(
+        '--function',
+        action='store',
+        default=None,
+        help='For call index queries, only match calls to this function'
+    )
+    parser.add_argument(
+        '--argument',
+        action='store',
+        default=None,
+        help='For call index queries, only match calls with an argument matching this SQL LIKE pattern, like format(%%'
+    )
+    parser.add_argument(
+        '--argument-position',
+        action='store',
+        type=int,
+        default=None,
+        help='For call index queries, only apply the argument filter to this 0-based argument position'
+    )
+    parser.add_argument(
+        '--file',
+        action='store',
+        default=None,
+        help='For call index queries, only match calls in files whose relative path matches this SQL LIKE pattern'
+    )
+    parser.add_argument(
+        '--no-refresh',
+        action='store_true',
+        default=False,
+        help='For call index queries, query the index as it was last updated, without first walking the source tree '
+             'for changed files; the index is still built if it does not exist yet'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        action='store',
+        type=float,
+        default=2.0,
+        help='For the daemon, the number of seconds between polls of the source tree for changes'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False,
+        help='If True, profile the run with cProfile and write the statistics to profile.pstats in the output directory'
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        default=False,
+        help='If True, trace memory allocations with tracemalloc and write the peak and retained memory of each phase, '
+             'with the top allocation sites, to memory.json in the output directory; this slows down the run'
+    )
     args = parser.parse_args(args=args)
     source_repo = Path(args.source_repository)
     output_path = Path(args.output_directory)
-    action_class = all_actions[args.action_to_run]
+    action_class = get_action(args.action_to_run)
+    timer.reset()
+    profiler = Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    if args.trace_memory:
+        timer.start_memory_tracing()
     action_instance = action_class()
-    return action_instance.run(source_repo, output_path, args.in_place, args.skip_plots)
+    query_filters = {
+        'function': args.function, 'argument': args.argument, 'argument_position': args.argument_position,
+        'file': args.file
+    }
+    options = RunOptions(
+        shard=args.shard, revision=args.rev, compare_against=args.against, query_filters=query_filters,
+        poll_interval=args.poll_interval, dry_run=args.dry_run,
+        budget=FileBudget(args.max_file_bytes, args.max_file_calls, args.max_parse_seconds), all_pairs=args.all_pairs,
+        sample=args.sample, sample_seed=args.sample_seed, compression=args.compress,
+        sparse_lines=args.sparse_lines, read_ahead=args.read_ahead, reports=args.report,
+        similarity_top=args.similarity_top, results_page_size=args.results_pages, baseline=args.baseline,
+        update_baseline=args.update_baseline, corpus_files=args.corpus_files, refresh_index=not args.no_refresh
+    )
+    with timer.phase('run'):
+        status = action_instance.run(source_repo, output_path, args.in_place, args.skip_plots, options)
+    if profiler:
+        profiler.disable()
+    if args.trace_memory:
+        timer.stop_memory_tracing()
+    if output_path.is_dir():
+        timer.write(output_path / 'timings.json')
+        if args.trace_memory:
+            timer.write_memory(output_path / 'memory.json')
+        if profiler:
+            profiler.dump_stats(output_path / 'profile.pstats')
+    return status
 
 
 def run_cli() -> int:  # pragma: no cover
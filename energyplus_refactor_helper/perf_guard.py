@@ -0,0 +1,68 @@
+from typing import Optional
+
+# the allowed relative slowdown of a phase, drop in throughput, and growth of peak memory, and the absolute change in
+# seconds below which a phase is too short to time reliably
+DEFAULT_TOLERANCES = {'wall_time': 0.5, 'throughput': 0.33, 'memory': 0.25, 'min_seconds': 0.05}
+
+
+def collect_metrics(phases: dict[str, dict], memory: Optional[dict[str, dict]] = None) -> dict:
+    """
+    Gathers the metrics the performance guard compares from the phases recorded by a PhaseTimer: the wall time and, if
+    memory was traced, the peak memory of each phase, and the parsing throughput in files and calls per second.
+
+    :param phases: The recorded phases, as in the phases member of a PhaseTimer or the phases of timings.json.
+    :param memory: The optional recorded memory, as in the memory member of a PhaseTimer or the phases of memory.json.
+    :return: A dictionary with 'phases', holding the metrics of each phase, and 'throughput'.
+    """
+    metrics = {'phases': {}, 'throughput': {}}
+    for name, record in phases.items():
+        metrics['phases'][name] = {'wall_time': record['wall_time']}
+        if memory and name in memory:
+            metrics['phases'][name]['peak_memory'] = memory[name]['peak']
+    parse = phases.get('parse')
+    if parse and parse['wall_time'] > 0:
+        metrics['throughput']['files_per_second'] = parse['items'] / parse['wall_time']
+        if 'scan' in phases:  # each scanned file records the number of calls found in it
+            metrics['throughput']['calls_per_second'] = phases['scan']['items'] / parse['wall_time']
+    return metrics
+
+
+def compare_metrics(metrics: dict, baseline: dict, tolerances: Optional[dict] = None) -> list[str]:
+    """
+    Compares the metrics of a run against the metrics of a baseline run, and describes every regression beyond the
+    tolerances.  Phases and throughputs missing from either run are not compared, and a phase is only a regression if
+    it is slower by both the relative tolerance and the minimum number of seconds, so very short phases do not fail on
+    timing noise.
+
+    :param metrics: The metrics of the run to check, as returned by collect_metrics.
+    :param baseline: The metrics of the baseline run, as returned by collect_metrics.
+    :param tolerances: The allowed relative changes, with the keys of DEFAULT_TOLERANCES, any missing key using the
+                       default.
+    :return: A list of regression descriptions, empty if the run is within the tolerances.
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances if tolerances else {})}
+    regressions = []
+    for name, base in baseline['phases'].items():
+        current = metrics['phases'].get(name)
+        if current is None:
+            continue
+        wall_limit = base['wall_time'] * (1 + tolerances['wall_time'])
+        if current['wall_time'] > wall_limit and current['wall_time'] - base['wall_time'] > tolerances['min_seconds']:
+            regressions.append(
+                f"Phase {name} took {current['wall_time']:.3f}s, over the baseline {base['wall_time']:.3f}s "
+                f"by more than {tolerances['wall_time']:.0%}"
+            )
+        if 'peak_memory' in base and 'peak_memory' in current:
+            if current['peak_memory'] > base['peak_memory'] * (1 + tolerances['memory']):
+                regressions.append(
+                    f"Phase {name} peaked at {current['peak_memory']} bytes, over the baseline "
+                    f"{base['peak_memory']} bytes by more than {tolerances['memory']:.0%}"
+                )
+    for name, base_rate in baseline['throughput'].items():
+        rate = metrics['throughput'].get(name)
+        if rate is not None and rate < base_rate * (1 - tolerances['throughput']):
+            regressions.append(
+                f"Throughput {name} fell to {rate:.1f}, under the baseline {base_rate:.1f} "
+                f"by more than {tolerances['throughput']:.0%}"
+            )
+    return regressions
@@ -0,0 +1,74 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from energyplus_refactor_helper.git_revision import decode_source
+from energyplus_refactor_helper.timing import timer
+
+
+def read_source(path: Path) -> str:
+    """
+    Reads one source file from disk as text, with line endings normalized the same way as SourceFile reads them.
+
+    :param path: The path of the file to read.
+    :return: The text content of the file.
+    """
+    return decode_source(path.read_bytes())
+
+
+def prefetch_sources(paths: list[Path], read_ahead: int = 8,
+                     read: Callable[[Path], Any] = read_source) -> Iterator[tuple[Path, Any]]:
+    """
+    A generator that reads files on a pool of threads, up to read_ahead files ahead of the consumer, and yields them in
+    the given order.  On slow or high-latency storage, such as a network mount, the reads of the next files then
+    overlap with the parsing of the current one, instead of every parse waiting on its own read.  The reads are
+    bounded, so memory use does not grow with the number of files, and any reads still pending when the consumer stops
+    early are cancelled.  Time spent waiting on a read that has not finished is recorded in the read_wait phase.
+
+    :param paths: The files to read, in the order they should be yielded.
+    :param read_ahead: The maximum number of files being read ahead at once, or 0 to read each file only when needed.
+    :param read: The function reading one file, by default reading it as source text.
+    :return: An iterator of (path, content) tuples, in the same order as the given paths.
+    """
+    if read_ahead < 1:
+        for path in paths:
+            yield path, read(path)
+        return
+    executor = ThreadPoolExecutor(max_workers=read_ahead)
+    pending: deque[tuple[Path, Future]] = deque()
+    try:
+        path_iterator = iter(paths)
+        for path in path_iterator:
+            pending.append((path, executor.submit(read, path)))
+            if len(pending) == read_ahead:
+                break
+        while pending:
+            path, future = pending.popleft()
+            with timer.phase('read_wait'):
+                content = future.result()
+            next_path = next(path_iterator, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(read, next_path)))
+            yield path, content
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def read_sources(paths: list[Path], workers: int = 8, batch_size: int = 32,
+                 read: Callable[[Path], Any] = read_source) -> dict[Path, Any]:
+    """
+    Reads many files at once on a pool of threads.  The files are read in batches, so reading thousands of small files
+    does not pay the overhead of scheduling each one on its own, while the latency of the reads still overlaps across
+    the batches.
+
+    :param paths: The files to read.
+    :param workers: The number of reading threads.
+    :param batch_size: The number of files each thread reads in turn before taking the next batch.
+    :param read: The function reading one file, by default reading it as source text.
+    :return: A dictionary of the content of each file, by path.
+    """
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    with timer.phase('read_bulk', len(paths)), ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda batch: [(p, read(p)) for p in batch], batches)
+        return {path: content for batch in results for path, content in batch}
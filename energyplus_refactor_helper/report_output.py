@@ -0,0 +1,117 @@
+from gzip import open as gzip_open
+from io import TextIOWrapper
+from pathlib import Path
+from typing import Optional, TextIO
+
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+# the reports generated from the parsed source files, and then the reports generated from the similarity of messages
+SOURCE_REPORT_NAMES = [
+    'results.json', 'file_summary.csv', 'lines_summary.csv', 'lines_ranges.csv', 'distribution_plot.png',
+    'results_pages', 'call_statistics.json'
+]
+SIMILARITY_REPORT_NAMES = ['template_frequency.csv', 'comparisons.txt']
+
+
+def available_compressions() -> list[str]:
+    """
+    Lists the compressions the reports can be written with here.  Gzip is always available, while zstd needs the
+    optional zstandard package.
+
+    :return: A list of compression names, as accepted by report_file_name.
+    """
+    compressions = ['gzip']
+    try:
+        import zstandard  # noqa: F401
+        compressions.append('zstd')
+    except ImportError:
+        pass
+    return compressions
+
+
+def report_file_name(file_name: str, compression: Optional[str] = None) -> str:
+    """
+    Returns the name a report is written to with the given compression, such as results.json.gz for gzip.
+
+    :param file_name: The uncompressed name of the report, such as results.json.
+    :param compression: The name of the compression, a key of COMPRESSION_SUFFIXES, or None for no compression.
+    :return: The report file name, with the suffix of the compression appended.
+    """
+    return file_name + COMPRESSION_SUFFIXES[compression] if compression else file_name
+
+
+def find_report(directory: Path, file_name: str) -> Optional[Path]:
+    """
+    Finds a report in a directory, whether it was written uncompressed or with any of the compressions.
+
+    :param directory: The directory the report was written into.
+    :param file_name: The uncompressed name of the report, such as results.json.
+    :return: The path of the report, or None if it is not in the directory.
+    """
+    for compression in [None, *COMPRESSION_SUFFIXES]:
+        path = directory / report_file_name(file_name, compression)
+        if path.exists():
+            return path
+    return None
+
+
+def open_report(path: Path, mode: str = 'r') -> TextIO:
+    """
+    Opens a report file as text for streaming reads or writes, through a compressor chosen by the file suffix, so the
+    report writers and readers do not need to know whether or how the report is compressed.  Newlines are not
+    translated, as the CSV module expects.
+
+    :param path: The path of the report, ending with .gz for gzip, .zst for zstd, or anything else for plain text.
+    :param mode: Either 'r' to read the report or 'w' to write it.
+    :return: An open text stream, to be used as a context manager.
+    """
+    if path.suffix == COMPRESSION_SUFFIXES['gzip']:
+        return gzip_open(path, mode + 't', encoding='utf-8', newline='')
+    if path.suffix == COMPRESSION_SUFFIXES['zstd']:
+        try:
+            import zstandard  # imported here as it is an optional dependency
+        except ImportError:
+            raise ImportError("Reading or writing zstd reports requires the zstandard package")
+        raw_file = path.open(mode + 'b')
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor().stream_writer(raw_file)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw_file)
+        return TextIOWrapper(stream, encoding='utf-8', newline='')
+    return path.open(mode, encoding='utf-8', newline='')
+
+
+def line_ranges(distribution: list) -> str:
+    """
+    Converts a line distribution, with one value per line of a file, into the run-length form of the sparse line
+    summary, which lists only the ranges of lines with a nonzero value.  Lines are 1-based, and a range of a single line
+    is written as just that line, so a distribution of 0, 1, 1, 0, 1 becomes "2-3 5".
+
+    :param distribution: The value of each line, as integers or their string forms.
+    :return: The space separated line ranges.
+    """
+    ranges = []
+    start = None
+    for line_num, value in enumerate([*distribution, 0], start=1):
+        if int(value) and start is None:
+            start = line_num
+        elif not int(value) and start is not None:
+            ranges.append(str(start) if start == line_num - 1 else f"{start}-{line_num - 1}")
+            start = None
+    return ' '.join(ranges)
+
+
+def expand_line_ranges(line_count: int, ranges: str) -> list[int]:
+    """
+    Converts the run-length form of the sparse line summary back into a line distribution, the inverse of line_ranges
+    for a distribution of zeros and ones.
+
+    :param line_count: The number of lines in the file.
+    :param ranges: The space separated line ranges, as returned by line_ranges.
+    :return: A list of one integer per line, 1 for lines in one of the ranges, and 0 otherwise.
+    """
+    distribution = [0] * line_count
+    for line_range in ranges.split():
+        start, _, end = line_range.partition('-')
+        for line_num in range(int(start), int(end or start) + 1):
+            distribution[line_num - 1] = 1
+    return distribution
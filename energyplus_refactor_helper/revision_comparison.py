@@ -0,0 +1,76 @@
+from difflib import SequenceMatcher
+from energyplus_refactor_helper.function_call_group import FunctionCallGroup
+
+
+def group_key(group: FunctionCallGroup) -> str:
+    """
+    Builds a key identifying the content of a function call group, independent of where the group is in the file and
+    of how the calls are formatted, so the same group can be recognized across revisions even if the lines moved.
+
+    :param group: The function call group to identify.
+    :return: A string key, which is the same for groups with the same calls and arguments.
+    """
+    return '\n'.join([f.rewrite() for f in group.function_calls])
+
+
+def keyed_group(group: FunctionCallGroup) -> tuple[str, dict]:
+    """
+    Reduces a function call group to what a comparison needs, its key and its results.json form, which unlike the
+    group itself is small and cheap to send back from a worker process or to keep for every file of a revision.
+
+    :param group: The function call group.
+    :return: A tuple of the group key, as returned by group_key, and the group in the results.json group format.
+    """
+    return group_key(group), group.to_json()
+
+
+def compare_groups(old_groups: list[tuple[str, dict]], new_groups: list[tuple[str, dict]]) -> dict:
+    """
+    Compares the function call groups of one file across two revisions.  The groups are aligned in order by content,
+    and groups that could not be aligned are reported as added or removed.  Where a run of removed groups sits in
+    the same place as a run of added groups, they are paired up and reported as changed instead.
+
+    :param old_groups: The groups of the file in the older revision, in file order, each as returned by keyed_group.
+    :param new_groups: The groups of the file in the newer revision, in file order, each as returned by keyed_group.
+    :return: A dictionary with lists of added, removed, and changed groups, in the results.json group format.
+    """
+    matcher = SequenceMatcher(None, [k for k, _ in old_groups], [k for k, _ in new_groups], False)
+    added, removed, changed = [], [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        old_run, new_run = old_groups[i1:i2], new_groups[j1:j2]
+        num_changed = min(len(old_run), len(new_run))
+        changed.extend([{'from': o, 'to': n} for (_, o), (_, n) in zip(old_run, new_run)])
+        removed.extend([g for _, g in old_run[num_changed:]])
+        added.extend([g for _, g in new_run[num_changed:]])
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def compare_revisions(old_files: dict[str, tuple[str, list[tuple[str, dict]]]],
+                      new_files: dict[str, tuple[str, list[tuple[str, dict]]]]) -> dict:
+    """
+    Compares all the files of two analyzed revisions.  Files with the same content SHA in both revisions are skipped
+    without comparing their groups, so the cost of the comparison scales with the number of changed files.
+
+    :param old_files: A dictionary mapping relative file paths to a (blob SHA, groups) tuple for the older revision,
+                      with the groups of the file each as returned by keyed_group.
+    :param new_files: A dictionary mapping relative file paths to a (blob SHA, groups) tuple for the newer revision.
+    :return: A dictionary with a summary of the differences, and the group differences for each file that changed.
+    """
+    files = {}
+    for relative_path in sorted(set(old_files) | set(new_files), key=lambda p: p.split('/')):
+        old_sha, old_groups = old_files.get(relative_path, (None, []))
+        new_sha, new_groups = new_files.get(relative_path, (None, []))
+        if old_sha == new_sha:
+            continue
+        differences = compare_groups(old_groups, new_groups)
+        if any(differences.values()):
+            files[relative_path] = differences
+    summary = {
+        'files_changed': len(files),
+        'groups_added': sum([len(f['added']) for f in files.values()]),
+        'groups_removed': sum([len(f['removed']) for f in files.values()]),
+        'groups_changed': sum([len(f['changed']) for f in files.values()]),
+    }
+    return {'summary': summary, 'files': files}
@@ -0,0 +1,76 @@
+from typing import Optional
+
+from energyplus_refactor_helper.file_budget import FileBudget
+
+
+class RunOptions:
+    def __init__(self, shard: Optional[tuple[int, int]] = None, revision: Optional[str] = None,
+                 compare_against: Optional[list[str]] = None, query_filters: Optional[dict] = None,
+                 poll_interval: float = 2.0, dry_run: bool = False, budget: Optional[FileBudget] = None,
+                 all_pairs: bool = False, sample: Optional[float] = None, sample_seed: int = 0,
+                 compression: Optional[str] = None, sparse_lines: bool = False, read_ahead: int = 8,
+                 reports: Optional[list[str]] = None, similarity_top: int = 10000,
+                 results_page_size: Optional[int] = None, baseline: Optional[str] = None, update_baseline: bool = False,
+                 corpus_files: Optional[int] = None, refresh_index: bool = True):
+        """
+        The RunOptions class collects the optional settings for a single action run.  The required settings are still
+        passed directly to :meth:`energyplus_refactor_helper.actions.base.RefactorBase.run`, but everything else is
+        gathered here so that new options do not require changing the run signature of every action.
+
+        :param shard: An optional (shard_index, shard_count) tuple, where the shard index is 1-based.  If provided, only
+                      the files belonging to this shard are analyzed, and partial results are written for a later merge.
+        :param revision: An optional git revision to analyze.  If provided, the source files are read directly from the
+                         git object database of the source repository instead of from the checked out files.
+        :param compare_against: An optional list of git revisions or checkout paths to compare the analyzed revision
+                                against, in order, for actions which compare revisions.
+        :param query_filters: An optional dictionary of filters for actions which query the call index, with keys
+                              matching the arguments of :meth:`energyplus_refactor_helper.call_index.CallIndex.query`.
+        :param poll_interval: The number of seconds between polls of the source tree for changes, for the daemon.
+        :param dry_run: A flag for whether to write the changes an in-place edit would make to a patch file in the
+                        output directory, rather than editing the files, for actions which rewrite files.
+        :param budget: Optional limits on the work spent on each source file, so that a single huge or pathological
+                       file cannot stall a run.  By default there are no limits.
+        :param all_pairs: A flag for whether to score the similarity of every pair of messages, rather than only the
+                          pairs of messages with the same emitted function, or across adjacent emitted functions.
+        :param sample: An optional fraction of the files, and of the message pairs, to analyze, for quick estimates.  If
+                       provided, totals for the whole tree are extrapolated from the sample, with confidence intervals.
+        :param sample_seed: The seed of the random sample, so that a sampled run can be reproduced.
+        :param compression: An optional compression for the text reports, gzip or zstd, applied as they are written.
+        :param sparse_lines: A flag for whether to write the line-by-line summary in its sparse form, listing only the
+                             ranges of matched lines.
+        :param read_ahead: The number of source files to read ahead of the parser on background threads, which hides
+                           the latency of slow storage such as network mounts, or 0 to read each file only when needed.
+        :param reports: An optional list of the report file names to regenerate, for the report action, by default all
+                        of the reports the original run would write.
+        :param similarity_top: The number of the most similar message pairs to write to comparisons.txt.
+        :param results_page_size: An optional number of source files per chunk, to also write the JSON results as
+                                  small chunks with an index, for viewers which only load the files they display.
+        :param baseline: The path of the baseline JSON file, for the performance guard, holding the metrics of a
+                         baseline run and the tolerances they are compared with.
+        :param update_baseline: A flag for whether the performance guard writes the measured metrics as the new
+                                baseline, keeping its tolerances, rather than checking against it.
+        :param corpus_files: An optional number of files of a synthetic corpus, for the performance guard to generate
+                             into the output directory and analyze instead of the source repository.
+        :param refresh_index: A flag for whether to bring the call index up to date with the source tree before a query,
+                              which walks the whole tree, rather than querying the index as it was last updated.
+        """
+        self.shard = shard
+        self.revision = revision
+        self.compare_against = compare_against if compare_against else []
+        self.query_filters = query_filters if query_filters else {}
+        self.poll_interval = poll_interval
+        self.dry_run = dry_run
+        self.budget = budget if budget else FileBudget()
+        self.all_pairs = all_pairs
+        self.sample = sample
+        self.sample_seed = sample_seed
+        self.compression = compression
+        self.sparse_lines = sparse_lines
+        self.read_ahead = read_ahead
+        self.reports = reports
+        self.similarity_top = similarity_top
+        self.results_page_size = results_page_size
+        self.baseline = baseline
+        self.update_baseline = update_baseline
+        self.corpus_files = corpus_files
+        self.refresh_index = refresh_index
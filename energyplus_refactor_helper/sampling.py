@@ -0,0 +1,98 @@
+from math import sqrt
+from pathlib import Path
+from random import Random
+from statistics import mean, variance
+from typing import Optional
+
+Z_95 = 1.96  # the standard normal quantile for a two-sided 95% confidence interval
+
+
+class FileSample:
+    def __init__(self, files: list[Path], fraction: float, seed: int = 0, sizes: Optional[dict[Path, int]] = None,
+                 stratum_count: int = 4):
+        """
+        The FileSample class represents a reproducible random subset of source files, used to get quick estimates for
+        a whole tree from a fraction of the work.  The number of sampled files is the given fraction of all the files,
+        rounded, and at least one.  The files are split into strata of similar size, and the sample is spread evenly
+        over the strata, so that the few very large files are represented.  Totals measured on the sampled files can
+        then be extrapolated to all the files, with confidence intervals, by estimate_total.
+
+        :param files: All of the files that could be analyzed, which must be in a reproducible order, such as sorted.
+        :param fraction: The fraction of the files to sample, greater than 0 and up to 1.
+        :param seed: The seed of the random number generator, so the same seed always samples the same files.
+        :param sizes: The size of each file, used to split the files into strata.  If not provided, all the files are
+                      sampled from a single stratum.
+        :param stratum_count: The number of strata to split the files into when the sizes are known.
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError(f"Sample fraction must be greater than 0 and at most 1, got: {fraction}")
+        self.fraction = fraction
+        self.seed = seed
+        file_count = len(files)
+        sample_size = min(file_count, max(1, int(fraction * file_count + 0.5)))
+        ordered = sorted(files, key=lambda f: sizes[f]) if sizes else list(files)
+        strata_here = min(stratum_count, sample_size) if sizes else 1
+        self.strata = [ordered[i * file_count // strata_here:(i + 1) * file_count // strata_here]
+                       for i in range(strata_here)] if files else []
+        rng = Random(seed)
+        self.sampled_strata = []
+        for i, stratum in enumerate(self.strata):
+            # the sample is spread as evenly over the strata as the strata are over the files
+            stratum_sample_size = (i + 1) * sample_size // strata_here - i * sample_size // strata_here
+            self.sampled_strata.append(rng.sample(stratum, min(len(stratum), max(1, stratum_sample_size))))
+
+    @property
+    def files(self) -> list[Path]:
+        """
+        The sampled files, in sorted order.
+
+        :return: A list of file paths.
+        """
+        return sorted(f for stratum in self.sampled_strata for f in stratum)
+
+    @property
+    def total_file_count(self) -> int:
+        """
+        The number of files the sample was drawn from.
+
+        :return: The file count.
+        """
+        return sum(len(stratum) for stratum in self.strata)
+
+    def estimate_total(self, values: dict[Path, float]) -> dict:
+        """
+        Extrapolates a per-file value, such as the number of calls in each file, from the sampled files to a total for
+        all the files, using the stratified estimator of a total with a 95% confidence interval.  A stratum with only
+        one sampled file contributes no variance, as its variance cannot be estimated.
+
+        :param values: The value measured on each sampled file.
+        :return: A dictionary with the 'estimate', and the 'low' and 'high' ends of the confidence interval.
+        """
+        estimate = 0.0
+        estimate_variance = 0.0
+        for stratum, sampled in zip(self.strata, self.sampled_strata):
+            stratum_values = [values[f] for f in sampled]
+            estimate += len(stratum) * mean(stratum_values)
+            if len(sampled) > 1:
+                population_correction = 1 - len(sampled) / len(stratum)
+                estimate_variance += len(stratum) ** 2 * population_correction * variance(stratum_values) / len(sampled)
+        margin = Z_95 * sqrt(estimate_variance)
+        return {'estimate': estimate, 'low': max(0.0, estimate - margin), 'high': estimate + margin}
+
+
+def estimate_proportion(successes: int, trials: int) -> dict:
+    """
+    Estimates a proportion, such as the fraction of message pairs that are near duplicates, from a random sample of
+    trials, using the Wilson score interval, which behaves well even when there are few or no successes.
+
+    :param successes: The number of sampled trials that succeeded.
+    :param trials: The number of sampled trials.
+    :return: A dictionary with the 'estimate', and the 'low' and 'high' ends of the 95% confidence interval.
+    """
+    if trials == 0:
+        return {'estimate': 0.0, 'low': 0.0, 'high': 1.0}
+    p = successes / trials
+    denominator = 1 + Z_95 ** 2 / trials
+    center = (p + Z_95 ** 2 / (2 * trials)) / denominator
+    margin = Z_95 * sqrt(p * (1 - p) / trials + Z_95 ** 2 / (4 * trials ** 2)) / denominator
+    return {'estimate': p, 'low': max(0.0, center - margin), 'high': min(1.0, center + margin)}
@@ -0,0 +1,246 @@
+from csv import writer
+from pathlib import Path
+from random import Random
+import re
+from time import time
+from typing import Optional
+
+from energyplus_refactor_helper.logger import logger
+
+STRING_LITERAL = re.compile(r'R"\((.*?)\)"|"((?:\\.|[^"\\])*)"', re.DOTALL)
+FORMAT_PLACEHOLDER = re.compile(r'\{[^{}]*}')
+MEMBER_CHAIN = re.compile(r'(?<![\w:<])[A-Za-z_][\w:]*(?:\s*(?:->|\.)\s*[A-Za-z_][\w:]*)+')
+IDENTIFIER = re.compile(r'(?<![\w:<])(?!(?:true|false)(?![\w:]))[A-Za-z_][\w:]*(?![\w:])(?!\s*\()')
+NUMBER = re.compile(r'(?<![\w<])-?\d+(?:\.\d*)?(?![\w>])')
+ACCESSOR_CALL = re.compile(r'(?<![\w:<])[A-Za-z_][\w:]*\s*\([^(),"]*\)')  # a call of one argument, like cAlphaArgs(1)
+ARGUMENT_POSTFIX = re.compile(r'<arg>\s*(?:\([^()"]*\)|\[[^\[\]"]*]|(?:->|\.)\s*<arg>)')
+WHITESPACE = re.compile(r'\s+')
+EMITTED_FUNCTION = re.compile(r'\s*([A-Za-z_][\w:]*)\s*\(')
+EMITTED_FLAG = re.compile(r',\s*(true|false)\s*\)\s*;\s*$')
+# what the blocked comparisons split the messages by, recorded with scored pairs so that they are not reused after it
+# changes
+BLOCKED_BY = 'emitted_template'
+# blocks of messages emitted by these function templates are compared with each other, as well as within themselves
+DEFAULT_ADJACENT_BLOCKS = [
+    ('emitErrorMessage(false)', 'emitErrorMessages(false)'),
+    ('emitErrorMessage(true)', 'emitErrorMessages(true)'),
+    ('emitWarningMessage', 'emitWarningMessages'),
+    ('emitWarningMessage(true)', 'emitWarningMessages(true)'),
+]
+
+
+def _normalize_code(code: str) -> str:
+    """
+    Collapses the identifiers, member accesses, indexing, single argument accessor calls, and numbers in a piece of
+    code outside of string literals into a single <arg> token each, keeping the names of other function calls such as
+    format, along with the punctuation.
+
+    :param code: The code to normalize, which must not contain string literals.
+    :return: The normalized code.
+    """
+    code = code.replace('fmt::format', 'format')
+    code = MEMBER_CHAIN.sub('<arg>', code)
+    code = IDENTIFIER.sub('<arg>', code)
+    code = NUMBER.sub('<arg>', code)
+    previous = None
+    while previous != code:  # collapse postfix expressions like <arg>(<arg>).<arg> from the inside out
+        previous = code
+        code = ARGUMENT_POSTFIX.sub('<arg>', ACCESSOR_CALL.sub('<arg>', code))
+    return WHITESPACE.sub(' ', code)
+
+
+def message_template(text: str) -> str:
+    """
+    This function reduces a message text, such as a rewritten group of error calls, to a canonical template, so that
+    messages that differ only in the arguments they format, like cCurrentModuleObject versus CurrentModuleObject, or a
+    different cAlphaArgs index, have the same template.  The words of string literals are kept, but their format
+    placeholders are reduced to {}, raw and adjacent literals are merged into single plain literals, and everything
+    outside of the literals is reduced by _normalize_code.
+
+    :param text: The message text to reduce.
+    :return: The template of the message.
+    """
+    parts = []
+    position = 0
+    for match in STRING_LITERAL.finditer(text):
+        code = text[position:match.start()]
+        literal = match.group(1) if match.group(1) is not None else match.group(2)
+        literal = WHITESPACE.sub(' ', FORMAT_PLACEHOLDER.sub('{}', literal))
+        if parts and parts[-1].startswith('"') and not code.strip():
+            parts[-1] = parts[-1][:-1] + literal + '"'  # adjacent literals are concatenated by the compiler
+        else:
+            parts.extend([_normalize_code(code), f'"{literal}"'])
+        position = match.end()
+    parts.append(_normalize_code(text[position:]))
+    return ''.join(parts).strip()
+
+
+def group_by_template(texts: list[str]) -> dict[str, list[str]]:
+    """
+    This function groups message texts by their template in a single pass, so that only one representative of each
+    template needs to go through the quadratic similarity comparison.
+
+    :param texts: The message texts to group.
+    :return: A dictionary of the texts sharing each template, keyed by template, in the order each template was first
+             seen.  The first text of each group can be used as the representative of the template.
+    """
+    templates: dict[str, list[str]] = {}
+    for text in texts:
+        templates.setdefault(message_template(text), []).append(text)
+    return templates
+
+
+def write_template_frequencies(templates: dict[str, list[str]], output_file: Path) -> None:
+    """
+    This function writes a CSV report of how many messages share each template, most frequent template first, along
+    with an example message for each.
+
+    :param templates: The grouped message texts, as returned by group_by_template.
+    :param output_file: The output file path to write.
+    :return: None
+    """
+    with output_file.open('w', newline='') as f:
+        csv_writer = writer(f, lineterminator='\n')
+        csv_writer.writerow(['Count', 'Template', 'Example'])
+        for template, texts in sorted(templates.items(), key=lambda t: len(t[1]), reverse=True):
+            csv_writer.writerow([len(texts), template, texts[0]])
+
+
+def emitted_template(text: str) -> str:
+    """
+    This function finds the function a rewritten message is emitted through, along with its trailing true/false flag
+    if it has one, such as emitErrorMessages(true).  Messages emitted through different templates are never merged.
+
+    :param text: The message text, such as a rewritten group of error calls.
+    :return: The emitted function template, or an empty string if the text does not start with a function call.
+    """
+    function_match = EMITTED_FUNCTION.match(text)
+    if not function_match:
+        return ''
+    flag_match = EMITTED_FLAG.search(text)
+    return function_match.group(1) + (f"({flag_match.group(1)})" if flag_match else '')
+
+
+def block_key(text: str, cleaned_call_types: Optional[list[int]] = None) -> tuple[str, tuple[int, ...]]:
+    """
+    This function builds the key of the block a message belongs to for blocked similarity comparisons, from the
+    emitted function template and the call type pattern of the function call group it was built from.  The template
+    decides which messages are compared, and the call pattern only orders the pairs, see blocked_pairs.
+
+    :param text: The message text, such as a rewritten group of error calls.
+    :param cleaned_call_types: The cleaned call types of the group, as returned by
+                               FunctionCallGroup.cleaned_call_types, if known.
+    :return: A hashable block key.
+    """
+    return emitted_template(text), tuple(cleaned_call_types) if cleaned_call_types else ()
+
+
+def blocked_pairs(block_keys: list, adjacent_blocks: Optional[list[tuple[str, str]]] = None) -> list[tuple[int, int]]:
+    """
+    This function lists the pairs of message indices to compare when the messages are split into blocks: every pair
+    of messages emitted through the same function template, and every pair across two templates configured as adjacent.
+    Groups with slightly different call patterns, such as a severe, continue and fatal group and a severe and fatal
+    group, are emitted through the same template and are exactly the near duplicates worth finding, so the call pattern
+    does not split a template.  It only orders the pairs, the pairs with the same call pattern coming first.
+
+    :param block_keys: The block key of each message, as returned by block_key.
+    :param adjacent_blocks: Pairs of emitted function templates whose blocks are also compared with each other, by
+                            default DEFAULT_ADJACENT_BLOCKS.
+    :return: A list of (first index, second index) pairs, with the first index less than the second.
+    """
+    if adjacent_blocks is None:
+        adjacent_blocks = DEFAULT_ADJACENT_BLOCKS
+    adjacent = {frozenset(a) for a in adjacent_blocks}
+    templates: dict = {}  # the message indices of each call pattern, for each emitted template
+    for i, key in enumerate(block_keys):
+        templates.setdefault(key[0], {}).setdefault(key, []).append(i)
+    pairs = []
+    template_members = {t: [i for members in blocks.values() for i in members] for t, blocks in templates.items()}
+    names = list(templates)
+    for name_num, name in enumerate(names):
+        blocks = list(templates[name].values())
+        for members in blocks:
+            pairs.extend((a, b) for n, a in enumerate(members) for b in members[n + 1:])
+        for block_num, members in enumerate(blocks):
+            for other_members in blocks[block_num + 1:]:
+                pairs.extend((min(a, b), max(a, b)) for a in members for b in other_members)
+        for other_name in names[name_num + 1:]:
+            if frozenset([name, other_name]) in adjacent:
+                pairs.extend(
+                    (min(a, b), max(a, b)) for a in template_members[name] for b in template_members[other_name]
+                )
+    return pairs
+
+
+def compare_messages(docs: list, block_keys: Optional[list] = None,
+                     adjacent_blocks: Optional[list[tuple[str, str]]] = None, pair_fraction: float = 1.0,
+                     seed: int = 0) -> set[tuple[str, str, float]]:
+    """
+    This function compares every document against every other document, returning the similarity of each unique pair.
+    The documents are expected to be SpaCy Doc instances (or anything else with a text attribute and a similarity
+    method), but this module intentionally does not import SpaCy itself.  If block keys are given, only the pairs
+    within an emitted template, or across adjacent templates, are compared, which skips the pairs that could never be
+    merged anyway.
+
+    :param docs: A list of processed documents to compare, one per message.
+    :param block_keys: An optional block key for each document, as returned by block_key.
+    :param adjacent_blocks: Pairs of emitted function templates whose blocks are also compared with each other, by
+                            default DEFAULT_ADJACENT_BLOCKS.
+    :param pair_fraction: The fraction of the pairs to compare, chosen at random, for quick estimates.
+    :param seed: The seed used to choose the pairs when only a fraction of them is compared.
+    :return: A set of (first text, second text, similarity score) tuples, one per compared pair of documents.
+    """
+    n = len(docs)
+    if block_keys is None:
+        pairs = ((i, j) for i in range(n) for j in range(i + 1, n))
+        expected_comparison_count = (n * n - n) / 2
+    else:
+        pairs = blocked_pairs(block_keys, adjacent_blocks)
+        expected_comparison_count = len(pairs)
+        logger.log(f"Blocking by emitted function leaves {len(pairs)} of {(n * n - n) // 2} pairs")
+    if pair_fraction < 1:
+        rng = Random(seed)
+        pairs = [p for p in pairs if rng.random() < pair_fraction]
+        expected_comparison_count = len(pairs)
+    compares = set()
+    counter = 0
+    start_time = time()
+    logger.log("About to determine text similarities between messages (usually ~20+ minutes)")
+    for i, j in pairs:
+        d1, d2 = docs[i], docs[j]
+        compares.add((d1.text, d2.text, d1.similarity(d2)))
+        counter += 1
+        if logger.progress_due():  # pragma: no cover
+            elapsed_time = time() - start_time
+            estimated_total_time = (elapsed_time / (counter + 1)) * expected_comparison_count
+            estimated_seconds_remaining = estimated_total_time - elapsed_time
+            estimated_time = f"Estimated time remaining: {estimated_seconds_remaining:.1f}s"
+            if estimated_seconds_remaining >= 60:
+                minutes = int(estimated_seconds_remaining // 60)
+                remaining_seconds = estimated_seconds_remaining % 60
+                estimated_time = f"Estimated time remaining: {minutes}m {remaining_seconds:.1f}s"
+            logger.progress_bar(counter, expected_comparison_count, estimated_time)
+    logger.progress_done()
+    return compares
+
+
+def write_comparisons(compares: set[tuple[str, str, float]], output_file: Path, max_count: int = 10000,
+                      counts: Optional[dict[str, int]] = None) -> None:
+    """
+    This function writes the most similar message pairs to a text file, most similar first.
+
+    :param compares: A set of (first text, second text, similarity score) tuples, as returned by compare_messages.
+    :param output_file: The output file path to write.
+    :param max_count: The maximum number of pairs to write to the file.
+    :param counts: An optional number of messages each compared text represents, such as the number of messages
+                   sharing its template, which is written after the score of each pair.
+    :return: None
+    """
+    with output_file.open('w') as f:
+        for i, compare in enumerate(sorted(compares, key=lambda x: x[2], reverse=True)):
+            if i > max_count:
+                break
+            if counts:
+                f.write(f"{compare[0]} 😊 {compare[1]} 😊 {compare[2]} 😊 {counts[compare[0]]} 😊 {counts[compare[1]]}\n")
+            else:
+                f.write(f"{compare[0]} 😊 {compare[1]} 😊 {compare[2]}\n")
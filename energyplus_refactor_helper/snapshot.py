@@ -0,0 +1,130 @@
+from array import array
+from gzip import BadGzipFile, open as gzip_open
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL, UnpicklingError, dump, load
+from typing import Optional
+
+from energyplus_refactor_helper import VERSION
+from energyplus_refactor_helper.call_table import CallTable
+from energyplus_refactor_helper.function_call import FunctionCall
+from energyplus_refactor_helper.function_call_group import FunctionCallGroup
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.timing import timer
+
+
+class AnalysisSnapshot:
+    FORMAT_VERSION = 3
+    FILE_NAME = 'analysis.snapshot'
+
+    def __init__(self, root: Path, functions: list[str], source_files: list[SourceFile],
+                 messages: Optional[dict[str, list[str]]] = None,
+                 call_patterns: Optional[dict[str, list[int]]] = None, scored: Optional[dict] = None):
+        """
+        The AnalysisSnapshot class holds everything a finished analysis produced, the parsed source files with all of
+        their function calls and groups, and optionally the rewritten message of each group, so that the reports and
+        similarity outputs can be generated again with different options without discovering or parsing the source tree.
+        Snapshots are compressed binary pickle files, and like any pickle, should only be loaded if they were written by
+        a trusted run.
+
+        :param root: The root directory the source files were found in.
+        :param functions: The list of function calls that were searched for.
+        :param source_files: The parsed source files, in the order they were analyzed.
+        :param messages: An optional dictionary of the rewritten message of each function call group, as a list per
+                         file, keyed by the path relative to the root, as listed in similarity_candidates.json.
+        :param call_patterns: An optional dictionary of the cleaned call types of the first group rewritten to each
+                              message, used to block the similarity comparisons.
+        :param scored: The optional scored message pairs of the run, as a dictionary of the 'settings' they were scored
+                       with and the scored 'pairs', so that the comparisons can be written again without scoring.
+        """
+        self.root = root
+        self.functions = functions
+        self.source_files = source_files
+        self.messages = messages if messages else {}
+        self.call_patterns = call_patterns if call_patterns else {}
+        self.scored = scored
+        self.source_folder = SourceFolder(root, functions)
+
+    def write(self, output_file: Path) -> None:
+        """
+        Writes this snapshot to a file.  Only what the reports need is stored: the status and the per-line
+        distributions of each file, packed into arrays, and the function calls of all the files as the columns of a
+        CallTable, along with the text of each call.  The text of the files themselves is left out, and the whole
+        snapshot is compressed, so it is much smaller than the source tree.
+
+        :param output_file: The output file path to write.
+        :return: None
+        """
+        files = []
+        for source_file in self.source_files:
+            files.append({
+                'path': source_file.path, 'budget': source_file.budget, 'status': source_file.status,
+                'status_reason': source_file.status_reason,
+                'function_distribution': array('H', source_file.function_distribution),
+                'advanced_function_distribution': array('H', source_file.advanced_function_distribution),
+            })
+        call_table = CallTable.from_source_files(self.source_files)
+        call_texts = [
+            '\n'.join(call.multiline_text) for source_file in self.source_files
+            for group in source_file.found_function_groups for call in group.function_calls
+        ]
+        content = {
+            'format_version': self.FORMAT_VERSION, 'package_version': VERSION, 'root': self.root,
+            'functions': self.functions, 'files': files, 'calls': call_table.arrays(), 'call_texts': call_texts,
+            'messages': self.messages, 'call_patterns': self.call_patterns, 'scored': self.scored,
+        }
+        with timer.phase('report.snapshot', len(files)), gzip_open(output_file, 'wb') as f:
+            dump(content, f, protocol=HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(snapshot_file: Path) -> 'AnalysisSnapshot':
+        """
+        Loads a snapshot written by AnalysisSnapshot.write.
+
+        :param snapshot_file: The snapshot file to load.
+        :return: The loaded snapshot, with its source files restored to regular SourceFile instances, holding their
+                 function calls, groups, and distributions, but not their text, so original_file_text is None.
+        """
+        with timer.phase('load_snapshot'), gzip_open(snapshot_file, 'rb') as f:
+            try:
+                content = load(f)
+            except (BadGzipFile, UnpicklingError, EOFError):
+                content = None
+            if not isinstance(content, dict) or content.get('format_version') != AnalysisSnapshot.FORMAT_VERSION:
+                raise ValueError(f"Unsupported analysis snapshot format in {snapshot_file}, run the analysis again")
+            functions = content['functions']
+            source_files = []
+            for state in content['files']:
+                source_file = SourceFile.__new__(SourceFile)  # restored from its state rather than parsed again
+                source_file.path = state['path']
+                source_file.functions = functions
+                source_file.budget = state['budget']
+                source_file.status = state['status']
+                source_file.status_reason = state['status_reason']
+                source_file.original_file_text = None
+                source_file.file_lines = []
+                source_file.found_functions = []
+                source_file.found_function_groups = []
+                source_file.function_distribution = state['function_distribution'].tolist()
+                source_file.advanced_function_distribution = state['advanced_function_distribution'].tolist()
+                source_files.append(source_file)
+            columns = content['calls']
+            last_group_id = -1
+            for i, text in enumerate(content['call_texts']):
+                lines = text.split('\n')
+                call = FunctionCall(
+                    columns['call_type'][i], functions[columns['call_type'][i]], columns['start_line'][i],
+                    columns['char_start'][i], columns['char_start_in_line'][i], lines[0]
+                )
+                for line in lines[1:]:
+                    call.add_to_multiline_text(line)
+                call.finalize(columns['char_end'][i], bool(columns['success'][i]))
+                source_file = source_files[columns['file_id'][i]]
+                source_file.found_functions.append(call)
+                if columns['group_id'][i] != last_group_id:
+                    source_file.found_function_groups.append(FunctionCallGroup())
+                    last_group_id = columns['group_id'][i]
+                source_file.found_function_groups[-1].add_function_call(call)
+        return AnalysisSnapshot(
+            content['root'], functions, source_files, content['messages'], content['call_patterns'], content['scored']
+        )
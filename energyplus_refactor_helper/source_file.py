@@ -1,29 +1,74 @@
+from difflib import unified_diff
 from pathlib import Path
-from typing import Optional
+from time import perf_counter
+from typing import Callable, Optional
 
+from energyplus_refactor_helper.edit_spans import EditPlan
+from energyplus_refactor_helper.file_budget import FileBudget
 from energyplus_refactor_helper.function_call_group import FunctionCallGroup
 from energyplus_refactor_helper.function_call import FunctionCall
+from energyplus_refactor_helper.git_revision import SOURCE_ENCODING, SOURCE_ERRORS, decode_source
+from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.timing import timer
 
 
 class SourceFile:
 
-    def __init__(self, path: Path, function_calls: list[str]):
+    def __init__(self, path: Path, function_calls: list[str], text: Optional[str] = None,
+                 budget: Optional[FileBudget] = None, size: Optional[int] = None):
         """
         This class represents a single source code file, processing it to find all matching function calls, and
         providing functionality to refactor them into a new form automatically.
 
         :param path: The Path instance pointing to this source file
         :param function_calls: The list of function calls currently being searched
+        :param text: The optional source code of this file, for when it has already been read from somewhere other
+                     than the path itself, such as a git revision.  If not provided, the text is read from the path.
+        :param budget: The optional limits on the work spent on this file.  If the file goes over the budget, it is
+                       skipped or only partially scanned, which is recorded in the status and status_reason attributes.
+                       A file over the byte limit is skipped before it is read, and then has no text or lines.
+        :param size: The size of the file in bytes as stored, such as on disk or as a git blob, which is checked
+                     against the byte limit of the budget.  If not provided, the size of the path on disk is used, or
+                     the size of the text, when it is given.
         """
         self.path = path
         self.functions = function_calls
-        self.original_file_text = self.path.read_text()
-        self.file_lines = self.original_file_text.split('\n')
-        self.found_functions = self.find_functions_in_original_text()
-        self.found_function_groups = self.get_function_call_groups()
+        self.budget = budget if budget else FileBudget()
+        self.status = FileBudget.COMPLETE
+        self.status_reason = ''
+        if self.budget.max_bytes is not None and size is None:
+            size = self.path.stat().st_size if text is None else len(text.encode())
+        if size is not None and self.budget.max_bytes is not None and size > self.budget.max_bytes:
+            self.mark_over_budget(FileBudget.SKIPPED, f"{size} bytes is over the limit of {self.budget.max_bytes}")
+            self.original_file_text = ''
+            self.file_lines = []
+        else:
+            self.original_file_text = decode_source(self.path.read_bytes()) if text is None else text
+            self.file_lines = self.original_file_text.split('\n')
+        with timer.phase('scan') as span:
+            if self.status == FileBudget.SKIPPED:
+                self.found_functions = []
+            else:
+                self.found_functions = self.find_functions_in_original_text()
+            span.items = len(self.found_functions)
+        with timer.phase('group') as span:
+            self.found_function_groups = self.get_function_call_groups()
+            span.items = len(self.found_function_groups)
         self.function_distribution = self.get_binary_function_distribution()
         self.advanced_function_distribution = self.get_advanced_function_distribution()
 
+    def mark_over_budget(self, status: str, reason: str) -> None:
+        """
+        Records that this file went over its budget, and logs why.
+
+        :param status: The new status of this file, either FileBudget.SKIPPED or FileBudget.PARTIAL.
+        :param reason: A short description of the limit that was reached.
+        :return: None
+        """
+        self.status = status
+        self.status_reason = reason
+        logger.log(f"File {self.path.name} is over budget and {status}: {reason}")
+
     @staticmethod
     def find_function_in_raw_line(functions: list[str], full_raw_line: str) -> tuple[Optional[int], int]:
         """
@@ -43,10 +88,16 @@ class SourceFile:
     def find_functions_in_original_text(self) -> list[FunctionCall]:
         """
         Processes the original source code for this file, identifying all function calls.
-        This function returns an array of FunctionCall objects for each function call processed.
+        This function returns an array of FunctionCall objects for each function call processed.  If the budget of
+        this file limits the number of calls or the scan time, the scan stops once either is reached, and this file is
+        marked as partial.
 
         :return: A list of FunctionCall instances, one for each function call processed.
         """
+        max_calls = self.budget.max_calls
+        deadline = None
+        if self.budget.max_parse_seconds is not None:
+            deadline = perf_counter() + self.budget.max_parse_seconds
         line_number = 1
         call: Optional[FunctionCall] = None
         parsing_multiline = False
@@ -54,6 +105,9 @@ class SourceFile:
         raw_line_end_char_index = -1
         found_functions = []
         while line_number <= len(self.file_lines):
+            if deadline is not None and line_number % 100 == 0 and perf_counter() > deadline:
+                self.mark_over_budget(FileBudget.PARTIAL, f"ran out of time at line {line_number}")
+                break
             raw_line = self.file_lines[line_number - 1]
             raw_line_end_char_index += len(raw_line) + 1  # includes the \n at the end of the line
             cleaned_line = raw_line
@@ -76,6 +130,9 @@ class SourceFile:
                     parsing_multiline = False
             else:
                 if any([f"{x}(" in cleaned_line for x in self.functions]):
+                    if max_calls is not None and len(found_functions) >= max_calls:
+                        self.mark_over_budget(FileBudget.PARTIAL, f"found more than the limit of {max_calls} calls")
+                        break
                     call_type, call_index_in_line = self.find_function_in_raw_line(self.functions, raw_line)
                     function_name = self.functions[call_type]
                     character_start_index = raw_line_start_char_index + call_index_in_line
@@ -127,10 +184,7 @@ class SourceFile:
 
         :return: Returns the modified source code as a Python string.
         """
-        new_text = self.original_file_text
-        for fc in reversed(self.found_functions):
-            new_text = new_text[:fc.char_start_in_file] + func_visitor(fc) + new_text[fc.char_end_in_file + 1:]
-        return new_text
+        return self.get_new_file_text_chained([(func_visitor, False)])
 
     def get_new_file_text_group_based(self, group_visitor) -> str:
         """
@@ -138,19 +192,78 @@ class SourceFile:
 
         :return: Returns the modified source code as a Python string.
         """
-        # TODO: Add a unit test that works on function call groups
         # TODO: Just create dummy RefactorBase-d test action classes that we use in all the unit tests
-        new_text = self.original_file_text
-        for fg in reversed(self.found_function_groups):
-            first = fg.function_calls[0]
-            last = fg.function_calls[-1]
-            new_text = new_text[:first.char_start_in_file] + group_visitor(fg) + new_text[last.char_end_in_file + 1:]
-        return new_text
+        return self.get_new_file_text_chained([(group_visitor, True)])
+
+    def get_new_file_text(self, visitor, operate_on_group: bool) -> str:
+        """
+        Modifies the original file text, replacing each function call, or each function call group, with the new
+        version as defined by the action instance itself.
+
+        :param visitor: A callable function that takes either a FunctionCall or a FunctionCallInstance and returns a
+                        string.  The type should depend on the group_flag argument.
+        :param operate_on_group: A flag indicating whether the action will operate on groups of function calls (if True)
+                                 or individual function calls (if False)
+        :return: Returns the modified source code as a Python string.
+        """
+        if operate_on_group:
+            return self.get_new_file_text_group_based(visitor)
+        return self.get_new_file_text_function_based(visitor)
+
+    def get_edit_plan(self, visitors: list[tuple[Callable, bool]]) -> EditPlan:
+        """
+        Collects the edits of several visitors to this file, all against the calls and offsets of the original text,
+        without building any new text yet.
+
+        :param visitors: A list of (visitor, operate_on_group) tuples, as the arguments of get_new_file_text.  Each
+                         visitor can return None for the calls or groups it leaves unchanged.
+        :return: An EditPlan holding the edits of all the visitors.
+        """
+        plan = EditPlan(self.original_file_text)
+        for visitor, operate_on_group in visitors:
+            label = getattr(visitor, '__name__', type(visitor).__name__)
+            if operate_on_group:
+                plan.add_function_call_groups(self.found_function_groups, visitor, label)
+            else:
+                plan.add_function_calls(self.found_functions, visitor, label)
+        return plan
+
+    def get_new_file_text_chained(self, visitors: list[tuple[Callable, bool]]) -> str:
+        """
+        Modifies the original file text with the edits of several visitors at once, so that chained refactors do not
+        need to write and parse the file again between each other.  Edits of different visitors that overlap raise a
+        ValueError, unless they are identical.
+
+        :param visitors: A list of (visitor, operate_on_group) tuples, as the arguments of get_new_file_text.  Each
+                         visitor can return None for the calls or groups it leaves unchanged.
+        :return: Returns the modified source code as a Python string.
+        """
+        return self.get_edit_plan(visitors).apply()
+
+    def unified_diff(self, new_text: str, relative_path: str) -> str:
+        """
+        Builds a unified diff from the original file text to a modified version, in the form git writes, so that it can
+        be applied with git apply or patch -p1.
+
+        :param new_text: The modified source code, such as returned by get_new_file_text.
+        :param relative_path: The path of this file relative to the root of the repository, using forward slashes.
+        :return: The diff as a string, which is empty if the text did not change.
+        """
+        diff_lines = []
+        for line in unified_diff(
+            self.original_file_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+            f"a/{relative_path}", f"b/{relative_path}"
+        ):
+            if line.endswith('\n'):
+                diff_lines.append(line)
+            else:  # the last line of a file without a trailing new line
+                diff_lines.append(line + '\n\\ No newline at end of file\n')
+        return ''.join(diff_lines)
 
     def write_new_text_to_file(self, visitor, operate_on_group: bool) -> None:
         """
         Overwrites existing file contents with the modified version, replacing each function call with the new version
-        as defined by the action instance itself.
+        as defined by the action instance itself.  A file skipped for its size was never read, and is left untouched.
 
         :param visitor: A callable function that takes either a FunctionCall or a FunctionCallInstance and returns a
                         string.  The type should depend on the group_flag argument.
@@ -158,10 +271,19 @@ class SourceFile:
                                  or individual function calls (if False)
         :return: None
         """
-        if operate_on_group:
-            self.path.write_text(self.get_new_file_text_group_based(visitor))
-        else:
-            self.path.write_text(self.get_new_file_text_function_based(visitor))
+        self.write_chained_text_to_file([(visitor, operate_on_group)])
+
+    def write_chained_text_to_file(self, visitors: list[tuple[Callable, bool]]) -> None:
+        """
+        Overwrites existing file contents once with the edits of several visitors, as built by
+        get_new_file_text_chained.  A file skipped for its size was never read, and is left untouched.
+
+        :param visitors: A list of (visitor, operate_on_group) tuples, as the arguments of get_new_file_text.
+        :return: None
+        """
+        if self.status == FileBudget.SKIPPED:
+            return
+        self.path.write_text(self.get_new_file_text_chained(visitors), SOURCE_ENCODING, SOURCE_ERRORS)
 
     def get_function_call_groups(self) -> list[FunctionCallGroup]:
         """
@@ -1,53 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from functools import partial
+from csv import reader, writer
 from itertools import zip_longest
-from json import dumps
+from json import dump, dumps, load, loads
 
-import matplotlib.pyplot
-import matplotlib.pyplot as plt
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
+from energyplus_refactor_helper.call_table import CallTable
+from energyplus_refactor_helper.file_budget import FileBudget
+from energyplus_refactor_helper.git_revision import SOURCE_ENCODING, SOURCE_ERRORS, GitRevision, WorkingTree
 from energyplus_refactor_helper.logger import logger
+from energyplus_refactor_helper.prefetch import prefetch_sources, read_source
+from energyplus_refactor_helper.report_output import (
+    SOURCE_REPORT_NAMES, expand_line_ranges, find_report, line_ranges, open_report, report_file_name
+)
+from energyplus_refactor_helper.sampling import FileSample, estimate_proportion
 from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.timing import timer
 
 
 class SourceFolder:
-    def __init__(self, root: Path, functions: list[str]):
+    def __init__(self, root: Path, functions: list[str], revision: Optional[GitRevision | WorkingTree] = None,
+                 blob_cache: Optional[dict[str, SourceFile]] = None, budget: Optional[FileBudget] = None,
+                 read_ahead: int = 8):
         """
         The SourceFolder class represents a folder that is to be analyzed during this refactor.  The SourceFolder is
         aware of all settings and will recursively search for matching functions and analyze/edit as needed.
 
         :param root: The root directory to search for this pass.
         :param functions: A list of function calls to search for in the source files.
+        :param revision: An optional git revision to read the files from, instead of from the files on disk.  A
+                         WorkingTree may also be given, to key the files on disk by content like a git revision.
+        :param blob_cache: An optional dictionary of parsed files keyed by blob SHA, which can be shared between the
+                           SourceFolder instances of several revisions so unchanged files are only parsed once.
+        :param budget: Optional limits on the work spent on each source file, see FileBudget.
+        :param read_ahead: The number of files on disk to read ahead of the parser on background threads, so reads
+                           overlap with parsing on slow storage, or 0 to read each file only when it is parsed.
         """
         self.success = True  # assume success
         self.root = root
         self.function_call_list = functions
+        self.revision = revision
+        self.blob_cache = {} if blob_cache is None else blob_cache
+        self.file_shas: dict[Path, str] = {}  # blob SHA of each file analyzed from a revision
+        self.budget = budget
+        self.read_ahead = read_ahead
+        self.call_table = CallTable()  # the calls of the files of the last analyze_source_files, as columns
         # make sure to update self.success if something goes wrong
 
-    def find_files(self, ignore: Optional[list[str]] = None, match_patterns: Optional[list[str]] = None) -> list[Path]:
+    def find_files(self, ignore: Optional[list[str]] = None, match_patterns: Optional[list[str]] = None,
+                   quiet: bool = False) -> list[Path]:
         """
         A small worker function to locate source files inside the source directory.
 
         :param ignore: A list of file names to ignore when looking for source files to analyze.
         :param match_patterns: A list of match patterns for filenames, which will match using glob functionality.
+        :param quiet: A flag for whether to skip logging each ignored file, for callers which look for files repeatedly.
         :return: A list of absolute paths to source files found during the search.
         """
         if ignore is None:
             ignore = []
         if match_patterns is None:
             match_patterns = ["*.cc", "*.cpp"]  # could include *.hh
-        all_files = []
-        for pattern in match_patterns:
-            files_matching = self.root.glob(f"**/{pattern}")
-            all_files.extend(list(files_matching))
-        files_to_keep = []
-        for file in all_files:
-            if file.name in ignore:
-                logger.log(f"Encountered ignored file: {file.name}; skipping")
-                continue
-            files_to_keep.append(file)
+        with timer.phase('discover') as span:
+            all_files = []
+            for pattern in match_patterns:
+                if self.revision:
+                    files_matching = [
+                        f for f in self.revision.files if f.is_relative_to(self.root) and f.match(pattern)
+                    ]
+                else:
+                    files_matching = self.root.glob(f"**/{pattern}")
+                all_files.extend(list(files_matching))
+            files_to_keep = []
+            for file in all_files:
+                if file.name in ignore:
+                    if not quiet:
+                        logger.log(f"Encountered ignored file: {file.name}; skipping")
+                    continue
+                files_to_keep.append(file)
+            span.items = len(files_to_keep)
         return files_to_keep
 
+    def shard_files(self, files: list[Path], shard_index: int, shard_count: int) -> list[Path]:
+        """
+        This function deterministically partitions a list of located source files and returns only the files belonging
+        to one shard.  The files are ordered by their path relative to the root, so every host computes the same
+        partition regardless of where the repository is checked out, and then dealt out round-robin across shards.
+
+        :param files: A list of source file paths, as returned from find_files.
+        :param shard_index: The 1-based index of the shard to return, from 1 to shard_count.
+        :param shard_count: The total number of shards the files are split across.
+        :return: A list of paths to source files which belong to the requested shard.
+        """
+        if shard_count < 1 or not 1 <= shard_index <= shard_count:
+            raise ValueError(f"Invalid shard {shard_index}/{shard_count}; shard index must be from 1 to shard count")
+        ordered_files = sorted(files, key=lambda f: f.relative_to(self.root).parts)
+        return ordered_files[shard_index - 1::shard_count]
+
+    def sample_files(self, files: list[Path], fraction: float, seed: int = 0) -> FileSample:
+        """
+        This function draws a reproducible random sample of the located source files, for quick estimates.  The files
+        are ordered by their path relative to the root, like shard_files, and when they are on disk they are stratified
+        by size, so the sample does not depend on where the repository is checked out.
+
+        :param files: A list of source file paths, as returned from find_files.
+        :param fraction: The fraction of the files to sample, greater than 0 and up to 1.
+        :param seed: The seed of the random sample.
+        :return: A FileSample, whose files attribute lists the sampled files.
+        """
+        ordered_files = sorted(files, key=lambda f: f.relative_to(self.root).parts)
+        sizes = None if self.revision else {f: f.stat().st_size for f in ordered_files}
+        return FileSample(ordered_files, fraction, seed, sizes)
+
     def analyze_source_files(self, matched_files: list[Path]) -> list[SourceFile]:
         """
         An internal worker function that processes all located source files and creates a list of SourceFile instances
@@ -58,12 +125,87 @@ class SourceFolder:
         """
         logger.log("Processing files to identify function calls (usually ~15 seconds)")
         processed_files = []
-        for file_num, source_file in enumerate(sorted(matched_files)):
-            processed_files.append(SourceFile(source_file, self.function_call_list))
-            logger.terminal_progress_bar(file_num + 1, len(matched_files), source_file.name)
-        logger.terminal_progress_done()
+        self.call_table = CallTable()
+        with timer.phase('parse', len(matched_files)):
+            for file_num, source_file in enumerate(self.iter_source_files(matched_files)):
+                processed_files.append(source_file)
+                self.call_table.add_file(source_file)
+                logger.progress_bar(file_num + 1, len(matched_files), source_file.path.name)
+            logger.progress_done()
         return processed_files
 
+    def get_call_table(self, processed_files: list[SourceFile]) -> CallTable:
+        """
+        Returns the CallTable of the given files.  This is the table filled by analyze_source_files when it was filled
+        from these same files, as in a normal run, and is otherwise built from the files, such as for files restored
+        from a snapshot or parsed by iter_source_files, and kept for the next call.
+
+        :param processed_files: A list of SourceFile instances, such as built by calling analyze_source_files
+        :return: The CallTable holding every call of the files.
+        """
+        if not self.call_table.matches(processed_files):
+            self.call_table = CallTable.from_source_files(processed_files)
+        return self.call_table
+
+    def iter_source_files(self, matched_files: list[Path]) -> Iterator[SourceFile]:
+        """
+        A generator that parses the located source files one at a time, in the same sorted order as
+        analyze_source_files, without logging progress.  This is useful when embedding the analysis in another program,
+        which can then consume each file as soon as it is parsed, and drop it once it is no longer needed.  Files on
+        disk are read ahead of the parser, see prefetch_sources, while files of a git revision are already streamed
+        from a single git process.  Files over the byte limit of the budget are never read.
+
+        :param matched_files: A list of Path instances to all matched source files to be processed here
+        :return: An iterator of SourceFile instances which have been parsed for function calls.
+        """
+        if self.revision:
+            for source_file in sorted(matched_files):
+                yield self.analyze_revision_file(source_file)
+        else:
+            for source_file, (text, size) in prefetch_sources(
+                sorted(matched_files), self.read_ahead, self.read_within_budget
+            ):
+                yield SourceFile(source_file, self.function_call_list, text, self.budget, size)
+
+    def read_within_budget(self, path: Path) -> tuple[Optional[str], Optional[int]]:
+        """
+        Reads one source file, from disk or from the git revision, unless it is over the byte limit of the budget.  The
+        size is taken from the file on disk or the git blob before reading, so it does not depend on how the file is
+        read, and is only looked up when there is a byte limit.
+
+        :param path: The path of the file to read.
+        :return: A tuple of the text of the file, or None if it is over the byte limit, and the size of the file, or
+                 None if there is no byte limit.
+        """
+        size = None
+        if self.budget is not None and self.budget.max_bytes is not None:
+            size = self.revision.blob_size(path) if self.revision else path.stat().st_size
+            if size > self.budget.max_bytes:
+                return None, size
+        return (self.revision.read_text(path) if self.revision else read_source(path)), size
+
+    def analyze_revision_file(self, path: Path, sha: Optional[str] = None) -> SourceFile:
+        """
+        A worker function that creates a SourceFile instance for one file of the git revision.  Each distinct blob is
+        only parsed once; a file whose content was already parsed, whether at another path or in another revision
+        sharing the same blob cache, reuses the parsed function calls.
+
+        :param path: The path of the file, as listed in the revision.
+        :param sha: The blob SHA of the file, if it was already looked up, which for a checkout means reading the file.
+        :return: A SourceFile instance which has been parsed for function calls.
+        """
+        if sha is None:
+            sha = self.revision.blob_sha(path)
+        self.file_shas[path] = sha
+        if sha in self.blob_cache:
+            source_file = copy(self.blob_cache[sha])
+            source_file.path = path
+            return source_file
+        text, size = self.read_within_budget(path)
+        source_file = SourceFile(path, self.function_call_list, text, self.budget, size)
+        self.blob_cache[sha] = source_file
+        return source_file
+
     @staticmethod
     def rewrite_files_in_place(processed_files: list[SourceFile], visitor, operate_on_group: bool) -> None:
         """
@@ -77,32 +219,254 @@ class SourceFolder:
                                  or individual function calls (if False)
         :return: None
         """
+        SourceFolder.rewrite_files_in_place_chained(processed_files, [(visitor, operate_on_group)])
+
+    @staticmethod
+    def rewrite_files_in_place_chained(processed_files: list[SourceFile],
+                                       visitors: list[tuple[Callable, bool]]) -> None:
+        """
+        This function applies several refactors to all processed files at once, overwriting the contents of each file
+        a single time with the combined edits of all the visitors, as built by SourceFile.get_new_file_text_chained.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param visitors: A list of (visitor, operate_on_group) tuples, each as the arguments of rewrite_files_in_place.
+                         Each visitor can return None for the calls or groups it leaves unchanged.
+        :return: None
+        """
         logger.log("Now fixing up files in place with new function calls")
         num_files = len(processed_files)
-        for file_num, s in enumerate(processed_files):
-            s.write_new_text_to_file(visitor, operate_on_group)  # rewrite the file contents
-            logger.terminal_progress_bar(file_num + 1, num_files, s.path.name)
-        logger.terminal_progress_done()
+        with timer.phase('rewrite', num_files):
+            for file_num, s in enumerate(processed_files):
+                s.write_chained_text_to_file(visitors)  # rewrite the file contents
+                logger.progress_bar(file_num + 1, num_files, s.path.name)
+            logger.progress_done()
 
-    def generate_reports(self, processed_files: list[SourceFile], output_dir: Path, skip_plots: bool) -> None:
+    @staticmethod
+    def write_rewrite_patch(processed_files: list[SourceFile], visitor, operate_on_group: bool, repo_root: Path,
+                            output_file: Path) -> int:
+        """
+        This function is the dry-run counterpart of rewrite_files_in_place.  Rather than overwriting the files, the new
+        text of each file is built in memory and the changes are written as a single unified diff, with paths relative
+        to the repository root, so the patch can be reviewed and then applied with git apply.  The files are built one
+        after the other, as a visitor may share state that is not safe to use from several threads, such as a language
+        model, and only the files that actually change are diffed.  A visitor whose texts were already computed, such as
+        during the analysis, can simply look them up, so the patch costs no more than building the text.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param visitor: A callable function that takes either a FunctionCall or a FunctionCallInstance and returns a
+                        string.  The type should depend on the group_flag argument.
+        :param operate_on_group: A flag indicating whether the action will operate on groups of function calls (if True)
+                                 or individual function calls (if False)
+        :param repo_root: The root of the repository, which the paths in the patch are relative to.
+        :param output_file: The patch file path to write.
+        :return: The number of files changed in the patch.
+        """
+        logger.log("Building the changes to each file and writing them to a patch")
+        num_files = len(processed_files)
+        changed_count = 0
+        with timer.phase('rewrite_patch', num_files):
+            with output_file.open('w', encoding=SOURCE_ENCODING, errors=SOURCE_ERRORS, newline='') as f:
+                for file_num, source_file in enumerate(processed_files):
+                    new_text = source_file.get_new_file_text(visitor, operate_on_group)
+                    if new_text != source_file.original_file_text:
+                        f.write(source_file.unified_diff(new_text, source_file.path.relative_to(repo_root).as_posix()))
+                        changed_count += 1
+                    logger.progress_bar(file_num + 1, num_files, source_file.path.name)
+                logger.progress_done()
+        logger.log(f"Wrote changes to {changed_count} files to {output_file}")
+        return changed_count
+
+    def generate_reports(self, processed_files: list[SourceFile], output_dir: Path, skip_plots: bool,
+                         compression: Optional[str] = None, sparse_lines: bool = False,
+                         only: Optional[list[str]] = None, results_page_size: Optional[int] = None) -> list[str]:
         """
         This function will generate all output files for this analysis, and drop them all into the specified output
         directory.  The output files will grow over time, and may be dependent on input arguments later.  For now the
         list includes a JSON summary, a file summary CSV, a line-by-line summary CSV, and a
-        difficult-to-read-but-maybe-interesting plot showing the function distribution in each file.
+        difficult-to-read-but-maybe-interesting plot showing the function distribution in each file.  The reports are
+        independent of each other, so they are generated concurrently on a thread pool, and the whole set takes about
+        as long as the slowest report.  A report that fails is logged and marks this folder as unsuccessful, but does
+        not stop the other reports.  The large text reports can be compressed as they are written, and the line-by-line
+        summary can be replaced by its much smaller sparse form, which only lists the ranges of matched lines.  The
+        summaries over all the calls are computed from the columns of the CallTable filled during the analysis.
 
         :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
         :param output_dir: The output directory to write the outputs.  It will be created if it doesn't exist.
         :param skip_plots: A flag for whether we are skipping plot generation, which can be time-consuming
+        :param compression: An optional compression for the text reports, gzip or zstd, which appends .gz or .zst to
+                            the report file names.
+        :param sparse_lines: A flag for whether to write the sparse lines_ranges.csv instead of lines_summary.csv.
+        :param only: An optional list of the uncompressed file names of the reports to generate, such as
+                     ['results.json', 'distribution_plot.png'], which overrides the skip_plots and sparse_lines flags.
+        :param results_page_size: An optional number of source files per chunk of the paged results, which are only
+                                  written if this is given, or if they are listed in only, with one file per chunk.
+        :return: A list of the file names of any reports that failed, empty if all reports were generated.
+        """
+        if not output_dir.exists():
+            output_dir.mkdir()
+        num_files = len(processed_files)
+        call_table = self.get_call_table(processed_files)
+        if only is None:
+            only = [
+                'results.json', 'file_summary.csv', 'lines_ranges.csv' if sparse_lines else 'lines_summary.csv',
+                'call_statistics.json'
+            ]
+            if not skip_plots:
+                only.append('distribution_plot.png')
+            if results_page_size:
+                only.append('results_pages')
+        all_reports = [
+            ('report.results_json', self.generate_json_outputs, report_file_name('results.json', compression)),
+            ('report.file_summary_csv', partial(self.generate_file_summary_csv, call_table=call_table),
+             report_file_name('file_summary.csv', compression)),
+            ('report.lines_summary_csv', self.generate_line_details_csv,
+             report_file_name('lines_summary.csv', compression)),
+            ('report.lines_ranges_csv', self.generate_line_ranges_csv,
+             report_file_name('lines_ranges.csv', compression)),
+            ('report.distribution_plot', self.generate_line_details_plot, 'distribution_plot.png'),
+            ('report.results_pages',
+             partial(self.generate_json_pages, page_size=results_page_size or 1, compression=compression),
+             'results_pages'),
+            ('report.call_statistics', partial(self.generate_call_statistics, call_table=call_table),
+             report_file_name('call_statistics.json', compression)),
+        ]
+        reports = [r for r, name in zip(all_reports, SOURCE_REPORT_NAMES) if name in only]
+
+        def generate_report(phase_name: str, generator, file_name: str) -> None:
+            with timer.phase(phase_name, num_files):
+                generator(processed_files, output_dir / file_name)
+
+        failed_reports = []
+        with ThreadPoolExecutor(max_workers=max(1, len(reports))) as executor:
+            futures = [(r[2], executor.submit(generate_report, *r)) for r in reports]
+            for file_name, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.log(f"Could not generate report {file_name}: {e}")
+                    failed_reports.append(file_name)
+        if failed_reports:
+            self.success = False
+        return failed_reports
+
+    def generate_shard_manifest(self, processed_files: list[SourceFile], output_file: Path,
+                                shard: tuple[int, int]) -> None:
+        """
+        This function writes a small manifest describing the partial results of a sharded run.  The manifest records
+        the shard itself, along with the relative path of each processed file in the same order the files appear in the
+        other report outputs, which is exactly what merge_shard_reports needs to interleave the shards again.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param output_file: The output file path to write.
+        :param shard: The (shard_index, shard_count) tuple describing this shard.
         :return: None
         """
+        files = [s.path.relative_to(self.root).as_posix() for s in processed_files]
+        output_file.write_text(dumps({'shard': list(shard), 'files': files}, indent=2))
+
+    def generate_sample_summary(self, processed_files: list[SourceFile], sample: FileSample, output_file: Path,
+                                compares: Optional[set[tuple[str, str, float]]] = None,
+                                near_duplicate_score: float = 0.9) -> dict:
+        """
+        This function writes the summary of a sampled run, extrapolating the counts of calls, groups, and calls which
+        could not be parsed from the sampled files to the whole tree, each with a 95% confidence interval.  If message
+        pairs were also sampled and scored, the fraction of the scored pairs that are near duplicates is estimated as
+        well.  The scored pairs are only pairs of template representatives, one message per template, within the same
+        block, so this is a rate over representative pairs within blocks, not over all message pairs: messages sharing a
+        template, which are exact duplicates up to their arguments, are never paired, and pairs across blocks are never
+        scored.
+
+        :param processed_files: A list of SourceFile instances built from the files of the sample.
+        :param sample: The FileSample the files were drawn from.
+        :param output_file: The output file path to write.
+        :param compares: The scored message pairs of the sample, as returned by compare_messages, if any.
+        :param near_duplicate_score: The similarity score above which a pair of messages is a near duplicate.
+        :return: The summary, as written to the output file.
+        """
+        call_table = self.get_call_table(processed_files)
+        good, bad = call_table.calls_per_file()
+        counts = {
+            'calls': dict(zip(call_table.files, (good + bad).tolist())),
+            'groups': dict(zip(call_table.files, call_table.groups_per_file().tolist())),
+            'failed_calls': dict(zip(call_table.files, bad.tolist())),
+        }
+        summary = {
+            'fraction': sample.fraction,
+            'seed': sample.seed,
+            'sampled_files': len(sample.files),
+            'total_files': sample.total_file_count,
+            'estimates': {name: sample.estimate_total(values) for name, values in counts.items()},
+        }
+        if compares is not None:
+            near_duplicates = len([c for c in compares if c[2] > near_duplicate_score])
+            summary['sampled_pairs'] = len(compares)
+            summary['estimates']['representative_near_duplicate_rate'] = estimate_proportion(
+                near_duplicates, len(compares)
+            )
+        output_file.write_text(dumps(summary, indent=2))
+        return summary
+
+    @staticmethod
+    def merge_shard_reports(shard_dirs: list[Path], output_dir: Path, compression: Optional[str] = None) -> list[str]:
+        """
+        This function combines the partial reports written by a set of sharded runs into the same JSON summary, file
+        summary CSV, and line-by-line summary CSV that a single run over all the files would produce.  Each shard
+        directory must contain a shard manifest, written by generate_shard_manifest, alongside the reports, which may be
+        compressed.  If the shards wrote the sparse line ranges rather than the line-by-line summary, so does the merge.
+
+        :param shard_dirs: A list of output directories from the individual shard runs.
+        :param output_dir: The output directory to write the merged outputs.  It will be created if it doesn't exist.
+        :param compression: An optional compression for the merged reports, gzip or zstd.
+        :return: The relative paths of all files in the merged reports, in the order they appear in the reports.
+        """
+        shard_ids = []
+        entries = []
+        sparse_lines = False
+        for shard_dir in shard_dirs:
+            manifest = loads((shard_dir / 'shard.json').read_text())
+            shard_ids.append(tuple(manifest['shard']))
+            with open_report(find_report(shard_dir, 'results.json')) as f:
+                json_content = load(f)
+            with open_report(find_report(shard_dir, 'file_summary.csv')) as f:
+                summary_rows = list(reader(f))[1:]
+            lines_file = find_report(shard_dir, 'lines_summary.csv')
+            sparse_lines = lines_file is None
+            if sparse_lines:
+                with open_report(find_report(shard_dir, 'lines_ranges.csv')) as f:
+                    line_columns = [[r[0], *expand_line_ranges(int(r[1]), r[2])] for r in list(reader(f))[1:]]
+            else:
+                with open_report(lines_file) as f:
+                    line_columns = [list(c) for c in zip(*reader(f))]
+            for file_num, relative_path in enumerate(manifest['files']):
+                column = line_columns[file_num]
+                while column and column[-1] == '':  # strip the padding added to the shorter columns
+                    column.pop()
+                name = relative_path.split('/')[-1]
+                entries.append((relative_path, name, json_content[name], summary_rows[file_num], column))
+        shard_count = shard_ids[0][1] if shard_ids else 0
+        if sorted(shard_ids) != [(i + 1, shard_count) for i in range(shard_count)]:
+            raise ValueError(f"Shard directories do not form one complete set of shards: {sorted(shard_ids)}")
+        entries.sort(key=lambda e: e[0].split('/'))
         if not output_dir.exists():
             output_dir.mkdir()
-        self.generate_json_outputs(processed_files, output_dir / 'results.json')
-        self.generate_file_summary_csv(processed_files, output_dir / 'file_summary.csv')
-        self.generate_line_details_csv(processed_files, output_dir / 'lines_summary.csv')
-        if not skip_plots:
-            self.generate_line_details_plot(processed_files, output_dir / 'distribution_plot.png')
+        full_json_content = {}
+        for _, name, groups, _, _ in entries:
+            full_json_content[name] = groups
+        with open_report(output_dir / report_file_name('results.json', compression), 'w') as f:
+            dump(full_json_content, f, indent=2)
+        with open_report(output_dir / report_file_name('file_summary.csv', compression), 'w') as f:
+            csv_writer = writer(f, lineterminator='\n')
+            csv_writer.writerow(['File', 'Good', 'Bad', 'Status'])
+            csv_writer.writerows([e[3] for e in entries])
+        if sparse_lines:
+            SourceFolder.write_line_ranges_csv(
+                [e[4] for e in entries], output_dir / report_file_name('lines_ranges.csv', compression)
+            )
+        else:
+            SourceFolder.write_line_details_csv(
+                [e[4] for e in entries], output_dir / report_file_name('lines_summary.csv', compression)
+            )
+        return [e[0] for e in entries]
 
     @staticmethod
     def generate_json_outputs(processed_files: list[SourceFile], output_json_file: Path) -> None:
@@ -120,27 +484,96 @@ class SourceFolder:
         full_json_content = {}
         for file_num, source_file in enumerate(processed_files):
             full_json_content[source_file.path.name] = [g.to_json() for g in source_file.get_function_call_groups()]
-            logger.terminal_progress_bar(file_num + 1, len(processed_files), source_file.path.name)
-        logger.terminal_progress_done()
-        output_json_file.write_text(dumps(full_json_content, indent=2))
+            logger.progress_bar(file_num + 1, len(processed_files), source_file.path.name)
+        logger.progress_done()
+        with open_report(output_json_file, 'w') as f:
+            dump(full_json_content, f, indent=2)
+
+    def generate_json_pages(self, processed_files: list[SourceFile], output_folder: Path, page_size: int = 1,
+                            compression: Optional[str] = None) -> None:
+        """
+        This function writes the same function call groups as the JSON summary, but split into small chunks of a few
+        source files each, along with a compact index, so that a viewer can load the index and then only the chunks it
+        displays, rather than the whole JSON summary.  The index maps the path of each file, relative to the root, to
+        its chunk and its numbers of calls and groups.  The chunks are independent, so they are written concurrently.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param output_folder: The folder to write the index.json file and the numbered chunk files into.
+        :param page_size: The number of source files in each chunk.
+        :param compression: An optional compression for the index and chunk files, gzip or zstd.
+        :return: None
+        """
+        output_folder.mkdir(parents=True, exist_ok=True)
+        pages = [processed_files[i:i + page_size] for i in range(0, len(processed_files), page_size)]
+        chunk_names = [report_file_name(f"{page_num:05d}.json", compression) for page_num in range(len(pages))]
+        index = {'page_size': page_size, 'chunks': chunk_names, 'files': {}}
+        for chunk_name, page in zip(chunk_names, pages):
+            for source_file in page:
+                index['files'][source_file.path.relative_to(self.root).as_posix()] = {
+                    'chunk': chunk_name, 'calls': len(source_file.found_functions),
+                    'groups': len(source_file.found_function_groups), 'status': source_file.status,
+                }
+
+        def write_chunk(chunk_name: str, page: list[SourceFile]) -> None:
+            content = {
+                s.path.relative_to(self.root).as_posix(): [g.to_json() for g in s.found_function_groups] for s in page
+            }
+            with open_report(output_folder / chunk_name, 'w') as f:
+                dump(content, f)
+
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(write_chunk, chunk_names, pages))
+        with open_report(output_folder / report_file_name('index.json', compression), 'w') as f:
+            dump(index, f)
 
     @staticmethod
-    def generate_file_summary_csv(processed_files: list[SourceFile], output_csv_file: Path) -> None:
+    def generate_file_summary_csv(processed_files: list[SourceFile], output_csv_file: Path,
+                                  call_table: Optional[CallTable] = None) -> None:
         """
         This function generates a file-by-file summary of how many function calls were parsed in each file.  Each row
-        is a different file, with the number of successful function call parses and the number of failed parses.  This
-        file is primarily a debugging aid, but could be useful for understanding how many function calls are in each.
+        is a different file, with the number of successful function call parses and the number of failed parses, along
+        with whether the file was completely analyzed, or skipped or only partially analyzed for going over its budget.
+        This file is primarily a debugging aid, but could be useful for understanding how many function calls are in
+        each.
 
         :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
         :param output_csv_file: The output file path to write.
+        :param call_table: The CallTable of the processed files, which is built from them if not given.
+        :return: None
+        """
+        if call_table is None:
+            call_table = CallTable.from_source_files(processed_files)
+        good, bad = call_table.calls_per_file()
+        with open_report(output_csv_file, 'w') as f:
+            csv_writer = writer(f, lineterminator='\n')
+            csv_writer.writerow(['File', 'Good', 'Bad', 'Status'])
+            csv_writer.writerows(zip(call_table.files, good.tolist(), bad.tolist(), call_table.statuses))
+
+    def generate_call_statistics(self, processed_files: list[SourceFile], output_json_file: Path,
+                                 call_table: Optional[CallTable] = None) -> None:
+        """
+        This function generates repository-wide statistics of the function calls, computed from the columns of the call
+        table: the number of calls of each function, how many calls span each number of lines, how many groups hold
+        each number of calls, and the number of calls which appear to have failed to parse in each directory.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param output_json_file: The output file path to write.
+        :param call_table: The CallTable of the processed files, which is built from them if not given.
         :return: None
         """
-        s = "File,Good,Bad\n"
-        for result in processed_files:
-            good = sum([1 if fe.appears_successful else 0 for fe in result.found_functions])
-            bad = sum([0 if fe.appears_successful else 1 for fe in result.found_functions])
-            s += f"{result.path},{good},{bad}\n"
-        output_csv_file.write_text(s)
+        if call_table is None:
+            call_table = CallTable.from_source_files(processed_files)
+        statistics = {
+            'files': len(call_table.files),
+            'calls': len(call_table),
+            'groups': call_table.group_count,
+            'calls_per_function': call_table.calls_per_type(self.function_call_list),
+            'calls_per_line_count': call_table.line_count_histogram(),
+            'groups_per_call_count': call_table.group_size_histogram(),
+            'failed_calls_per_directory': call_table.failures_per_directory(self.root),
+        }
+        with open_report(output_json_file, 'w') as f:
+            dump(statistics, f, indent=2)
 
     @staticmethod
     def generate_line_details_csv(processed_files: list[SourceFile], output_csv_file: Path) -> None:
@@ -156,9 +589,52 @@ class SourceFolder:
         :return: None
         """
         all_lists = [[x.path.name, *x.function_distribution] for x in processed_files]
-        zipped_lists = zip_longest(*all_lists, fillvalue='')
-        csv_string = ''.join([",".join(map(str, row)) + "\n" for row in zipped_lists])
-        output_csv_file.write_text(csv_string)
+        SourceFolder.write_line_details_csv(all_lists, output_csv_file)
+
+    @staticmethod
+    def write_line_details_csv(all_lists: list[list], output_csv_file: Path) -> None:
+        """
+        This function writes the line-by-line summary CSV from a list of columns, where each column starts with the
+        file name, followed by one value per line of that file.  Shorter columns are padded with empty values.
+
+        :param all_lists: A list of columns, one per file, to be written side by side.
+        :param output_csv_file: The output file path to write.
+        :return: None
+        """
+        with open_report(output_csv_file, 'w') as f:
+            for row in zip_longest(*all_lists, fillvalue=''):
+                f.write(",".join(map(str, row)) + "\n")
+
+    @staticmethod
+    def generate_line_ranges_csv(processed_files: list[SourceFile], output_csv_file: Path) -> None:
+        """
+        This function generates the sparse form of the line-by-line summary.  Rather than one value for every line of
+        every file, each row is a different file, with its number of lines, and the run-length ranges of the lines which
+        contain a matched function call, such as "12-14 30" for lines 12 through 14 and line 30.  Most lines of most
+        files do not contain a call, so this is far smaller than the full line-by-line summary, and holds the same data.
+
+        :param processed_files: A list of SourceFile instances that has been built by calling analyze_source_files
+        :param output_csv_file: The output file path to write.
+        :return: None
+        """
+        all_lists = [[x.path.name, *x.function_distribution] for x in processed_files]
+        SourceFolder.write_line_ranges_csv(all_lists, output_csv_file)
+
+    @staticmethod
+    def write_line_ranges_csv(all_lists: list[list], output_csv_file: Path) -> None:
+        """
+        This function writes the sparse line ranges CSV from a list of columns, in the same form as the columns passed
+        to write_line_details_csv.
+
+        :param all_lists: A list of columns, one per file, each starting with the file name.
+        :param output_csv_file: The output file path to write.
+        :return: None
+        """
+        with open_report(output_csv_file, 'w') as f:
+            csv_writer = writer(f, lineterminator='\n')
+            csv_writer.writerow(['File', 'Lines', 'Ranges'])
+            for column in all_lists:
+                csv_writer.writerow([column[0], len(column) - 1, line_ranges(column[1:])])
 
     def generate_line_details_plot(self, processed_files: list[SourceFile], output_file_file: Path) -> None:
         """
@@ -172,14 +648,15 @@ class SourceFolder:
         :param output_file_file: The output file path to write.
         :return: None
         """
+        # the figure is built directly rather than through pyplot, which keeps global state and is not thread safe
+        from matplotlib.figure import Figure  # imported here as it is slow to import and plots are often skipped
         logger.log("Building plot data (usually ~30 seconds)")
         y_max = len(self.function_call_list)
         file_names = [x.path.name for x in processed_files]
         data = [x.advanced_function_distribution for x in processed_files]
         num_data_sets = len(data)
-        plot_data = plt.subplots(num_data_sets, 1, layout='constrained')
-        fig: matplotlib.pyplot.Figure = plot_data[0]
-        axes: list[matplotlib.pyplot.axes] = plot_data[1]
+        fig = Figure(layout='constrained')
+        axes = fig.subplots(num_data_sets, 1, squeeze=False)[:, 0]
         fig.set_size_inches(8, int(num_data_sets / 2))
         plot_num = -1
         for data_num, distribution in enumerate(data):
@@ -189,7 +666,7 @@ class SourceFolder:
             axes[plot_num].set_yticklabels([])
             axes[plot_num].get_xaxis().set_visible(False)
             axes[plot_num].set_ylim([0, y_max])
-            logger.terminal_progress_bar(data_num + 1, len(data), '')
-        logger.terminal_progress_done()
+            logger.progress_bar(data_num + 1, len(data), '')
+        logger.progress_done()
         logger.log("Results processed, plot being set up now (usually ~1 minute)")
-        plt.savefig(output_file_file)
+        fig.savefig(output_file_file)
@@ -0,0 +1,142 @@
+from pathlib import Path
+from random import Random
+
+VARIABLES = [
+    "state.dataIPShortCut->cCurrentModuleObject", "state.dataIPShortCut->cAlphaArgs(1)",
+    "state.dataIPShortCut->cNumericFieldNames(3)", "thisComp.Name", "state.dataLoopNodes->Node(inletNode).Temp",
+    "state.dataEnvrn->OutDryBulbTemp", "RoutineName", "CurrentModuleObject", "thisSys.DesignFlowRate", "ZoneNum"
+]
+WORDS = [
+    "invalid", "input", "field", "value", "temperature", "flow", "rate", "zone", "node", "object", "not", "found",
+    "must", "be", "greater", "than", "zero", "blank", "entered", "coil", "fan", "schedule", "curve", "simulation",
+    "continues", "terminates", "out", "of", "range", "named"
+]
+FUNCTIONS = ["ShowSevereError", "ShowWarningError", "ShowWarningMessage", "ShowFatalError", "ShowSevereMessage"]
+
+
+def _sentence(rng: Random, placeholders: int = 0) -> str:
+    """
+    Builds a short error message sentence from random words, with optional format placeholders.
+
+    :param rng: The random number generator to draw from.
+    :param placeholders: The number of {} placeholders to add to the sentence.
+    :return: The sentence, without any surrounding quotes.
+    """
+    words = [rng.choice(WORDS) for _ in range(rng.randint(3, 10))]
+    for _ in range(placeholders):
+        words.insert(rng.randint(0, len(words)), "{}")
+    return ' '.join(words).capitalize()
+
+
+def _message_argument(rng: Random, indent: str) -> str:
+    """
+    Builds the message argument of an error call: a plain string, a raw string literal, a string built with format,
+    or a variable.  Long format calls are spread over several lines, the way clang-format lays them out.
+
+    :param rng: The random number generator to draw from.
+    :param indent: The indentation of the lines of the call.
+    :return: The argument source code.
+    """
+    kind = rng.random()
+    if kind < 0.35:
+        return f'"{_sentence(rng)}"'
+    elif kind < 0.45:
+        return f'R"({_sentence(rng)}; see "{rng.choice(WORDS)}" (default))"'
+    elif kind < 0.5:
+        return rng.choice(VARIABLES)
+    placeholder_count = rng.randint(1, 3)
+    arguments = ', '.join(rng.choice(VARIABLES) for _ in range(placeholder_count))
+    prefix = rng.choice(['format', 'fmt::format'])
+    if rng.random() < 0.5:
+        return f'{prefix}("{_sentence(rng, placeholder_count)}", {arguments})'
+    return f'{prefix}(\n{indent}        "{_sentence(rng, placeholder_count)}",\n{indent}        {arguments})'
+
+
+def _call(rng: Random, function: str, indent: str) -> str:
+    """
+    Builds a single error call statement, either on one line or spread over several lines.
+
+    :param rng: The random number generator to draw from.
+    :param function: The name of the function to call.
+    :param indent: The indentation of the call.
+    :return: The call source code, ending with a semicolon and an optional trailing comment.
+    """
+    message = _message_argument(rng, indent)
+    trailing_comment = f"  // {_sentence(rng)}" if rng.random() < 0.1 else ""
+    if rng.random() < 0.4:
+        return f"{indent}{function}(\n{indent}    state,\n{indent}    {message});{trailing_comment}"
+    return f"{indent}{function}(state, {message});{trailing_comment}"
+
+
+def _group(rng: Random, indent: str) -> str:
+    """
+    Builds a group of consecutive error calls: a leading call followed by any number of continue calls, sometimes
+    ending with a fatal error.
+
+    :param rng: The random number generator to draw from.
+    :param indent: The indentation of the calls.
+    :return: The group source code.
+    """
+    calls = [_call(rng, rng.choice(FUNCTIONS), indent)]
+    for _ in range(rng.choice([0, 0, 1, 1, 2, 3])):
+        calls.append(_call(rng, "ShowContinueError", indent))
+    if rng.random() < 0.15:
+        calls.append(_call(rng, "ShowFatalError", indent))
+    return '\n'.join(calls)
+
+
+def generate_source_text(rng: Random, group_count: int) -> str:
+    """
+    Builds the source code of one EnergyPlus-style C++ file, holding the given number of error call groups spread
+    over a few functions, along with ordinary statements, line comments, and block comments between them.
+
+    :param rng: The random number generator to draw from.
+    :param group_count: The number of error call groups to include in the file.
+    :return: The source code of the file.
+    """
+    lines = ["#include <EnergyPlus/Data/EnergyPlusData.hh>", "#include <EnergyPlus/UtilityRoutines.hh>", "",
+             "namespace EnergyPlus {", ""]
+    function_index = 0
+    remaining = group_count
+    while remaining > 0 or function_index == 0:
+        groups_here = min(remaining, rng.randint(1, 6))
+        remaining -= groups_here
+        lines.append(f"/* {_sentence(rng)}\n * {_sentence(rng)}\n */")
+        lines.append(f"void checkInput{function_index}(EnergyPlusData &state, int const ZoneNum)\n{{")
+        lines.append('    static constexpr std::string_view RoutineName("checkInput: ");')
+        lines.append("    bool ErrorsFound = false;")
+        for _ in range(groups_here):
+            lines.append(f"    // {_sentence(rng)}")
+            lines.append(f"    if (thisComp.Value{rng.randint(0, 99)} < {rng.randint(0, 10)}.0) {{")
+            lines.append(_group(rng, "        "))
+            lines.append("        ErrorsFound = true;")
+            lines.append("    }")
+        lines.append("}")
+        lines.append("")
+        function_index += 1
+    lines.append("} // namespace EnergyPlus")
+    lines.append("")
+    return '\n'.join(lines)
+
+
+def generate_corpus(root: Path, file_count: int, groups_per_file: int = 20, seed: int = 0) -> list[Path]:
+    """
+    Writes a synthetic corpus of EnergyPlus-style C++ files, laid out like an EnergyPlus repository, so that the
+    performance of the analysis can be measured at any size without a full EnergyPlus checkout.  The corpus is fully
+    determined by the arguments, so the same arguments always produce the same files.
+
+    :param root: The root directory of the corpus, the files are written into its src/EnergyPlus folder.
+    :param file_count: The number of source files to write.
+    :param groups_per_file: The number of error call groups in each file.
+    :param seed: The seed of the random number generator, to build a different corpus of the same size.
+    :return: A list of the paths of the written files.
+    """
+    source_dir = root / 'src' / 'EnergyPlus'
+    source_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(file_count):
+        rng = Random(seed * 1000003 + i)  # seeded per file, so a bigger corpus starts with the same files
+        file_path = source_dir / f"Generated{i:05d}.cc"
+        file_path.write_text(generate_source_text(rng, groups_per_file))
+        files.append(file_path)
+    return files
@@ -1,9 +1,15 @@
 from pathlib import Path
+from tempfile import mkdtemp
 
 from pytest import raises
 
 from energyplus_refactor_helper.actions.base import RefactorBase
 from energyplus_refactor_helper.function_call import FunctionCall
+from energyplus_refactor_helper.git_revision import GitRevision
+from energyplus_refactor_helper.prefetch import read_source
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+from energyplus_refactor_helper.test.test_git_revision import fake_source_folder, funcs, set_up_repo
 
 
 def test_default_interface():
@@ -12,3 +18,81 @@ def test_default_interface():
         rb.run(Path(), Path(), True, True)
     fc = FunctionCall(0, 'f', 0, 0, 0, 'f(x, y)')
     assert isinstance(rb.base_function_call_visitor(fc), str)
+
+
+class CountingAction(RefactorBase):
+    def map_group(self, function_group) -> int:
+        return len(function_group.function_calls)
+
+    def reduce(self, results) -> dict:
+        totals = {'files': 0, 'calls': 0}
+        for group_sizes in results:
+            totals['files'] += 1
+            totals['calls'] += sum(group_sizes)
+        return totals
+
+
+def test_map_reduce():
+    rb = RefactorBase()
+    with raises(NotImplementedError):
+        rb.map_group(None)
+    source_folder = SourceFolder(fake_source_folder / 'src' / 'EnergyPlus', funcs)
+    files = source_folder.find_files()
+    assert rb.map_reduce(source_folder, []) == []
+    assert CountingAction().map_reduce(source_folder, files, processes=1) == {'files': 4, 'calls': 10}
+    assert CountingAction().map_reduce(source_folder, files, processes=2) == {'files': 4, 'calls': 10}
+    revision = GitRevision(set_up_repo(), 'first', 'src/EnergyPlus')
+    revision_folder = SourceFolder(revision.repo / 'src' / 'EnergyPlus', funcs, revision)
+    assert CountingAction().map_reduce(revision_folder, revision_folder.find_files(), processes=2)['calls'] == 10
+    revision.reader.close()
+
+
+class CountingRevision:
+    def __init__(self):
+        self.reads = 0
+
+    @staticmethod
+    def blob_sha(path: Path) -> str:
+        return path.name
+
+    def read_text(self, path: Path) -> str:
+        self.reads += 1
+        return read_source(path)
+
+
+class FirstResultAction(CountingAction):
+    def __init__(self, revision: CountingRevision):
+        self.revision = revision
+        self.reads_at_first_result = None
+
+    def reduce(self, results) -> dict:
+        for _ in results:
+            if self.reads_at_first_result is None:
+                self.reads_at_first_result = self.revision.reads
+        return self.revision.reads
+
+
+def test_map_reduce_streams_revision_files():
+    files = generate_corpus(Path(mkdtemp()), 40, groups_per_file=1)
+    revision = CountingRevision()
+    source_folder = SourceFolder(files[0].parent, funcs, revision)
+    action = FirstResultAction(revision)
+    assert action.map_reduce(source_folder, files, processes=2, batch_size=2) == 40
+    assert action.reads_at_first_result <= 2 * 2 * 2  # two batches of two files in flight for each of two workers
+
+
+def test_map_reduce_caches_results_by_blob():
+    files = generate_corpus(Path(mkdtemp()), 6, groups_per_file=2)
+    revision = CountingRevision()
+    source_folder = SourceFolder(files[0].parent, funcs, revision)
+    cache = {}
+    totals = CountingAction().map_reduce(source_folder, files, processes=2, batch_size=2, cache=cache)
+    assert revision.reads == 6 and len(cache) == 6
+    assert CountingAction().map_reduce(source_folder, files, processes=2, cache=cache) == totals
+    assert CountingAction().map_reduce(source_folder, files, processes=1, cache=cache) == totals
+    assert revision.reads == 6  # every result came from the cache
+    parsed_folder = SourceFolder(files[0].parent, funcs, revision)
+    parsed_folder.analyze_revision_file(files[0])
+    assert revision.reads == 7
+    assert CountingAction().map_reduce(parsed_folder, files, processes=2) == totals
+    assert revision.reads == 12  # the file already in the blob cache was not read again
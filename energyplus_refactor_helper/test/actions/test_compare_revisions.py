@@ -0,0 +1,27 @@
+from json import loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.compare_revisions import CompareRevisions
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.test.test_git_revision import set_up_repo
+
+
+def test_compare_revisions():
+    repo = set_up_repo()
+    output_path = Path(mkdtemp()) / 'output'
+    options = RunOptions(revision='first', compare_against=['HEAD', str(repo)])
+    assert CompareRevisions().run(repo, output_path, False, True, options) == 0
+    comparison = loads((output_path / 'comparison.json').read_text())
+    assert comparison['revisions'] == ['first', 'HEAD', str(repo)]
+    first_to_head, head_to_checkout = comparison['comparisons']
+    assert list(first_to_head['files']) == ['test_file.cc']  # the removed file had no error calls
+    assert first_to_head['summary']['groups_removed'] > 0
+    assert head_to_checkout['files'] == {}
+
+
+def test_compare_revisions_bad_input():
+    repo = set_up_repo()
+    assert CompareRevisions().run(repo, Path(mkdtemp()), False, True) == 1
+    options = RunOptions(compare_against=['not_a_revision'])
+    assert CompareRevisions().run(repo, Path(mkdtemp()), False, True, options) == 1
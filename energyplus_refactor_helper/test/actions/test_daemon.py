@@ -0,0 +1,12 @@
+import socket
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.daemon import RunDaemon
+
+
+def test_daemon_needs_unix_sockets(monkeypatch):
+    monkeypatch.delattr(socket, 'AF_UNIX', raising=False)
+    output_path = Path(mkdtemp()) / 'output'
+    assert RunDaemon().run(Path(mkdtemp()), output_path, False, True) == 1
+    assert not output_path.exists()
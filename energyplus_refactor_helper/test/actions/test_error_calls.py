@@ -1,6 +1,11 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
 from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
 from energyplus_refactor_helper.function_call import FunctionCall
 from energyplus_refactor_helper.function_call_group import FunctionCallGroup
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.test.test_git_revision import set_up_repo
 
 
 def test_error_code_lookup():
@@ -90,3 +95,15 @@ def test_error_call_visitor():
     # expected_text = 'emitErrorMessage(s, -999, "Foo", true);'
     resulting_text = ecr.visitor(group)
     assert '"Foo", true' in resulting_text
+
+
+def test_dry_run_reuses_classified_groups(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    ecr = ErrorCallRefactor()
+    visited = []
+    original_visitor = ecr.visitor
+    monkeypatch.setattr(ecr, 'visitor', lambda group: visited.append(group) or original_visitor(group))
+    output_path = Path(mkdtemp())
+    assert ecr.run(set_up_repo(), output_path, False, True, RunOptions(revision='first', dry_run=True)) == 0
+    assert '+++ b/src/EnergyPlus/test_file.cc' in (output_path / 'rewrite.patch').read_text()
+    assert len(visited) == len({id(group) for group in visited})  # each group is classified only once
@@ -1,9 +1,9 @@
 from energyplus_refactor_helper.actions.base import RefactorBase
-from energyplus_refactor_helper.actions.listing import all_actions
+from energyplus_refactor_helper.actions.listing import all_actions, get_action
 
 
 def test_listing_response():
     assert isinstance(all_actions, dict)
     for action in all_actions:
         assert isinstance(action, str)
-        assert issubclass(all_actions[action], RefactorBase)
+        assert issubclass(get_action(action), RefactorBase)
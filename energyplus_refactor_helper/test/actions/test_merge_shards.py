@@ -0,0 +1,71 @@
+from json import dumps, loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.actions.merge_shards import MergeShards
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+this_file = Path(__file__).resolve()
+fake_source_repo = this_file.parent.parent / 'fake_source_folder'
+fake_source_folder = fake_source_repo / 'src' / 'EnergyPlus'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def test_merge_shards(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    shards_folder = Path(mkdtemp())
+    sf = SourceFolder(fake_source_folder, funcs)
+    matched_source_files = sf.find_files(['file_to_ignore.cc'])
+    for shard_index in range(1, 3):
+        shard_output_folder = shards_folder / f"shard_{shard_index}"
+        processed_source_files = sf.analyze_source_files(sf.shard_files(matched_source_files, shard_index, 2))
+        sf.generate_reports(processed_source_files, shard_output_folder, skip_plots=True)
+        sf.generate_shard_manifest(processed_source_files, shard_output_folder / 'shard.json', (shard_index, 2))
+        candidates = {
+            s.path.relative_to(fake_source_folder).as_posix(): [{'message': s.path.name, 'call_types': [0]}]
+            for s in processed_source_files
+        }
+        (shard_output_folder / 'similarity_candidates.json').write_text(dumps(candidates))
+    merged_output_folder = Path(mkdtemp())
+    assert MergeShards().run(shards_folder, merged_output_folder, False, True) == 0
+    merged_candidates = loads((merged_output_folder / 'similarity_candidates.json').read_text())
+    expected_order = ['subfolder/another_file.cc', 'subfolder/include_file_but_empty.cc', 'test_file.cc']
+    assert list(merged_candidates) == expected_order
+
+
+def test_merge_scores_the_same_pairs_as_a_single_run(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    scored = []
+    write_similarities = ErrorCallRefactor.write_similarities
+
+    def record_similarities(self, *args, **kwargs):
+        scored.append(write_similarities(self, *args, **kwargs))
+        return scored[-1]
+
+    monkeypatch.setattr(ErrorCallRefactor, 'write_similarities', record_similarities)
+    single_output_folder = Path(mkdtemp())
+    assert ErrorCallRefactor().run(fake_source_repo, single_output_folder, False, True) == 0
+    shards_folder = Path(mkdtemp())
+    for shard_index in range(1, 3):
+        shard_options = RunOptions(shard=(shard_index, 2))
+        assert ErrorCallRefactor().run(
+            fake_source_repo, shards_folder / f"shard_{shard_index}", False, True, shard_options
+        ) == 0
+    merged_output_folder = Path(mkdtemp())
+    assert MergeShards().run(shards_folder, merged_output_folder, False, True) == 0
+    assert len(scored) == 2 and scored[0] and scored[0] == scored[1]
+    single_templates = (single_output_folder / 'template_frequency.csv').read_text()
+    assert (merged_output_folder / 'template_frequency.csv').read_text() == single_templates
+
+
+def test_merge_shards_with_missing_shards():
+    assert MergeShards().run(Path(mkdtemp()), Path(mkdtemp()), False, True) == 1
+    shards_folder = Path(mkdtemp())
+    sf = SourceFolder(fake_source_folder, funcs)
+    shard_output_folder = shards_folder / 'shard_1'
+    processed_source_files = sf.analyze_source_files(sf.shard_files(sf.find_files(), 1, 2))
+    sf.generate_reports(processed_source_files, shard_output_folder, skip_plots=True)
+    sf.generate_shard_manifest(processed_source_files, shard_output_folder / 'shard.json', (1, 2))
+    assert MergeShards().run(shards_folder, Path(mkdtemp()), False, True) == 1
@@ -0,0 +1,72 @@
+from json import dumps, loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.actions.perf_guard import PerformanceGuard
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+from energyplus_refactor_helper.timing import timer
+
+
+def test_guard_against_synthetic_corpus(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    source_repo = Path(mkdtemp())
+    baseline_file = Path(mkdtemp()) / 'baseline.json'
+    assert PerformanceGuard().run(source_repo, Path(mkdtemp()), False, True, RunOptions()) == 1  # no baseline given
+    options = RunOptions(baseline=str(baseline_file), corpus_files=1)
+    assert PerformanceGuard().run(source_repo, Path(mkdtemp()), False, True, options) == 1  # the baseline is missing
+    options.update_baseline = True
+    output_dir = Path(mkdtemp())
+    assert PerformanceGuard().run(source_repo, output_dir, False, True, options) == 0
+    assert list(source_repo.iterdir()) == []  # the corpus is generated in the output directory
+    assert (output_dir / 'corpus' / 'src' / 'EnergyPlus' / 'Generated00000.cc').exists()
+    baseline = loads(baseline_file.read_text())
+    assert baseline['metrics']['throughput']['files_per_second'] > 0
+    assert baseline['metrics']['phases']['parse']['peak_memory'] > 0
+    baseline['tolerances'] = {'wall_time': 100.0, 'throughput': 0.99, 'memory': 100.0}
+    baseline_file.write_text(dumps(baseline))
+    options = RunOptions(baseline=str(baseline_file), corpus_files=1)
+    output_dir = Path(mkdtemp())
+    assert PerformanceGuard().run(source_repo, output_dir, False, True, options) == 0
+    assert loads((output_dir / 'perf_guard.json').read_text())['regressions'] == []
+
+
+def test_timed_run_is_not_traced(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    corpus = Path(mkdtemp())
+    generate_corpus(corpus, 1)
+    traced_runs = []
+    run = ErrorCallRefactor.run
+
+    def record_tracing(self, *args, **kwargs):
+        traced_runs.append(timer.trace_memory)
+        return run(self, *args, **kwargs)
+
+    monkeypatch.setattr(ErrorCallRefactor, 'run', record_tracing)
+    phases, memory = PerformanceGuard.time_analysis(corpus, Path(mkdtemp()), True, RunOptions(), trace_memory=False)
+    assert traced_runs == [False] and memory is None
+    phases, memory = PerformanceGuard.time_analysis(corpus, Path(mkdtemp()), True, RunOptions())
+    assert traced_runs == [False, False, True] and memory['parse']['peak'] > 0
+    assert timer.phases == phases  # the timer keeps the timings of the untraced run
+
+
+def test_guard_against_timings_file():
+    run_dir = Path(mkdtemp())
+    timings = {'phases': {'parse': {'wall_time': 1.0, 'cpu_time': 1.0, 'count': 1, 'items': 10}}}
+    (run_dir / 'timings.json').write_text(dumps(timings))
+    baseline_file = run_dir / 'baseline.json'
+    options = RunOptions(baseline=str(baseline_file), update_baseline=True)
+    assert PerformanceGuard().run(run_dir / 'timings.json', Path(mkdtemp()), False, True, options) == 0
+    timings['phases']['parse']['wall_time'] = 3.0
+    (run_dir / 'timings.json').write_text(dumps(timings))
+    (run_dir / 'memory.json').write_text(dumps({'phases': {'parse': {'peak': 100, 'retained': 0}}}))
+    options.update_baseline = False
+    assert PerformanceGuard().run(run_dir / 'timings.json', Path(mkdtemp()), False, True, options) == 1
+
+
+def test_guard_with_failed_analysis():
+    baseline_file = Path(mkdtemp()) / 'baseline.json'
+    options = RunOptions(baseline=str(baseline_file), revision='not_a_revision', update_baseline=True)
+    assert PerformanceGuard().run(Path(mkdtemp()), Path(mkdtemp()), False, True, options) == 1
+    assert not baseline_file.exists()
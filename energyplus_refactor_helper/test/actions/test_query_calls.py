@@ -0,0 +1,38 @@
+from json import loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.index_calls import IndexCalls
+from energyplus_refactor_helper.actions.query_calls import QueryCalls
+from energyplus_refactor_helper.run_options import RunOptions
+
+this_file = Path(__file__).resolve()
+fake_source_repo = this_file.parent.parent / 'fake_source_folder'
+
+
+def test_index_then_query(capsys):
+    output_path = Path(mkdtemp()) / 'output'
+    assert IndexCalls().run(fake_source_repo, output_path, False, True) == 0
+    assert (output_path / 'call_index.sqlite').exists()
+    options = RunOptions(query_filters={'function': 'ShowWarningError'})
+    assert QueryCalls().run(fake_source_repo, output_path, False, True, options) == 0
+    results = loads((output_path / 'query_results.json').read_text())
+    assert len(results) == 1
+    assert results[0]['start_line'] == 27
+    assert ':27: ShowWarningError(' in capsys.readouterr().out  # the results are written through the logger
+    assert QueryCalls().run(fake_source_repo, output_path, False, True) == 0
+    assert len(loads((output_path / 'query_results.json').read_text())) == 10
+
+
+def test_query_without_refresh(monkeypatch):
+    output_path = Path(mkdtemp()) / 'output'
+    no_refresh = RunOptions(query_filters={'function': 'ShowWarningError'}, refresh_index=False)
+    assert QueryCalls().run(fake_source_repo, output_path, False, True, no_refresh) == 0  # builds the missing index
+    assert len(loads((output_path / 'query_results.json').read_text())) == 1
+
+    def fail_update(*_):
+        raise AssertionError('the index should not be refreshed')
+
+    monkeypatch.setattr(IndexCalls, 'update_index', fail_update)
+    assert QueryCalls().run(fake_source_repo, output_path, False, True, no_refresh) == 0
+    assert len(loads((output_path / 'query_results.json').read_text())) == 1
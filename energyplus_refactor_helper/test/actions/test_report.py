@@ -0,0 +1,38 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.actions.report import Report
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.snapshot import AnalysisSnapshot
+from energyplus_refactor_helper.timing import timer
+
+this_file = Path(__file__).resolve()
+fake_source_repo = this_file.parent.parent / 'fake_source_folder'
+
+
+def test_report_from_snapshot(monkeypatch):
+    monkeypatch.setenv('CI', 'true')  # the similarity scoring itself needs the full SpaCy model
+    run_output = Path(mkdtemp())
+    assert ErrorCallRefactor().run(fake_source_repo, run_output, False, True) == 0
+    assert (run_output / AnalysisSnapshot.FILE_NAME).exists()
+    report_output = Path(mkdtemp()) / 'reports'
+    timer.reset()
+    assert Report().run(run_output, report_output, False, True) == 0
+    assert 'similarity' not in timer.phases  # the pairs scored by the run are reused
+    for report in ['results.json', 'file_summary.csv', 'lines_summary.csv', 'template_frequency.csv']:
+        assert (report_output / report).read_text() == (run_output / report).read_text()
+    subset_output = Path(mkdtemp())
+    options = RunOptions(reports=['lines_ranges.csv', 'template_frequency.csv'], compression='gzip')
+    assert Report().run(run_output / AnalysisSnapshot.FILE_NAME, subset_output, False, True, options) == 0
+    assert sorted(p.name for p in subset_output.iterdir()) == ['lines_ranges.csv.gz', 'template_frequency.csv']
+    timer.reset()
+    assert Report().run(run_output, Path(mkdtemp()), False, True, RunOptions(all_pairs=True)) == 0
+    assert 'similarity' in timer.phases  # blocking changed, so the pairs are scored again
+
+
+def test_report_without_snapshot():
+    assert Report().run(Path(mkdtemp()), Path(mkdtemp()), False, True) == 1
+    bad_snapshot = Path(mkdtemp()) / AnalysisSnapshot.FILE_NAME
+    bad_snapshot.write_bytes(b'\x80\x05N.')  # a pickled None
+    assert Report().run(bad_snapshot, Path(mkdtemp()), False, True) == 1
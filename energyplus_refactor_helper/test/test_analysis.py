@@ -0,0 +1,33 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.analysis import analyze
+from energyplus_refactor_helper.run_options import RunOptions
+from energyplus_refactor_helper.test.test_git_revision import set_up_repo
+
+
+def fake_repo() -> Path:
+    return Path(__file__).resolve().parent / 'fake_source_folder'
+
+
+def test_analyze_in_memory():
+    result = analyze(fake_repo())
+    assert result.summary() == {'files': 4, 'calls': 10, 'groups': 6, 'failed_calls': 0}
+    assert 'subfolder/another_file.cc' in [result.relative_path(s) for s in result.files()]
+    assert len(list(result.groups())) == 6
+    source_file, call = next(result.calls())
+    assert call in source_file.found_functions
+    assert call.function_name == 'ShowSevereError'
+
+
+def test_analyze_writes_reports_on_request():
+    result = analyze(fake_repo(), ignore=['file_to_ignore.cc'], options=RunOptions(shard=(1, 2)))
+    assert result.summary()['files'] == 2
+    output_dir = Path(mkdtemp()) / 'reports'
+    assert result.write_reports(output_dir) == []
+    assert (output_dir / 'results.json').exists()
+
+
+def test_analyze_revision():
+    result = analyze(set_up_repo(), options=RunOptions(revision='first'))
+    assert result.summary()['files'] > 0
@@ -0,0 +1,19 @@
+from json import loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.benchmark import main
+
+
+def test_benchmark_writes_results():
+    output_file = Path(mkdtemp()) / 'benchmark.json'
+    assert main([str(output_file), '--sizes', '1', '3', '--groups-per-file', '4', '--similarity-limit', '5']) == 0
+    results = loads(output_file.read_text())
+    assert [s['files'] for s in results['sizes']] == [1, 3]
+    assert results['sizes'][1]['groups'] == 12
+    phases = results['sizes'][1]['phases']
+    assert phases['parse']['items'] == 3
+    assert phases['parse_arguments']['items'] == results['sizes'][1]['calls']
+    assert 'report.results_json' in phases
+    assert 'report.distribution_plot' not in phases
+    assert phases['similarity.templates']['items'] == 5
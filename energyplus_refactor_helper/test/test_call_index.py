@@ -0,0 +1,55 @@
+from os import utime
+from pathlib import Path
+from shutil import copytree
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.call_index import CallIndex
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+this_file = Path(__file__).resolve()
+fake_source_folder = this_file.parent / 'fake_source_folder' / 'src' / 'EnergyPlus'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+class TestCallIndex:
+    @staticmethod
+    def set_up_index() -> tuple[Path, CallIndex]:
+        scratch_dir = Path(mkdtemp())
+        root = scratch_dir / 'EnergyPlus'
+        copytree(fake_source_folder, root)
+        return root, CallIndex(scratch_dir / 'call_index.sqlite')
+
+    def test_index_and_query(self):
+        root, call_index = TestCallIndex.set_up_index()
+        files = SourceFolder(root, funcs).find_files()
+        assert call_index.update(root, funcs, files) == (4, 0)
+        assert len(call_index.query()) == 10
+        severe_calls = call_index.query(function='ShowSevereError')
+        assert len(severe_calls) == 4
+        assert severe_calls[0]['file'] == 'subfolder/file_to_ignore.cc'
+        assert severe_calls[0]['arguments'] == ['state', '"Something Bad"']
+        format_calls = call_index.query(argument='format(%', argument_position=1)
+        assert [c['function_name'] for c in format_calls] == ['ShowContinueError'] * 2 + ['ShowSevereError']
+        assert len(call_index.query(argument='state', file='test_file.cc')) == 9
+        assert len(call_index.query(argument_position=2)) == 0
+        test_file_calls = call_index.query(file='test_file.cc')
+        assert [c['group_id'] for c in test_file_calls] == [0, 0, 1, 1, 2, 3, 3, 3, 4]
+        call_index.close()
+
+    def test_incremental_updates(self):
+        root, call_index = TestCallIndex.set_up_index()
+        files = SourceFolder(root, funcs).find_files()
+        call_index.update(root, funcs, files)
+        assert call_index.update(root, funcs, files) == (0, 0)
+        # touching a file without changing it does not parse it again
+        utime(root / 'test_file.cc', ns=(1, 1))
+        assert call_index.update(root, funcs, files) == (0, 0)
+        (root / 'test_file.cc').write_text('ShowFatalError(state, "Changed");\n')
+        (root / 'subfolder' / 'file_to_ignore.cc').unlink()
+        files = SourceFolder(root, funcs).find_files()
+        assert call_index.update(root, funcs, files) == (1, 1)
+        assert len(call_index.query()) == 1
+        # a different list of functions rebuilds the index
+        assert call_index.update(root, funcs[:1], files) == (3, 0)
+        assert len(call_index.query()) == 0
+        call_index.close()
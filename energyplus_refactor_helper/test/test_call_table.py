@@ -0,0 +1,60 @@
+from json import loads
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.call_table import CallTable
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+
+this_file = Path(__file__).resolve()
+fake_source_folder = this_file.parent / 'fake_source_folder' / 'src' / 'EnergyPlus'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def test_aggregates_match_the_parsed_calls():
+    sf = SourceFolder(fake_source_folder, funcs)
+    source_files = sf.analyze_source_files(sf.find_files())
+    table = sf.call_table
+    assert table.matches(source_files) and not table.matches(source_files[1:])
+    reparsed = [SourceFile(s.path, funcs) for s in source_files]  # the same paths, parsed again
+    assert not table.matches(reparsed) and sf.get_call_table(reparsed).matches(reparsed)
+    calls = [c for s in source_files for c in s.found_functions]
+    assert len(table) == len(calls)
+    assert table.group_count == sum(len(s.found_function_groups) for s in source_files)
+    good, bad = table.calls_per_file()
+    assert good.tolist() == [sum(c.appears_successful for c in s.found_functions) for s in source_files]
+    assert (good + bad).tolist() == [len(s.found_functions) for s in source_files]
+    assert table.calls_per_type(funcs) == {f: sum(c.function_name == f for c in calls) for f in funcs}
+    line_counts = [c.ending_line_number - c.starting_line_number + 1 for c in calls]
+    assert table.line_count_histogram() == {n: line_counts.count(n) for n in sorted(set(line_counts))}
+    group_sizes = [len(g.function_calls) for s in source_files for g in s.found_function_groups]
+    assert table.group_size_histogram() == {n: group_sizes.count(n) for n in sorted(set(group_sizes))}
+    assert table.groups_per_file().tolist() == [len(s.found_function_groups) for s in source_files]
+    assert table.column('success').dtype == bool
+    empty = CallTable()
+    assert len(empty) == 0 and empty.failures_per_directory(fake_source_folder) == {}
+
+
+def test_call_statistics_report():
+    corpus = Path(mkdtemp())
+    generate_corpus(corpus, 20, seed=3)
+    sf = SourceFolder(corpus, funcs)
+    source_files = sf.analyze_source_files(sf.find_files())
+    output_folder = Path(mkdtemp())
+    assert sf.generate_reports(source_files[::-1], output_folder, True, only=['call_statistics.json']) == []
+    statistics = loads((output_folder / 'call_statistics.json').read_text())
+    assert statistics['files'] == 20 and statistics['calls'] == len(sf.call_table)
+    assert sum(statistics['calls_per_function'].values()) == statistics['calls']
+    assert sum(statistics['calls_per_line_count'].values()) == statistics['calls']
+    assert sum(int(k) * v for k, v in statistics['groups_per_call_count'].items()) == statistics['calls']
+    failed = sum(not c.appears_successful for s in source_files for c in s.found_functions)
+    assert sum(statistics['failed_calls_per_directory'].values()) == failed
+
+
+def test_call_statistics_written_by_default():
+    sf = SourceFolder(fake_source_folder, funcs)
+    source_files = sf.analyze_source_files(sf.find_files())
+    output_folder = Path(mkdtemp())
+    assert sf.generate_reports(source_files, output_folder, True) == []
+    assert loads((output_folder / 'call_statistics.json').read_text())['files'] == len(source_files)
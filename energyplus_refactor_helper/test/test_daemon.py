@@ -0,0 +1,72 @@
+import socket
+from pathlib import Path
+from shutil import copytree
+from tempfile import mkdtemp
+from threading import Thread
+from time import sleep
+
+from pytest import mark
+
+from energyplus_refactor_helper.actions.base import RefactorBase
+from energyplus_refactor_helper.daemon import AnalysisDaemon, send_request
+from energyplus_refactor_helper.logger import logger
+
+this_file = Path(__file__).resolve()
+fake_source_folder = this_file.parent / 'fake_source_folder' / 'src' / 'EnergyPlus'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def test_refresh_only_parses_changed_files():
+    root = Path(mkdtemp()) / 'EnergyPlus'
+    copytree(fake_source_folder, root)
+    daemon = AnalysisDaemon(root, funcs, RefactorBase.base_function_group_visitor)
+    assert daemon.refresh() == 4
+    assert daemon.refresh() == 0
+    (root / 'test_file.cc').write_text('ShowFatalError(state, "Changed");\n')
+    (root / 'subfolder' / 'file_to_ignore.cc').unlink()
+    assert daemon.refresh() == 1
+    assert len(daemon.processed_files()) == 3
+    response = daemon.handle_request({'command': 'analyze'})
+    assert response == {'files': 3, 'calls': 1, 'groups': 1, 'failed_calls': 0, 'reparsed': 0}
+    assert 'error' in daemon.handle_request({'command': 'unknown'})
+    assert 'error' in daemon.handle_request({'command': 'preview', 'file': 'missing.cc'})
+
+
+def test_refresh_logs_only_changes(monkeypatch):
+    root = Path(mkdtemp()) / 'EnergyPlus'
+    copytree(fake_source_folder, root)
+    daemon = AnalysisDaemon(root, funcs, RefactorBase.base_function_group_visitor, ['file_to_ignore.cc'])
+    messages = []
+    monkeypatch.setattr(logger, 'log', messages.append)
+    daemon.refresh()
+    assert len(messages) == 1 and 'ignored' not in messages[0]
+    daemon.refresh()
+    assert len(messages) == 1  # an unchanged tree logs nothing on a poll
+    (root / 'test_file.cc').write_text('ShowFatalError(state, "Changed");\n')
+    daemon.refresh()
+    assert len(messages) == 2
+
+
+@mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not available on this platform')
+def test_serve_requests():
+    scratch_dir = Path(mkdtemp())
+    root = scratch_dir / 'EnergyPlus'
+    copytree(fake_source_folder, root)
+    daemon = AnalysisDaemon(root, funcs, RefactorBase.base_function_group_visitor, ['file_to_ignore.cc'])
+    socket_path = scratch_dir / 'daemon.sock'
+    server_thread = Thread(target=daemon.serve, args=(socket_path, 0.05))
+    server_thread.start()
+    while daemon._server is None:
+        sleep(0.01)
+    response = send_request(socket_path, {'command': 'analyze'})
+    assert response['files'] == 3
+    assert response['calls'] == 9
+    preview = send_request(socket_path, {'command': 'preview', 'file': 'test_file.cc'})
+    assert '+    ShowSevereError(state, "Something Bad");' in preview['diff']
+    output_dir = scratch_dir / 'output'
+    assert send_request(socket_path, {'command': 'report', 'output_directory': str(output_dir)})['failed_reports'] == []
+    assert (output_dir / 'results.json').exists()
+    assert 'error' in send_request(socket_path, {'command': 'report'})
+    assert send_request(socket_path, {'command': 'stop'}) == {'stopped': True}
+    server_thread.join()
+    assert not socket_path.exists()
@@ -0,0 +1,38 @@
+from pytest import raises
+
+from energyplus_refactor_helper.edit_spans import EditPlan
+
+
+def test_edits_apply_in_one_pass_against_original_offsets():
+    plan = EditPlan('abcdefghij')
+    plan.add(7, 9, 'HH', 'second')
+    plan.add(1, 3, '', 'first')
+    plan.add(4, 4, '+', 'insert')
+    assert plan.apply() == 'ad+efgHHj'
+    assert EditPlan('unchanged').apply() == 'unchanged'
+
+
+def test_compatible_edits_are_merged():
+    plan = EditPlan('abcdef')
+    plan.add(1, 3, 'X', 'one')
+    plan.add(1, 3, 'X', 'two')  # identical edits are kept once
+    plan.add(3, 3, '[', 'three')  # insertions at the end of a replacement and at the same offset are all kept
+    plan.add(3, 3, ']', 'four')
+    plan.add(3, 5, 'Y', 'five')
+    assert [(s.start, s.end) for s in plan.resolve()] == [(1, 3), (3, 3), (3, 5)]
+    assert plan.apply() == 'aX[]Yf'
+
+
+def test_conflicting_edits_are_reported():
+    plan = EditPlan('abcdef')
+    plan.add(1, 4, 'X', 'wide')
+    plan.add(3, 5, 'Y', 'narrow')
+    with raises(ValueError, match=r'wide \[1, 4\) and narrow \[3, 5\)'):
+        plan.apply()
+    same_span = EditPlan('abcdef')
+    same_span.add(1, 3, 'X')
+    same_span.add(1, 3, 'Y')
+    with raises(ValueError):
+        same_span.resolve()
+    with raises(ValueError):
+        EditPlan('abc').add(2, 4, 'X')
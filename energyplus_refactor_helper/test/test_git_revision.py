@@ -0,0 +1,71 @@
+from pathlib import Path
+from shutil import copytree
+from subprocess import check_call, DEVNULL
+from tempfile import mkdtemp
+
+from pytest import raises
+
+from energyplus_refactor_helper.git_revision import GitBlobReader, GitRevision
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+this_file = Path(__file__).resolve()
+fake_source_folder = this_file.parent / 'fake_source_folder'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def git(repo: Path, *args: str) -> None:
+    check_call(['git', '-C', str(repo), '-c', 'user.name=Test', '-c', 'user.email=test@test', *args], stdout=DEVNULL)
+
+
+def set_up_repo() -> Path:
+    repo = Path(mkdtemp()) / 'repo'
+    copytree(fake_source_folder, repo)
+    git(repo, 'init', '-q')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'first')
+    git(repo, 'tag', 'first')
+    # make the tree differ from the tagged revision
+    (repo / 'src' / 'EnergyPlus' / 'test_file.cc').write_text('ShowFatalError(state, "Changed");\n')
+    (repo / 'src' / 'EnergyPlus' / 'subfolder' / 'another_file.cc').unlink()
+    git(repo, 'commit', '-q', '-a', '-m', 'second')
+    return repo
+
+
+def test_reader_lists_and_reads_blobs():
+    repo = set_up_repo()
+    reader = GitBlobReader(repo)
+    first_blobs = reader.list_blobs('first', 'src/EnergyPlus')
+    assert 'src/EnergyPlus/subfolder/another_file.cc' in first_blobs
+    head_blobs = reader.list_blobs('HEAD', 'src/EnergyPlus')
+    assert 'src/EnergyPlus/subfolder/another_file.cc' not in head_blobs
+    first_text = reader.read_blob(first_blobs['src/EnergyPlus/test_file.cc'])
+    assert first_text == (fake_source_folder / 'src' / 'EnergyPlus' / 'test_file.cc').read_text()
+    assert reader.read_blob(head_blobs['src/EnergyPlus/test_file.cc']) == 'ShowFatalError(state, "Changed");\n'
+    assert reader.blob_sizes[head_blobs['src/EnergyPlus/test_file.cc']] == len('ShowFatalError(state, "Changed");\n')
+    reader.close()
+    with raises(ValueError):
+        reader.list_blobs('not_a_revision', 'src/EnergyPlus')
+    with raises(ValueError):
+        reader.read_blob('0' * 40)
+    reader.close()
+
+
+def test_source_folder_at_revision_matches_checkout():
+    repo = set_up_repo()
+    root = repo / 'src' / 'EnergyPlus'
+    revision = GitRevision(repo, 'first', 'src/EnergyPlus')
+    sf = SourceFolder(root, funcs, revision)
+    matched_files = sf.find_files(['file_to_ignore.cc'])
+    assert len(matched_files) == 3
+    processed_files = sf.analyze_source_files(matched_files)
+    checkout_sf = SourceFolder(fake_source_folder / 'src' / 'EnergyPlus', funcs)
+    checkout_files = checkout_sf.analyze_source_files(checkout_sf.find_files(['file_to_ignore.cc']))
+    assert [len(s.found_functions) for s in processed_files] == [len(s.found_functions) for s in checkout_files]
+    # analyzing another revision through the same blob cache reuses the unchanged files
+    head_sf = SourceFolder(root, funcs, GitRevision(repo, 'HEAD', 'src/EnergyPlus', revision.reader), sf.blob_cache)
+    head_files = head_sf.analyze_source_files(head_sf.find_files(['file_to_ignore.cc']))
+    assert len(head_files) == 2
+    assert len(sf.blob_cache) == 4
+    assert head_files[0].path == root / 'subfolder' / 'include_file_but_empty.cc'
+    assert len(head_files[1].found_functions) == 1
+    revision.reader.close()
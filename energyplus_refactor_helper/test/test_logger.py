@@ -1,7 +1,15 @@
+from contextlib import redirect_stdout
+from io import StringIO
 from pathlib import Path
+from multiprocessing import Process
 from tempfile import mkstemp
+from threading import Thread
 
-from energyplus_refactor_helper.logger import Logger
+from energyplus_refactor_helper.logger import Logger, logger as default_logger
+
+
+def log_in_worker(log_file: Path) -> None:
+    Logger(log_file=log_file, mute_stdout=True).log("From a worker")
 
 
 class TestLogger:
@@ -11,5 +19,65 @@ class TestLogger:
         log_file = Path(log_file_path)
         logger = Logger(log_file=log_file)
         logger.log("Hello")
+        logger.flush()
         log_file_contents = log_file.read_text()
         assert "Hello" in log_file_contents
+
+    def test_logger_writes_one_line_per_message_from_many_threads(self):
+        _, log_file_path = mkstemp()
+        log_file = Path(log_file_path)
+        logger = Logger(log_file=log_file, mute_stdout=True)
+
+        def log_messages(thread_num: int):
+            for i in range(100):
+                logger.log(f"Thread {thread_num} message {i}")
+
+        threads = [Thread(target=log_messages, args=(t,)) for t in range(4)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        logger.flush()
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 400
+        assert all([" : Thread " in line for line in lines])
+
+    def test_progress_bar_is_throttled(self):
+        logger = Logger(progress_interval=3600)
+        output = StringIO()
+        with redirect_stdout(output):
+            for i in range(1000):
+                logger.progress_bar(i + 1, 1000, 'working')
+            logger.progress_done()
+            logger.flush()
+        progress_updates = output.getvalue().split('\r')[1:]
+        assert len(progress_updates) == 3  # the first update, the complete update, and the finished update
+        assert progress_updates[-1].endswith('Finished\n')
+
+    def test_close_writes_and_releases_the_log_file(self):
+        _, log_file_path = mkstemp()
+        log_file = Path(log_file_path)
+        logger = Logger(log_file=log_file, mute_stdout=True)
+        logger.log("First")
+        writer = logger._writer
+        logger.close()
+        assert not writer.is_alive() and logger._handle.closed
+        assert "First" in log_file.read_text()
+        logger.log("Second")  # a closed logger starts a new writer, appending to the log file
+        logger.close()
+        assert log_file.read_text().count(" : ") == 2
+        logger.close()  # closing again does nothing
+
+    def test_static_progress_bar_uses_the_default_logger(self):
+        output = StringIO()
+        with redirect_stdout(output):
+            Logger.terminal_progress_bar(1, 2, 'static')
+            Logger.terminal_progress_done()
+            default_logger.flush()
+        assert output.getvalue().endswith('Finished\n')
+
+    def test_worker_process_messages_are_not_lost(self):
+        _, log_file_path = mkstemp()
+        log_file = Path(log_file_path)
+        worker = Process(target=log_in_worker, args=(log_file,))
+        worker.start()
+        worker.join()  # the worker process ends through os._exit, without running the exit hooks
+        assert "From a worker" in log_file.read_text()
@@ -1,11 +1,19 @@
+from argparse import ArgumentTypeError
 from contextlib import redirect_stdout
+from csv import reader
+from gzip import open as gzip_open
+from json import loads
 from os import devnull
 from pathlib import Path
+from subprocess import check_call
+from sys import executable
 from tempfile import mkdtemp
 
 from pytest import raises
 
-from energyplus_refactor_helper.main import run, show_usage
+from energyplus_refactor_helper.main import parse_sample, parse_shard, run, show_usage
+from energyplus_refactor_helper.report_output import expand_line_ranges
+from energyplus_refactor_helper.test.test_git_revision import set_up_repo
 
 
 class TestMainRun:
@@ -16,8 +24,112 @@ class TestMainRun:
         dummy_output_dir = mkdtemp()
         run(['error_call_refactor', fake_source_folder, dummy_output_dir])
 
+    def test_sharded_flow(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        shards_dir = Path(mkdtemp())
+        for shard in ['1/2', '2/2']:
+            shard_output_dir = str(shards_dir / shard.replace('/', '_of_'))
+            assert run(['error_call_refactor', fake_source_folder, shard_output_dir, '-s', '--shard', shard]) == 0
+        assert run(['merge_shards', str(shards_dir), mkdtemp()]) == 0
+
+    def test_compressed_sparse_flow(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        dense_dir = Path(mkdtemp())
+        assert run(['error_call_refactor', fake_source_folder, str(dense_dir), '-s']) == 0
+        shards_dir = Path(mkdtemp())
+        for shard in ['1/2', '2/2']:
+            shard_output_dir = str(shards_dir / shard.replace('/', '_of_'))
+            assert run(['error_call_refactor', fake_source_folder, shard_output_dir, '-s', '--shard', shard,
+                        '--compress', 'gzip', '--sparse-lines']) == 0
+        merged_dir = Path(mkdtemp())
+        assert run(['merge_shards', str(shards_dir), str(merged_dir), '--compress', 'gzip']) == 0
+        assert not (merged_dir / 'lines_summary.csv.gz').exists()
+        with gzip_open(merged_dir / 'results.json.gz', 'rt') as f:
+            assert loads(f.read()) == loads((dense_dir / 'results.json').read_text())
+        with gzip_open(merged_dir / 'lines_ranges.csv.gz', 'rt') as f:
+            ranges = list(reader(f))[1:]
+        dense_columns = list(zip(*reader((dense_dir / 'lines_summary.csv').read_text().splitlines())))
+        for name, line_count, file_ranges in ranges:
+            column = [v for v in next(c for c in dense_columns if c[0] == name)[1:] if v != '']
+            assert expand_line_ranges(int(line_count), file_ranges) == [int(v) for v in column]
+
+    def test_budget_flow(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        dummy_output_dir = Path(mkdtemp())
+        assert run(['error_call_refactor', fake_source_folder, str(dummy_output_dir), '-s', '--max-file-bytes', '200',
+                    '--max-file-calls', '2', '--max-parse-seconds', '30']) == 0
+        statuses = [line.split(',')[-1] for line in (dummy_output_dir / 'file_summary.csv').read_text().split()[1:]]
+        assert sorted(statuses) == ['complete', 'complete', 'complete', 'skipped']
+
+    def test_sampled_flow(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        dummy_output_dir = Path(mkdtemp())
+        assert run(['error_call_refactor', fake_source_folder, str(dummy_output_dir), '-s', '--sample', '0.5',
+                    '--sample-seed', '1']) == 0
+        summary = loads((dummy_output_dir / 'sample_summary.json').read_text())
+        assert summary['sampled_files'] == 2 and summary['total_files'] == 4
+        assert len((dummy_output_dir / 'file_summary.csv').read_text().split()) == 3
+        assert 'representative_near_duplicate_rate' in summary['estimates']
+
+    def test_revision_flow(self):
+        repo = str(set_up_repo())
+        assert run(['error_call_refactor', repo, mkdtemp(), '-s', '--rev', 'first']) == 0
+        assert run(['error_call_refactor', repo, mkdtemp(), '-s', '--rev', 'not_a_revision']) == 1
+        assert run(['error_call_refactor', repo, mkdtemp(), '-s', '-i', '--rev', 'first']) == 1
+        dry_run_output_dir = Path(mkdtemp())
+        assert run(['error_call_refactor', repo, str(dry_run_output_dir), '-s', '-i', '-n', '--rev', 'first']) == 0
+        assert '+++ b/src/EnergyPlus/test_file.cc' in (dry_run_output_dir / 'rewrite.patch').read_text()
+
+    def test_timings_and_profile(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        dummy_output_dir = Path(mkdtemp())
+        assert run(['index_calls', fake_source_folder, str(dummy_output_dir), '--profile']) == 0
+        phases = loads((dummy_output_dir / 'timings.json').read_text())['phases']
+        assert phases['discover']['items'] == 4
+        assert phases['scan']['count'] == 4
+        assert phases['run']['count'] == 1
+        assert (dummy_output_dir / 'profile.pstats').exists()
+
+    def test_trace_memory(self):
+        this_file = Path(__file__).resolve()
+        fake_source_folder = str(this_file.parent / 'fake_source_folder')
+        dummy_output_dir = Path(mkdtemp())
+        assert run(['index_calls', fake_source_folder, str(dummy_output_dir), '--trace-memory']) == 0
+        phases = loads((dummy_output_dir / 'memory.json').read_text())['phases']
+        assert phases['run']['peak'] >= phases['discover']['peak'] > 0
+        assert 'top_allocations' in phases['discover']
+        assert 'top_allocations' in phases['run']
+        assert phases['scan']['peak'] > 0
+
     def test_usage(self):
         with raises(SystemExit):
             with open(devnull, 'w') as f:
                 with redirect_stdout(f):
                     show_usage()
+
+    def test_heavy_dependencies_are_not_imported_up_front(self):
+        # this needs a fresh interpreter, as other tests will already have imported everything
+        check_call([executable, '-c', '\n'.join([
+            'import sys',
+            'from energyplus_refactor_helper.main import run',
+            'from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor',
+            'ErrorCallRefactor()',
+            'assert "spacy" not in sys.modules and "matplotlib" not in sys.modules, "Heavy module imported"',
+        ])])
+
+    def test_shard_parsing(self):
+        assert parse_shard('2/4') == (2, 4)
+        for bad_shard in ['0/4', '5/4', '1/0', 'one/four', '1']:
+            with raises(ArgumentTypeError):
+                parse_shard(bad_shard)
+
+    def test_sample_parsing(self):
+        assert parse_sample('0.25') == 0.25
+        for bad_sample in ['0', '1.5', '-0.5', 'half']:
+            with raises(ArgumentTypeError):
+                parse_sample(bad_sample)
@@ -0,0 +1,28 @@
+from energyplus_refactor_helper.perf_guard import collect_metrics, compare_metrics
+
+phases = {
+    'parse': {'wall_time': 2.0, 'cpu_time': 2.0, 'count': 1, 'items': 100},
+    'scan': {'wall_time': 1.5, 'cpu_time': 1.5, 'count': 100, 'items': 1000},
+    'tiny': {'wall_time': 0.001, 'cpu_time': 0.001, 'count': 1, 'items': 0},
+}
+memory = {'parse': {'peak': 1000, 'retained': 10}}
+
+
+def test_collect_metrics():
+    metrics = collect_metrics(phases, memory)
+    assert metrics['phases']['parse'] == {'wall_time': 2.0, 'peak_memory': 1000}
+    assert metrics['phases']['scan'] == {'wall_time': 1.5}
+    assert metrics['throughput'] == {'files_per_second': 50.0, 'calls_per_second': 500.0}
+    assert collect_metrics({'report.results_json': phases['tiny']})['throughput'] == {}
+
+
+def test_compare_metrics():
+    baseline = collect_metrics(phases, memory)
+    assert compare_metrics(baseline, baseline) == []
+    slower = collect_metrics({**phases, 'parse': {**phases['parse'], 'wall_time': 4.0},
+                              'tiny': {**phases['tiny'], 'wall_time': 0.01}}, {'parse': {'peak': 2000}})
+    regressions = compare_metrics(slower, baseline)
+    assert len(regressions) == 4  # the parse time, parse memory, and both throughputs, but not the tiny phase
+    assert regressions[0].startswith('Phase parse took 4.000s')
+    assert compare_metrics(slower, baseline, {'wall_time': 2.0, 'memory': 2.0, 'throughput': 0.9}) == []
+    assert compare_metrics(collect_metrics({'other': phases['tiny']}), baseline) == []
@@ -0,0 +1,66 @@
+from pathlib import Path
+from tempfile import mkdtemp
+from threading import Lock
+from time import sleep
+
+from energyplus_refactor_helper.prefetch import prefetch_sources, read_source, read_sources
+from energyplus_refactor_helper.timing import timer
+
+
+def _write_files(count: int) -> list[Path]:
+    folder = Path(mkdtemp())
+    files = []
+    for i in range(count):
+        files.append(folder / f"File{i:02d}.cc")
+        files[-1].write_bytes(f"line one {i}\r\nline two\n".encode())
+    return files
+
+
+class SlowReader:
+    def __init__(self):
+        self.lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.read_paths = []
+
+    def __call__(self, path: Path) -> str:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.read_paths.append(path)
+        sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return read_source(path)
+
+
+def test_read_source_normalizes_line_endings():
+    assert read_source(_write_files(1)[0]) == "line one 0\nline two\n"
+
+
+def test_prefetch_keeps_order_and_bounds_reads():
+    files = _write_files(20)
+    reader = SlowReader()
+    timer.reset()
+    results = list(prefetch_sources(files, read_ahead=4, read=reader))
+    assert [r[0] for r in results] == files
+    assert [r[1] for r in results] == [read_source(f) for f in files]
+    assert 1 < reader.max_in_flight <= 4
+    assert timer.phases['read_wait']['count'] == 20
+    assert list(prefetch_sources(files, read_ahead=0)) == results
+    assert list(prefetch_sources([])) == []
+
+
+def test_prefetch_stops_reading_when_the_consumer_stops():
+    files = _write_files(20)
+    reader = SlowReader()
+    for _ in zip(range(2), prefetch_sources(files, read_ahead=3, read=reader)):
+        pass
+    assert len(reader.read_paths) <= 5
+
+
+def test_bulk_read():
+    files = _write_files(10)
+    texts = read_sources(files, workers=3, batch_size=4)
+    assert texts == {f: read_source(f) for f in files}
+    assert read_sources([]) == {}
@@ -0,0 +1,47 @@
+from gzip import open as gzip_open
+from pathlib import Path
+from tempfile import mkdtemp
+
+from pytest import raises, skip
+
+from energyplus_refactor_helper.report_output import (
+    available_compressions, expand_line_ranges, find_report, line_ranges, open_report, report_file_name
+)
+
+
+def test_line_ranges_round_trip():
+    assert line_ranges([]) == ''
+    assert line_ranges([0, 0, 0]) == ''
+    assert line_ranges([0, 1, 1, 0, 1]) == '2-3 5'
+    assert line_ranges(['1', '0', '3', '3']) == '1 3-4'
+    distribution = [0, 1, 1, 1, 0, 0, 1, 0, 1, 1]
+    assert expand_line_ranges(len(distribution), line_ranges(distribution)) == distribution
+    assert expand_line_ranges(3, '') == [0, 0, 0]
+
+
+def test_gzip_report_round_trip():
+    output_dir = Path(mkdtemp())
+    assert 'gzip' in available_compressions()
+    assert report_file_name('results.json') == 'results.json'
+    assert report_file_name('results.json', 'gzip') == 'results.json.gz'
+    assert find_report(output_dir, 'results.json') is None
+    report = output_dir / report_file_name('lines_summary.csv', 'gzip')
+    with open_report(report, 'w') as f:
+        f.write("a,b\n1,2\n")
+    with gzip_open(report, 'rt') as f:
+        assert f.read() == "a,b\n1,2\n"
+    assert find_report(output_dir, 'lines_summary.csv') == report
+    with open_report(find_report(output_dir, 'lines_summary.csv')) as f:
+        assert f.read() == "a,b\n1,2\n"
+
+
+def test_zstd_report_round_trip():
+    report = Path(mkdtemp()) / report_file_name('results.json', 'zstd')
+    if 'zstd' not in available_compressions():
+        with raises(ImportError):
+            open_report(report, 'w')
+        skip("zstandard is not installed")
+    with open_report(report, 'w') as f:  # pragma: no cover
+        f.write('{"a": 1}')
+    with open_report(report) as f:  # pragma: no cover
+        assert f.read() == '{"a": 1}'
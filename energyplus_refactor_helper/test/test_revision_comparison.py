@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from energyplus_refactor_helper.revision_comparison import compare_groups, compare_revisions, group_key, keyed_group
+from energyplus_refactor_helper.source_file import SourceFile
+
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def source_file(text: str) -> SourceFile:
+    return SourceFile(Path('file.cc'), funcs, text)
+
+
+def keyed_groups(text: str) -> list[tuple[str, dict]]:
+    return [keyed_group(g) for g in source_file(text).found_function_groups]
+
+
+def test_group_key_ignores_formatting_and_position():
+    one = source_file('ShowSevereError(state, "A");\n')
+    two = source_file('int x = 1;\n\nShowSevereError(state,\n    "A");\n')
+    assert group_key(one.found_function_groups[0]) == group_key(two.found_function_groups[0])
+
+
+def test_compare_groups():
+    old = keyed_groups('ShowSevereError(s, "A");\nx;\nShowSevereError(s, "B");\nx;\nShowSevereError(s, "C");\n')
+    new = keyed_groups('ShowSevereError(s, "A");\nx;\nShowSevereError(s, "B2");\nx;\nShowWarningError(s, "D");\n'
+                       'x;\nShowWarningError(s, "E");\n')
+    differences = compare_groups(old, new)
+    assert len(differences['changed']) == 2
+    assert len(differences['added']) == 1
+    assert len(differences['removed']) == 0
+    assert differences['changed'][0]['from']['summary']['concatenated_messages'] == '"B"'
+    assert differences['changed'][0]['to']['summary']['concatenated_messages'] == '"B2"'
+    assert differences['added'][0]['summary']['concatenated_messages'] == '"E"'
+    differences = compare_groups(new, [])
+    assert len(differences['removed']) == 4
+
+
+def test_compare_revisions_skips_identical_content():
+    same = keyed_groups('ShowSevereError(s, "A");\n')
+    old_file = keyed_groups('ShowSevereError(s, "B");\n')
+    new_file = keyed_groups('ShowSevereError(s, "B");\nShowContinueError(s, "C");\n')
+    old_files = {'same.cc': ('1', same), 'changed.cc': ('2', old_file), 'removed.cc': ('3', old_file)}
+    new_files = {'same.cc': ('1', same), 'changed.cc': ('4', new_file), 'reformatted.cc': ('5', same)}
+    comparison = compare_revisions(old_files, new_files)
+    assert list(comparison['files']) == ['changed.cc', 'reformatted.cc', 'removed.cc']
+    assert comparison['summary'] == {'files_changed': 3, 'groups_added': 1, 'groups_removed': 1, 'groups_changed': 1}
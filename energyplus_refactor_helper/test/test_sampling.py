@@ -0,0 +1,63 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
+from pytest import approx, raises
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.sampling import FileSample, estimate_proportion
+from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+
+
+def test_sample_is_reproducible_and_stratified():
+    files = [Path(f"File{i:02d}.cc") for i in range(40)]
+    sizes = {f: i * 100 for i, f in enumerate(files)}
+    sample = FileSample(files, 0.25, seed=3, sizes=sizes)
+    assert sample.files == FileSample(files, 0.25, seed=3, sizes=sizes).files
+    assert sample.files != FileSample(files, 0.25, seed=4, sizes=sizes).files
+    assert len(sample.files) == 10
+    assert sample.total_file_count == 40
+    assert [len(s) for s in sample.strata] == [10, 10, 10, 10]
+    assert [len(s) for s in sample.sampled_strata] == [2, 3, 2, 3]
+    for stratum, sampled in zip(sample.strata, sample.sampled_strata):
+        assert set(sampled) <= set(stratum)
+    with raises(ValueError):
+        FileSample(files, 0)
+    with raises(ValueError):
+        FileSample(files, 1.5)
+
+
+def test_estimate_total():
+    files = [Path(f"File{i:02d}.cc") for i in range(20)]
+    full = FileSample(files, 1.0)
+    assert full.estimate_total({f: 3 for f in files}) == {'estimate': 60, 'low': 60, 'high': 60}
+    sample = FileSample(files, 0.5, seed=1)
+    values = {f: i for i, f in enumerate(files)}
+    estimate = sample.estimate_total({f: values[f] for f in sample.files})
+    assert estimate['low'] < estimate['estimate'] < estimate['high']
+    assert estimate['estimate'] == approx(20 * sum(values[f] for f in sample.files) / len(sample.files))
+
+
+def test_estimate_proportion():
+    assert estimate_proportion(0, 0) == {'estimate': 0.0, 'low': 0.0, 'high': 1.0}
+    no_successes = estimate_proportion(0, 50)
+    assert no_successes['estimate'] == 0 and no_successes['low'] == 0 and 0 < no_successes['high'] < 0.1
+    half = estimate_proportion(50, 100)
+    assert half['estimate'] == 0.5
+    assert half['low'] == approx(0.404, abs=0.001) and half['high'] == approx(0.596, abs=0.001)
+
+
+def test_sample_summary():
+    root = Path(mkdtemp())
+    generate_corpus(root, 12, groups_per_file=4)
+    source_folder = SourceFolder(root / 'src' / 'EnergyPlus', ErrorCallRefactor.function_calls())
+    files = source_folder.find_files()
+    sample = source_folder.sample_files(files, 0.5, seed=2)
+    assert sample.files == source_folder.sample_files(list(reversed(files)), 0.5, seed=2).files
+    processed_files = source_folder.analyze_source_files(sample.files)
+    compares = {('a', 'b', 0.95), ('a', 'c', 0.5), ('b', 'c', 0.2), ('a', 'd', 0.1)}
+    summary = source_folder.generate_sample_summary(processed_files, sample, root / 'sample_summary.json', compares)
+    assert summary['sampled_files'] == 6 and summary['total_files'] == 12
+    assert summary['estimates']['groups']['estimate'] == approx(48)
+    assert summary['estimates']['representative_near_duplicate_rate']['estimate'] == 0.25
+    assert (root / 'sample_summary.json').exists()
@@ -0,0 +1,66 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.similarity import (
+    block_key, blocked_pairs, compare_messages, emitted_template, group_by_template, message_template,
+    write_comparisons, write_template_frequencies
+)
+
+
+class FakeDoc:
+    def __init__(self, text: str):
+        self.text = text
+
+    def similarity(self, other: 'FakeDoc') -> float:
+        return 1.0 if self.text[0] == other.text[0] else 0.0
+
+
+def test_templates_collapse_arguments():
+    first = 'emitErrorMessages(state, -999, {format("{}=\\"{}\\" bad", RoutineName, ' \
+            'state.dataIPShortCut->cCurrentModuleObject, state.dataIPShortCut->cAlphaArgs(1))}, true);'
+    second = 'emitErrorMessages(state, -999, {fmt::format("{}=\\"{:.2f}\\"  " "bad", Routine, ' \
+             'CurrentModuleObject, cAlphaArgs(2))}, true);'
+    assert message_template(first) == message_template(second)
+    expected = 'emitErrorMessages(<arg>, <arg>, {format("{}=\\"{}\\" bad", <arg>, <arg>, <arg>)}, true);'
+    assert message_template(first) == expected
+    assert message_template('f(state, R"(raw)");') == 'f(<arg>, "raw");'
+    assert message_template('f(state, "Different words");') != message_template('f(state, "Other words");')
+
+
+def test_group_by_template_and_reports():
+    texts = ['f(state, x, "A");', 'f(state, y, "A");', 'f(state, "B");', 'f(state, z, "A");']
+    templates = group_by_template(texts)
+    assert list(templates.values()) == [['f(state, x, "A");', 'f(state, y, "A");', 'f(state, z, "A");'],
+                                        ['f(state, "B");']]
+    output_dir = Path(mkdtemp())
+    write_template_frequencies(templates, output_dir / 'template_frequency.csv')
+    lines = (output_dir / 'template_frequency.csv').read_text().split('\n')
+    assert lines[0] == 'Count,Template,Example'
+    assert lines[1].startswith('3,')
+    counts = {t[0]: len(t) for t in templates.values()}
+    compares = compare_messages([FakeDoc(t) for t in counts])
+    assert len(compares) == 1
+    write_comparisons(compares, output_dir / 'comparisons.txt', counts=counts)
+    assert (output_dir / 'comparisons.txt').read_text().strip().endswith('3 😊 1')
+
+
+def test_blocking():
+    assert emitted_template('emitErrorMessages(state, -999, {"a", "b"}, true);') == 'emitErrorMessages(true)'
+    assert emitted_template(' emitWarningMessage(state, -999, "a");') == 'emitWarningMessage'
+    assert emitted_template('"not a call"') == ''
+    texts = [
+        'emitErrorMessages(state, -999, {"a", "b"}, true);',
+        'emitErrorMessage(state, -999, "c", true);',
+        'emitErrorMessages(state, -999, {"d", "e"}, true);',
+        'emitWarningMessage(state, -999, "f");',
+        'emitErrorMessages(state, -999, {"g"}, false);',
+    ]
+    keys = [block_key(t) for t in texts]
+    assert keys[0] == ('emitErrorMessages(true)', ())
+    assert blocked_pairs(keys) == [(0, 2), (0, 1), (1, 2)]
+    assert blocked_pairs(keys, adjacent_blocks=[]) == [(0, 2)]
+    # the same template with a different call pattern is still compared, after the pairs with the same pattern
+    patterned = [block_key(texts[0], [0, 1, 2]), block_key(texts[2], [0, 2]), block_key(texts[0], [0, 2])]
+    assert blocked_pairs(patterned) == [(1, 2), (0, 1), (0, 2)]
+    compares = compare_messages([FakeDoc(t) for t in texts], keys)
+    assert {(c[0], c[1]) for c in compares} == {(texts[0], texts[2]), (texts[0], texts[1]), (texts[1], texts[2])}
@@ -0,0 +1,46 @@
+from gzip import compress
+from pathlib import Path
+from pickle import dumps
+from tempfile import mkdtemp
+
+from pytest import raises
+
+from energyplus_refactor_helper.snapshot import AnalysisSnapshot
+from energyplus_refactor_helper.source_folder import SourceFolder
+
+this_file = Path(__file__).resolve()
+fake_source_folder = this_file.parent / 'fake_source_folder' / 'src' / 'EnergyPlus'
+funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
+
+
+def test_snapshot_round_trip():
+    sf = SourceFolder(fake_source_folder, funcs)
+    source_files = sf.analyze_source_files(sf.find_files())
+    snapshot_file = Path(mkdtemp()) / AnalysisSnapshot.FILE_NAME
+    messages = {'test_file.cc': ['first message', 'second message']}
+    AnalysisSnapshot(fake_source_folder, funcs, source_files, messages, {'first message': [0, 1]}).write(snapshot_file)
+    snapshot = AnalysisSnapshot.load(snapshot_file)
+    assert snapshot.root == fake_source_folder and snapshot.functions == funcs
+    assert snapshot.source_folder.function_call_list == funcs
+    assert snapshot.messages == messages and snapshot.call_patterns == {'first message': [0, 1]}
+    for original, loaded in zip(source_files, snapshot.source_files):
+        assert loaded.path == original.path
+        assert loaded.original_file_text is None
+        assert loaded.function_distribution == original.function_distribution
+        assert loaded.advanced_function_distribution == original.advanced_function_distribution
+        assert [g.to_json() for g in loaded.found_function_groups] == [
+            g.to_json() for g in original.found_function_groups
+        ]
+
+    source_size = sum(len(s.original_file_text.encode()) for s in source_files)
+    assert snapshot_file.stat().st_size < source_size  # the source text itself is not stored
+
+
+def test_snapshot_format_is_checked():
+    snapshot_file = Path(mkdtemp()) / AnalysisSnapshot.FILE_NAME
+    snapshot_file.write_bytes(compress(dumps({'format_version': 0})))
+    with raises(ValueError):
+        AnalysisSnapshot.load(snapshot_file)
+    snapshot_file.write_bytes(dumps({'format_version': AnalysisSnapshot.FORMAT_VERSION}))  # not compressed
+    with raises(ValueError):
+        AnalysisSnapshot.load(snapshot_file)
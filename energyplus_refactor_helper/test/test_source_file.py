@@ -1,6 +1,9 @@
 from pathlib import Path
 from tempfile import mkstemp
 
+from pytest import raises
+
+from energyplus_refactor_helper.file_budget import FileBudget
 from energyplus_refactor_helper.function_call import FunctionCall
 from energyplus_refactor_helper.function_call_group import FunctionCallGroup
 from energyplus_refactor_helper.source_file import SourceFile
@@ -14,6 +17,7 @@ def test_basic_operation():
     sf = SourceFile(test_file, funcs)
     sf.find_functions_in_original_text()
     assert len(sf.found_functions) == 9
+    assert [g.cleaned_call_types() for g in sf.found_function_groups] == [[0, 1], [1, 2], [0], [3, 1], [0]]
 
 
 def test_complex_ish_file():
@@ -159,3 +163,45 @@ def test_new_file_text_group_based():
     sf = SourceFile(p, funcs)
     sf.write_new_text_to_file(f_group_visitor, True)
     assert "sx" in p.read_text()
+
+
+def test_new_file_text_chained():
+    sf = SourceFile(test_file, funcs)
+    severe_only = [(lambda f: 'Severe();' if f.call_type == 0 else None, False)]
+    fatal_groups = [(lambda g: 'Fatal();' if 2 in g.cleaned_call_types() else None, True)]
+    new_text = sf.get_new_file_text_chained(severe_only + fatal_groups)
+    assert new_text.count('Severe();') == 3 and new_text.count('Fatal();') == 1
+    assert 'ShowFatalError' not in new_text and 'ShowSevereError' not in new_text
+    assert sf.get_new_file_text_chained([]) == sf.original_file_text
+    with raises(ValueError, match='Overlapping edits'):
+        sf.get_new_file_text_chained([(f_visitor, False), (f_group_visitor, True)])
+
+
+def test_budgets():
+    assert SourceFile(test_file, funcs, budget=FileBudget(10000, 9, 10.0)).status == FileBudget.COMPLETE
+    skipped = SourceFile(test_file, funcs, budget=FileBudget(max_bytes=100))
+    assert skipped.status == FileBudget.SKIPPED
+    assert skipped.found_functions == []
+    assert skipped.get_new_file_text(lambda g: '', True) == skipped.original_file_text == ''
+    skipped.write_new_text_to_file(lambda g: '', True)  # a skipped file was never read, so it is not rewritten
+    assert test_file.read_text().count('ShowSevereError') == 3
+    unread = SourceFile(test_file.parent / 'missing.cc', funcs, budget=FileBudget(max_bytes=100), size=101)
+    assert unread.status == FileBudget.SKIPPED and unread.file_lines == []
+    partial = SourceFile(test_file, funcs, budget=FileBudget(max_calls=3))
+    assert partial.status == FileBudget.PARTIAL
+    assert len(partial.found_functions) == 3
+    long_text = 'int x = 1;\n' * 200 + 'ShowFatalError(state, "Too late");\n'
+    timed_out = SourceFile(test_file, funcs, long_text, FileBudget(max_parse_seconds=0.0))
+    assert timed_out.status == FileBudget.PARTIAL
+    assert timed_out.found_functions == []
+
+
+def test_non_utf8_bytes_round_trip():
+    _, name = mkstemp(suffix='.cc')
+    path = Path(name)
+    raw = b'// caf\xe9 in latin-1\r\nShowFatalError(state, "Stop");\r\n'
+    path.write_bytes(raw)
+    sf = SourceFile(path, funcs)
+    assert len(sf.found_functions) == 1
+    sf.write_chained_text_to_file([(lambda f: 'ShowFatalError(state, "Done");', False)])
+    assert path.read_bytes() == raw.replace(b'\r\n', b'\n').replace(b'Stop', b'Done')
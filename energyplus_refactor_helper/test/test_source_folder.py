@@ -1,9 +1,14 @@
+from json import loads
 from shutil import copytree
 import tempfile
 from pathlib import Path
 from tempfile import mkdtemp
 
+from pytest import raises
+
+from energyplus_refactor_helper.file_budget import FileBudget
 from energyplus_refactor_helper.source_folder import SourceFolder
+from energyplus_refactor_helper.test.test_git_revision import git, set_up_repo
 
 funcs = ['ShowSevereError', 'ShowContinueError', 'ShowFatalError', 'ShowWarningError']
 
@@ -38,6 +43,43 @@ class TestSourceFolder:
         output_files_found = list(dummy_output_folder.glob('*'))
         assert len(output_files_found) > 0
 
+    def test_reports_with_plot_and_failure(self):
+        fake_source_folder, dummy_output_folder = TestSourceFolder.set_up_dirs()
+        sf = SourceFolder(fake_source_folder, funcs)
+        processed_source_files = sf.analyze_source_files(sf.find_files(['file_to_ignore.cc']))
+        assert sf.generate_reports(processed_source_files, dummy_output_folder, skip_plots=False) == []
+        assert (dummy_output_folder / 'distribution_plot.png').exists()
+        summary = (dummy_output_folder / 'file_summary.csv').read_text().split('\n')
+        assert summary[0] == 'File,Good,Bad,Status'
+        assert all(line.endswith(',complete') for line in summary[1:-1])
+        assert len(summary) == 5  # header, three files, and the trailing new line
+
+        def failing_report(_processed_files, _output_file):
+            raise ValueError('broken')
+
+        sf.generate_json_outputs = failing_report
+        broken_output_folder = dummy_output_folder / 'broken'
+        assert sf.generate_reports(processed_source_files, broken_output_folder, skip_plots=True) == ['results.json']
+        assert not sf.success
+        assert (broken_output_folder / 'file_summary.csv').exists()
+
+    def test_paged_results_match_full_results(self):
+        fake_source_folder, dummy_output_folder = TestSourceFolder.set_up_dirs()
+        sf = SourceFolder(fake_source_folder, funcs)
+        processed_source_files = sf.analyze_source_files(sf.find_files(['file_to_ignore.cc']))
+        assert sf.generate_reports(processed_source_files, dummy_output_folder, True, results_page_size=2) == []
+        pages_folder = dummy_output_folder / 'results_pages'
+        index = loads((pages_folder / 'index.json').read_text())
+        assert index['page_size'] == 2 and index['chunks'] == ['00000.json', '00001.json']
+        assert sorted(p.name for p in pages_folder.iterdir()) == ['00000.json', '00001.json', 'index.json']
+        full_results = loads((dummy_output_folder / 'results.json').read_text())
+        for relative_path, entry in index['files'].items():
+            groups = loads((pages_folder / entry['chunk']).read_text())[relative_path]
+            assert groups == full_results[relative_path.split('/')[-1]]
+            assert entry['groups'] == len(groups)
+            assert entry['calls'] == sum(len(g['original']) for g in groups) and entry['status'] == 'complete'
+        assert index['files']['test_file.cc']['calls'] == 9
+
     def test_it_creates_output_folder_if_not_exists(self):
         src_folder, dummy_output_folder = TestSourceFolder.set_up_dirs()
         nonexistent_dummy_output_folder = dummy_output_folder / 'dummy'
@@ -53,6 +95,22 @@ class TestSourceFolder:
         args = ', '.join(f.parse_arguments())
         return f"ShowSevereError({args});"
 
+    def test_dry_run_patch_matches_edit_in_place(self):
+        repo = set_up_repo()
+        (repo / 'src' / 'EnergyPlus' / 'no_trailing_newline.cc').write_text('ShowFatalError(\n    state, "End");')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-q', '-m', 'third')
+        sf = SourceFolder(repo / 'src' / 'EnergyPlus', funcs)
+        processed_source_files = sf.analyze_source_files(sf.find_files())
+        patch_file = Path(mkdtemp()) / 'rewrite.patch'
+        assert sf.write_rewrite_patch(processed_source_files, self.function_visitor, False, repo, patch_file) == 2
+        assert 'a/src/EnergyPlus/no_trailing_newline.cc' in patch_file.read_text()
+        sf.rewrite_files_in_place(processed_source_files, self.function_visitor, False)
+        edited_texts = {s.path: s.path.read_text() for s in processed_source_files}
+        git(repo, 'checkout', '-q', '.')
+        git(repo, 'apply', str(patch_file))
+        assert {s.path: s.path.read_text() for s in processed_source_files} == edited_texts
+
     def test_edit_in_place_workflow(self):
         new_scratch_dir = Path(tempfile.mkdtemp()) / 'new_scratch_dir'
         test_source_dir, _ = TestSourceFolder.set_up_dirs()
@@ -69,3 +127,63 @@ class TestSourceFolder:
         assert file_to_check.exists()
         file_text = file_to_check.read_text()
         assert 'ShowSevereError(state, "Something Bad");' in file_text  # it should have rewritten as a single line
+
+    def test_chained_rewrite_matches_single_visitor(self):
+        test_source_dir, _ = TestSourceFolder.set_up_dirs()
+        single_dir = Path(tempfile.mkdtemp()) / 'single'
+        chained_dir = Path(tempfile.mkdtemp()) / 'chained'
+        copytree(test_source_dir, single_dir)
+        copytree(test_source_dir, chained_dir)
+        single = SourceFolder(single_dir, funcs)
+        single.rewrite_files_in_place(single.analyze_source_files(single.find_files()), self.function_visitor, False)
+        chained = SourceFolder(chained_dir, funcs)
+        severe_only = [(lambda f: self.function_visitor(f) if f.call_type == 0 else None, False)]
+        others = [(lambda f: None if f.call_type == 0 else self.function_visitor(f), False)]
+        chained.rewrite_files_in_place_chained(chained.analyze_source_files(chained.find_files()), severe_only + others)
+        for single_file in single_dir.rglob('*.cc'):
+            assert (chained_dir / single_file.relative_to(single_dir)).read_text() == single_file.read_text()
+
+    def test_byte_budget_uses_the_stored_size(self):
+        folder = Path(mkdtemp())
+        (folder / 'Windows.cc').write_bytes(b'ShowFatalError(state, "Line");\r\n' * 40)  # 1280 bytes on disk
+        for read_ahead in [0, 8]:
+            sf = SourceFolder(folder, funcs, budget=FileBudget(max_bytes=1250), read_ahead=read_ahead)
+            assert sf.read_within_budget(folder / 'Windows.cc') == (None, 1280)
+            source_file = sf.analyze_source_files(sf.find_files())[0]
+            assert source_file.status == FileBudget.SKIPPED
+            assert source_file.status_reason == '1280 bytes is over the limit of 1250'
+
+    def test_shard_files_partitions_deterministically(self):
+        fake_source_folder, _ = TestSourceFolder.set_up_dirs()
+        sf = SourceFolder(fake_source_folder, funcs)
+        all_files = sf.find_files()
+        shards = [sf.shard_files(all_files, i, 3) for i in range(1, 4)]
+        assert sorted([f for shard in shards for f in shard]) == sorted(all_files)
+        assert sf.shard_files(list(reversed(all_files)), 2, 3) == shards[1]
+        with raises(ValueError):
+            sf.shard_files(all_files, 0, 3)
+        with raises(ValueError):
+            sf.shard_files(all_files, 4, 3)
+
+    def test_merged_shard_reports_match_single_run(self):
+        fake_source_folder, dummy_output_folder = TestSourceFolder.set_up_dirs()
+        sf = SourceFolder(fake_source_folder, funcs)
+        matched_source_files = sf.find_files(['file_to_ignore.cc'])
+        full_output_folder = dummy_output_folder / 'full'
+        sf.generate_reports(sf.analyze_source_files(matched_source_files), full_output_folder, skip_plots=True)
+        shards_folder = dummy_output_folder / 'shards'
+        shards_folder.mkdir()
+        for shard_index in range(1, 3):
+            shard_output_folder = shards_folder / f"shard_{shard_index}"
+            shard_files = sf.shard_files(matched_source_files, shard_index, 2)
+            processed_source_files = sf.analyze_source_files(shard_files)
+            sf.generate_reports(processed_source_files, shard_output_folder, skip_plots=True)
+            sf.generate_shard_manifest(processed_source_files, shard_output_folder / 'shard.json', (shard_index, 2))
+        merged_output_folder = dummy_output_folder / 'merged'
+        shard_dirs = sorted(shards_folder.iterdir())
+        merged_files = SourceFolder.merge_shard_reports(shard_dirs, merged_output_folder)
+        assert len(merged_files) == 3
+        for report in ['results.json', 'file_summary.csv', 'lines_summary.csv']:
+            assert (merged_output_folder / report).read_text() == (full_output_folder / report).read_text()
+        with raises(ValueError):
+            SourceFolder.merge_shard_reports(shard_dirs[:1], merged_output_folder)
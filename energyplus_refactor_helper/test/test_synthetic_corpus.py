@@ -0,0 +1,25 @@
+from pathlib import Path
+from tempfile import mkdtemp
+
+from energyplus_refactor_helper.actions.error_calls import ErrorCallRefactor
+from energyplus_refactor_helper.source_file import SourceFile
+from energyplus_refactor_helper.synthetic_corpus import generate_corpus
+
+
+def test_corpus_is_deterministic():
+    first_files = generate_corpus(Path(mkdtemp()), 3, groups_per_file=5)
+    second_files = generate_corpus(Path(mkdtemp()), 4, groups_per_file=5)
+    assert [f.name for f in first_files] == [f.name for f in second_files[:3]]
+    assert [f.read_text() for f in first_files] == [f.read_text() for f in second_files[:3]]
+    other_seed_files = generate_corpus(Path(mkdtemp()), 1, groups_per_file=5, seed=1)
+    assert other_seed_files[0].read_text() != first_files[0].read_text()
+
+
+def test_corpus_parses_into_groups():
+    files = generate_corpus(Path(mkdtemp()), 2, groups_per_file=12)
+    assert all(f.parent.parts[-2:] == ('src', 'EnergyPlus') for f in files)
+    for file in files:
+        source_file = SourceFile(file, ErrorCallRefactor.function_calls())
+        assert len(source_file.found_function_groups) == 12
+        assert all(f.appears_successful for f in source_file.found_functions)
+        assert any('format(' in f.multiline_text[0] for f in source_file.found_functions)
@@ -0,0 +1,81 @@
+from json import loads
+from pathlib import Path
+from tempfile import mkdtemp
+from threading import Thread
+
+from pytest import raises
+
+from energyplus_refactor_helper.timing import PhaseTimer
+
+
+def test_phases_accumulate():
+    timer = PhaseTimer()
+    with timer.phase('outer', 1):
+        for i in range(3):
+            with timer.phase('inner') as span:
+                span.items = i
+    assert list(timer.phases) == ['inner', 'outer']
+    assert timer.phases['inner']['count'] == 3
+    assert timer.phases['inner']['items'] == 3
+    assert timer.phases['outer']['items'] == 1
+    assert timer.phases['outer']['wall_time'] >= timer.phases['inner']['wall_time']
+    output_file = Path(mkdtemp()) / 'timings.json'
+    timer.write(output_file)
+    assert loads(output_file.read_text())['phases']['inner']['count'] == 3
+    timer.reset()
+    assert timer.phases == {}
+
+
+def test_phase_is_recorded_when_it_raises():
+    timer = PhaseTimer()
+    with raises(ValueError):
+        with timer.phase('failing'):
+            raise ValueError()
+    assert timer.phases['failing']['count'] == 1
+
+
+def test_memory_tracing():
+    timer = PhaseTimer()
+    timer.start_memory_tracing(top_site_count=3)
+    try:
+        with timer.phase('outer'):
+            with timer.phase('allocate'):
+                with timer.phase('innermost'):
+                    pass
+                kept = [bytearray(1000) for _ in range(1000)]
+            with timer.phase('temporary'):
+                _ = [bytearray(1000) for _ in range(2000)]
+    finally:
+        timer.stop_memory_tracing()
+    assert timer.memory['allocate']['retained'] >= 1000 * 1000
+    assert timer.memory['temporary']['peak'] - timer.memory['allocate']['peak'] >= 1000 * 1000
+    assert timer.memory['outer']['peak'] >= timer.memory['temporary']['peak']
+    assert len(timer.memory['outer']['top_allocations']) == 3
+    assert 'top_allocations' in timer.memory['allocate']
+    assert 'top_allocations' not in timer.memory['innermost']
+    output_file = Path(mkdtemp()) / 'memory.json'
+    timer.write_memory(output_file)
+    assert loads(output_file.read_text())['phases']['allocate']['retained'] >= 1000 * 1000
+    assert len(kept) == 1000
+
+
+def test_memory_peak_is_kept_when_another_thread_starts_a_phase():
+    timer = PhaseTimer()
+
+    def small_report():
+        with timer.phase('report.small'):
+            pass
+
+    timer.start_memory_tracing(top_site_count=0)
+    try:
+        with timer.phase('report.large'):
+            temporary = [bytearray(1000) for _ in range(2000)]
+            del temporary
+            # a report starting on another thread resets the peak, which must not lower the peak of this phase
+            worker = Thread(target=small_report)
+            worker.start()
+            worker.join()
+    finally:
+        timer.stop_memory_tracing()
+    assert timer.memory['report.large']['peak'] >= 2000 * 1000
+    assert timer.memory['report.small']['peak'] < 2000 * 1000
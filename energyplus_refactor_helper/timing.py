@@ -0,0 +1,181 @@
+import tracemalloc
+from contextlib import contextmanager
+from json import dumps
+from pathlib import Path
+from threading import local, Lock
+from time import perf_counter, process_time
+from typing import Iterator
+
+
+class PhaseSpan:
+    def __init__(self, items: int):
+        """
+        The PhaseSpan class is handed out for each timed phase, so the code inside the phase can update the number of
+        items processed once it is known.
+
+        :param items: The initial number of items processed in this phase.
+        """
+        self.items = items
+        self.memory_start = 0
+        self.memory_peak = 0
+        self.memory_depth = 0  # the number of phases already open on the thread of this phase when it started
+
+
+class PhaseTimer:
+    def __init__(self):
+        """
+        The PhaseTimer class records the wall time, CPU time, and item counts of the named phases of a run, such as
+        discovering files, parsing them, or writing each report.  A phase that is timed more than once, for example
+        once per file, accumulates into a single record, along with the number of times it was timed.  Phases may be
+        nested, in which case the time of the inner phase is also counted in the outer phase.  The CPU time is the
+        process CPU time, so it includes any threads working during the phase.
+
+        Memory tracing can also be turned on, in which case the peak and retained traced memory of each phase are
+        recorded as well, along with the top allocation sites still alive at the end of the outermost phases.  Taking
+        the allocation sites is slow, so for phases timed more than once, such as once per file, they are only taken
+        the first time.  Note that tracemalloc tracks the whole process, with a single peak, so the peak of a phase
+        running concurrently with phases on other threads, such as the reports written on a thread pool, also includes
+        the memory allocated by those phases.
+        """
+        self.phases: dict[str, dict] = {}
+        self.memory: dict[str, dict] = {}
+        self.trace_memory = False
+        self.top_site_count = 10
+        self._lock = Lock()
+        self._open_spans: list[PhaseSpan] = []  # the open spans of every thread, guarded by the lock
+        self._thread_depth = local()  # the number of open spans on each thread
+
+    def reset(self) -> None:
+        """
+        Discards all recorded phases, to start timing a new run.
+
+        :return: None
+        """
+        with self._lock:
+            self.phases = {}
+            self.memory = {}
+
+    def start_memory_tracing(self, top_site_count: int = 10) -> None:
+        """
+        Starts tracemalloc and turns on memory recording for every phase timed afterward.  Tracing memory slows down
+        the run considerably, so this is only meant for investigating memory use.
+
+        :param top_site_count: The number of top allocation sites to record for each outermost phase, or 0 to only
+                               record the peak and retained memory, which is much faster.
+        :return: None
+        """
+        self.top_site_count = top_site_count
+        self.trace_memory = True
+        tracemalloc.start()
+
+    def stop_memory_tracing(self) -> None:
+        """
+        Stops tracemalloc and turns off memory recording.  The memory already recorded is kept until reset.
+
+        :return: None
+        """
+        self.trace_memory = False
+        tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str, items: int = 0) -> Iterator[PhaseSpan]:
+        """
+        A context manager that times the code inside it as the named phase.
+
+        :param name: The name of the phase, such as parse or report.results_json.
+        :param items: The number of items processed in this phase, which can be updated through the returned span.
+        :return: A PhaseSpan instance, whose items attribute is recorded when the phase ends.
+        """
+        span = PhaseSpan(items)
+        trace_memory = self.trace_memory
+        if trace_memory:
+            self._start_memory_span(span)
+        wall_start = perf_counter()
+        cpu_start = process_time()
+        try:
+            yield span
+        finally:
+            wall_time = perf_counter() - wall_start
+            cpu_time = process_time() - cpu_start
+            with self._lock:
+                record = self.phases.setdefault(name, {'wall_time': 0.0, 'cpu_time': 0.0, 'count': 0, 'items': 0})
+                record['wall_time'] += wall_time
+                record['cpu_time'] += cpu_time
+                record['count'] += 1
+                record['items'] += span.items
+            if trace_memory:
+                self._end_memory_span(name, span)
+
+    def _start_memory_span(self, span: PhaseSpan) -> None:
+        """
+        Records the traced memory at the start of a phase.  The tracemalloc peak is reset so the peak of this phase can
+        be measured, and there is only one peak for the whole process, so the peak reached so far is first folded into
+        every phase that is still open, on any thread.
+
+        :param span: The span of the phase that is starting.
+        :return: None
+        """
+        span.memory_depth = getattr(self._thread_depth, 'depth', 0)
+        self._thread_depth.depth = span.memory_depth + 1
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for open_span in self._open_spans:
+                open_span.memory_peak = max(open_span.memory_peak, peak)
+            tracemalloc.reset_peak()
+            span.memory_start = current
+            span.memory_peak = current
+            self._open_spans.append(span)
+
+    def _end_memory_span(self, name: str, span: PhaseSpan) -> None:
+        """
+        Records the peak and retained traced memory of a phase that is ending, and the top allocation sites if this is
+        the first time an outermost phase, or a phase directly inside an outermost phase, has ended.
+
+        :param name: The name of the phase that is ending.
+        :param span: The span of the phase that is ending.
+        :return: None
+        """
+        self._thread_depth.depth = span.memory_depth
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            self._open_spans.remove(span)
+        top_sites = None
+        if self.top_site_count and span.memory_depth <= 1 and name not in self.memory:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__)
+            ])
+            top_sites = [
+                {'site': str(s.traceback), 'size': s.size, 'count': s.count}
+                for s in snapshot.statistics('lineno')[:self.top_site_count]
+            ]
+        with self._lock:
+            record = self.memory.setdefault(name, {'peak': 0, 'retained': 0})
+            record['peak'] = max(record['peak'], span.memory_peak, peak)
+            record['retained'] += current - span.memory_start
+            if top_sites is not None:
+                record['top_allocations'] = top_sites
+
+    def write(self, output_file: Path) -> None:
+        """
+        Writes all recorded phases to a JSON file, in the order each phase first finished.
+
+        :param output_file: The output file path to write.
+        :return: None
+        """
+        with self._lock:
+            output_file.write_text(dumps({'phases': self.phases}, indent=2))
+
+    def write_memory(self, output_file: Path) -> None:
+        """
+        Writes the recorded memory of all phases to a JSON file.  For each phase, the peak is the highest traced memory
+        in bytes while the phase ran, and the retained memory is how many more bytes were traced when the phase ended
+        than when it started, summed over every time the phase was timed.
+
+        :param output_file: The output file path to write.
+        :return: None
+        """
+        with self._lock:
+            output_file.write_text(dumps({'phases': self.memory}, indent=2))
+
+
+timer = PhaseTimer()  # create a default instance to time the phases of a run, use a custom instance if desired
@@ -17,7 +17,7 @@ setup(
     author='Edwin Lee, for NREL, for the United States Department of Energy',
     url='https://github.com/Myoldmopar/EnergyPlusRefactorHelper',
     license='ModifiedBSD',
-    install_requires=['matplotlib'],
+    install_requires=['matplotlib', 'numpy'],
     entry_points={
         'gui_scripts': [],
         'console_scripts': ['energyplus_refactor=energyplus_refactor_helper.main:run_cli']},